@@ -0,0 +1,141 @@
+"""
+event loop stall detection module.
+A heartbeat task on the event loop measures how late it is scheduled, which is the delay every other
+request sees too. A watchdog thread notices when the heartbeat stops for longer than the threshold,
+captures the stack of the event loop thread while it is still blocked and attributes the stall to the
+innermost frame of our own code, e.g. hash_password for a bcrypt call that was not moved to a worker
+thread. Stalls are logged with their stack and counted per callable.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from api.metrics import registry
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def is_app_frame(frame) -> bool:
+    """
+    check if a frame runs code of this app rather than of a library or of the monitor itself
+    """
+    filename = os.path.abspath(frame.f_code.co_filename)
+    return (
+        filename.startswith(ROOT_DIRECTORY)
+        and "site-packages" not in filename
+        and filename != os.path.abspath(__file__)
+    )
+
+
+def describe_frame(frame) -> str:
+    """
+    get the qualified name of the function a frame runs
+    """
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+class LoopMonitor:
+    """
+    measures event loop lag and reports the code paths that block the loop
+    """
+    def __init__(self, interval_seconds: float, threshold_seconds: float, metrics=registry):
+        self.interval_seconds = interval_seconds
+        self.threshold_seconds = threshold_seconds
+        self.metrics = metrics
+        self.last_stall = None
+        self._loop_thread_id = None
+        self._last_beat = None
+        self._beats = 0
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "LoopMonitor | None":
+        """
+        create a monitor from LOOP_MONITOR_INTERVAL_MS and LOOP_LAG_THRESHOLD_MS, or None if the threshold is 0
+        """
+        threshold_ms = float(os.environ.get("LOOP_LAG_THRESHOLD_MS", "250"))
+        if threshold_ms <= 0:
+            return None
+        interval_ms = float(os.environ.get("LOOP_MONITOR_INTERVAL_MS", "100"))
+        return cls(interval_seconds=interval_ms / 1000, threshold_seconds=threshold_ms / 1000)
+
+    def start(self):
+        """
+        start monitoring the running event loop
+        """
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-monitor", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        """
+        stop monitoring
+        """
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        await asyncio.to_thread(self._watchdog.join)
+        self._task = None
+        self._watchdog = None
+
+    async def _heartbeat(self):
+        while True:
+            scheduled_at = time.monotonic()
+            await asyncio.sleep(self.interval_seconds)
+            lag = max(0.0, time.monotonic() - scheduled_at - self.interval_seconds)
+            self._last_beat = time.monotonic()
+            self._beats += 1
+            self.metrics.set("event_loop_lag_seconds", lag, "delay of the last event loop heartbeat")
+            self.metrics.observe_max("event_loop_lag_max_seconds", lag, "highest event loop heartbeat delay")
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.interval_seconds / 2):
+            stalled_for = time.monotonic() - self._last_beat - self.interval_seconds
+            if stalled_for > self.threshold_seconds and reported_beat != self._beats:
+                reported_beat = self._beats
+                frame = sys._current_frames().get(self._loop_thread_id)  # pylint: disable=protected-access
+                if frame is not None:
+                    self.report_stall(stalled_for, frame)
+
+    def report_stall(self, stalled_for: float, frame) -> dict:
+        """
+        log and count a stall of the event loop, attributed to the innermost frame of app code
+        :param stalled_for: how long the loop has been blocked so far
+        :param frame: the current frame of the event loop thread
+        """
+        culprit = frame
+        while culprit is not None and not is_app_frame(culprit):
+            culprit = culprit.f_back
+        culprit = culprit or frame
+
+        stall = {
+            "callable": describe_frame(culprit),
+            "location": f"{os.path.relpath(culprit.f_code.co_filename, ROOT_DIRECTORY)}:{culprit.f_lineno}",
+            "blocked_in": describe_frame(frame),
+            "stalled_for_seconds": round(stalled_for, 3),
+            "stack": "".join(traceback.format_stack(frame)),
+        }
+        self.last_stall = stall
+        self.metrics.inc("event_loop_stalls_total", description="event loop stalls above the threshold",
+                         callable=stall["callable"])
+        print(
+            f"Event loop blocked for at least {stalled_for * 1000:.0f} ms in {stall['callable']} "
+            f"({stall['location']}), currently in {stall['blocked_in']}\n{stall['stack']}"
+        )
+        return stall
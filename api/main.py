@@ -2,10 +2,24 @@
 main module
 """
 
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 
+from api.loop_monitor import LoopMonitor
+from api.profiling import get_profiling_settings
+from data.bulkhead import BulkheadFullError
+from data.database_repository import DatabaseRepository
+from data.homepage_snapshot import get_snapshot_path
+from usecase.materialize_homepage import MaterializeHomePage
 from routes import auth_route_v1, litigations_route_v1, nonprofits_route_v1, users_route_v1, home_route_v1, experts_route_v1
-from routes.middleware import AuthMiddleware
+from routes import batch_route_v1, cache_route_v1, search_route_v1, stream_route_v1
+from routes import health_route, metrics_route, ready_route
+from routes.content_negotiation import NegotiatedResponse
+from routes.middleware import AdmissionControlMiddleware, AuthMiddleware, ContentNegotiationMiddleware, IdentityMapMiddleware
+from routes.middleware import ProfilingMiddleware
+from routes.token_revocation import RevocationListSync
 from fastapi.middleware.cors import CORSMiddleware
 
 origins = [
@@ -14,17 +28,69 @@ origins = [
     "http://localhost:3000",
 ]
 
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    """
+    start and stop background workers with the app
+    """
+    # watch the loop from the start so that blocking warm-up work is reported too
+    loop_monitor = LoopMonitor.from_env()
+    if loop_monitor:
+        loop_monitor.start()
+
+    # warm up in the background, /ready reports the worker as not ready until it is done
+    ready_route.worker_warm_up.start()
+
+    revocation_sync = RevocationListSync(DatabaseRepository)
+    revocation_sync.start()
+    search_route_v1.search_index_refresher.start()
+
+    snapshot_path = get_snapshot_path()
+    materializer = MaterializeHomePage(DatabaseRepository, snapshot_path) if snapshot_path else None
+    if materializer:
+        materializer.start()
+    yield
+    if materializer:
+        await materializer.stop()
+    await stream_route_v1.change_hub.stop()
+    await search_route_v1.search_index_refresher.stop()
+    await revocation_sync.stop()
+    await ready_route.worker_warm_up.stop()
+    if loop_monitor:
+        await loop_monitor.stop()
+
+
+async def bulkhead_full_handler(_: Request, error: BulkheadFullError):
+    """
+    answer requests whose database calls were rejected by a full bulkhead with a fast 503
+    """
+    return JSONResponse(
+        content={"detail": "Service temporarily unavailable, retry later"},
+        status_code=503,
+        headers={"Retry-After": str(math.ceil(error.retry_after))},
+    )
+
+
 def create_app():
     """
     create FastAPI app
     """
-    fastapi = FastAPI()
+    # routes answer in JSON or MessagePack depending on the Accept header
+    fastapi = FastAPI(lifespan=lifespan, default_response_class=NegotiatedResponse)
+    fastapi.add_exception_handler(BulkheadFullError, bulkhead_full_handler)
     fastapi.include_router(auth_route_v1.router, prefix="/v1")
     fastapi.include_router(users_route_v1.router, prefix="/v1")
     fastapi.include_router(litigations_route_v1.router, prefix="/v1")
     fastapi.include_router(home_route_v1.router, prefix="/v1")
     fastapi.include_router(experts_route_v1.router, prefix="/v1")
     fastapi.include_router(nonprofits_route_v1.router, prefix="/v1")
+    fastapi.include_router(search_route_v1.router, prefix="/v1")
+    fastapi.include_router(cache_route_v1.router, prefix="/v1")
+    fastapi.include_router(batch_route_v1.router, prefix="/v1")
+    fastapi.include_router(stream_route_v1.router, prefix="/v1")
+    fastapi.include_router(health_route.router)
+    fastapi.include_router(ready_route.router)
+    fastapi.include_router(metrics_route.router)
     return fastapi
 
 
@@ -32,6 +98,14 @@ app = create_app()
 
 # add custom authentication to app
 app.add_middleware(AuthMiddleware)
+app.add_middleware(IdentityMapMiddleware)
+app.add_middleware(ContentNegotiationMiddleware)
+# only installed when configured, so that profiling costs nothing otherwise
+profiling_settings = get_profiling_settings()
+if profiling_settings:
+    app.add_middleware(ProfilingMiddleware, **profiling_settings)
+# shed load before authenticating, but inside CORS so that rejections stay readable by browsers
+app.add_middleware(AdmissionControlMiddleware)
 app.add_middleware(
         CORSMiddleware,
         allow_origins=origins,
@@ -0,0 +1,99 @@
+"""
+in-process metrics module.
+Counters and gauges are kept in memory per worker and rendered in the Prometheus text format.
+Collectors are called on every scrape to report values that are cheaper to read than to track.
+"""
+
+import threading
+from collections import defaultdict
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+class MetricsRegistry:
+    """
+    registry of counters, gauges and collectors
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._types = {}
+        self._help = {}
+        self._values = defaultdict(dict)
+        self._collectors = []
+
+    def _declare(self, name: str, metric_type: str, description: str):
+        self._types.setdefault(name, metric_type)
+        if description:
+            self._help.setdefault(name, description)
+
+    def inc(self, name: str, value: float = 1, description: str = "", **labels):
+        """
+        increase a counter
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._declare(name, "counter", description)
+            self._values[name][key] = self._values[name].get(key, 0) + value
+
+    def set(self, name: str, value: float, description: str = "", **labels):
+        """
+        set a gauge
+        """
+        with self._lock:
+            self._declare(name, "gauge", description)
+            self._values[name][_label_key(labels)] = value
+
+    def observe_max(self, name: str, value: float, description: str = "", **labels):
+        """
+        raise a gauge to the given value if it is higher than the current one
+        """
+        key = _label_key(labels)
+        with self._lock:
+            self._declare(name, "gauge", description)
+            self._values[name][key] = max(self._values[name].get(key, value), value)
+
+    def register_collector(self, collector):
+        """
+        register a callable that reports gauges on every scrape.
+        It receives the registry and reports its values through set().
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def get(self, name: str, **labels):
+        """
+        get the current value of a metric, or None if it was never reported
+        """
+        self._collect()
+        with self._lock:
+            return self._values.get(name, {}).get(_label_key(labels))
+
+    def _collect(self):
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            try:
+                collector(self)
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"Error collecting metrics: {e}")
+
+    def render(self) -> str:
+        """
+        render all metrics in the Prometheus text exposition format
+        """
+        self._collect()
+        lines = []
+        with self._lock:
+            for name in sorted(self._values):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} {self._types[name]}")
+                for key, value in sorted(self._values[name].items()):
+                    labels = ",".join(f'{label}="{label_value}"' for label, label_value in key)
+                    lines.append(f"{name}{{{labels}}} {value}" if labels else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
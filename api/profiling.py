@@ -0,0 +1,70 @@
+"""
+on-demand request profiling module.
+A request is profiled when it carries a valid signed X-Debug-Profile header or is picked by the sample
+rate. The profile is written to PROFILE_DIR as a .prof file readable by pstats or snakeviz, next to a
+.json file with the route, status and timing of the request. The profiling middleware is only installed
+when PROFILE_DIR is configured, so it costs nothing otherwise.
+
+usage: python -m api.profiling [valid_seconds]   prints a header value signed with PROFILE_SECRET
+"""
+
+import hashlib
+import hmac
+import json
+import os
+import sys
+import time
+
+PROFILE_HEADER = "x-debug-profile"
+
+
+def get_profiling_settings() -> dict | None:
+    """
+    get the profiling middleware settings, or None if profiling is disabled
+    """
+    directory = os.environ.get("PROFILE_DIR")
+    secret = os.environ.get("PROFILE_SECRET") or None
+    sample_rate = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+    if not directory or (secret is None and sample_rate <= 0):
+        return None
+    return {"directory": directory, "secret": secret, "sample_rate": sample_rate}
+
+
+def sign_profile_request(secret: str, expires_at: int) -> str:
+    """
+    create a X-Debug-Profile header value that is valid until the given unix time
+    """
+    signature = hmac.new(secret.encode(), str(expires_at).encode(), hashlib.sha256).hexdigest()
+    return f"{expires_at}.{signature}"
+
+
+def verify_profile_request(value: str, secret: str, now: float | None = None) -> bool:
+    """
+    check a X-Debug-Profile header value is correctly signed and not expired
+    """
+    try:
+        expires_at, signature = value.split(".", 1)
+        if int(expires_at) < (now if now is not None else time.time()):
+            return False
+    except ValueError:
+        return False
+    expected = sign_profile_request(secret, int(expires_at)).split(".", 1)[1]
+    return hmac.compare_digest(signature, expected)
+
+
+def write_profile(directory: str, profile_id: str, profiler, metadata: dict):
+    """
+    write a finished profile and its request metadata to the profile directory
+    """
+    try:
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(directory, f"{profile_id}.prof"))
+        with open(os.path.join(directory, f"{profile_id}.json"), "w", encoding="utf-8") as file:
+            json.dump(metadata, file, indent=2)
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error writing profile {profile_id}: {e}")
+
+
+if __name__ == "__main__":
+    valid_seconds = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    print(sign_profile_request(os.environ["PROFILE_SECRET"], int(time.time()) + valid_seconds))
@@ -0,0 +1,156 @@
+"""
+production server module.
+Preloads the app, binds the listening socket once and forks a configurable number of uvicorn workers
+running on uvloop and httptools that share it. Dead workers are replaced, and on SIGTERM or SIGINT every
+worker stops accepting connections and drains its in-flight requests before the server exits.
+
+usage: python -m api.server
+"""
+
+import os
+import signal
+import socket
+import sys
+import time
+import uvicorn
+
+# importing the app before forking shares the loaded modules between the workers
+from api.main import app
+
+
+def get_worker_count() -> int:
+    """
+    get the number of worker processes, defaulting to one per core
+    """
+    return int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1)
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """
+    bind the listening socket shared by all workers
+    """
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(int(os.environ.get("BACKLOG", "2048")))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(worker_id: int, sock: socket.socket, graceful_shutdown_seconds: float):
+    """
+    serve the app on the shared socket until SIGTERM or SIGINT, then drain in-flight requests
+    """
+    os.environ["WORKER_ID"] = str(worker_id)
+    config = uvicorn.Config(
+        app,
+        loop="uvloop",
+        http="httptools",
+        lifespan="on",
+        timeout_graceful_shutdown=graceful_shutdown_seconds,
+        proxy_headers=True,
+        access_log=os.environ.get("ACCESS_LOG", "false").lower() == "true",
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """
+    forks the workers, replaces workers that die and shuts all of them down gracefully
+    """
+    def __init__(self, sock: socket.socket, worker_count: int, graceful_shutdown_seconds: float):
+        self.sock = sock
+        self.worker_count = worker_count
+        self.graceful_shutdown_seconds = graceful_shutdown_seconds
+        self.workers = {}
+        self.should_exit = False
+
+    def spawn(self, worker_id: int):
+        """
+        fork a worker process
+        """
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                run_worker(worker_id, self.sock, self.graceful_shutdown_seconds)
+            except BaseException as e:  # pylint: disable=broad-except
+                print(f"Worker {worker_id} failed: {e}")
+                exit_code = 1
+            os._exit(exit_code)  # pylint: disable=protected-access
+        self.workers[pid] = worker_id
+
+    def handle_exit(self, *_):
+        """
+        request a graceful shutdown
+        """
+        self.should_exit = True
+
+    def run(self) -> int:
+        """
+        run until asked to exit
+        :return: the process exit code
+        """
+        signal.signal(signal.SIGTERM, self.handle_exit)
+        signal.signal(signal.SIGINT, self.handle_exit)
+        for worker_id in range(self.worker_count):
+            self.spawn(worker_id)
+        print(f"Started {self.worker_count} workers on {self.sock.getsockname()}")
+
+        while not self.should_exit:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                pid, status = 0, 0
+            if pid and pid in self.workers and not self.should_exit:
+                worker_id = self.workers.pop(pid)
+                print(f"Worker {worker_id} (pid {pid}) exited with status {status}, restarting")
+                self.spawn(worker_id)
+            time.sleep(0.2)
+
+        return self.shutdown()
+
+    def shutdown(self) -> int:
+        """
+        ask every worker to drain and stop, and kill the ones that do not stop in time
+        """
+        for pid in self.workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_shutdown_seconds + 5
+        while self.workers and time.monotonic() < deadline:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid:
+                self.workers.pop(pid, None)
+            else:
+                time.sleep(0.1)
+
+        for pid in self.workers:
+            print(f"Worker pid {pid} did not stop in time, killing it")
+            os.kill(pid, signal.SIGKILL)
+        return 1 if self.workers else 0
+
+
+def main():
+    """
+    start the production server
+    """
+    sock = bind_socket(os.environ.get("HOST", "0.0.0.0"), int(os.environ.get("PORT", "80")))
+    supervisor = Supervisor(
+        sock,
+        worker_count=get_worker_count(),
+        graceful_shutdown_seconds=float(os.environ.get("GRACEFUL_SHUTDOWN_SECONDS", "30")),
+    )
+    sys.exit(supervisor.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+bulkheads for upstream database calls.
+Every class of repository operation gets its own concurrency limit, so a slow dependency such as the
+homepage RPC can only tie up the calls of its own class while login and listings keep their capacity.
+Calls that cannot get a slot within the wait timeout of their bulkhead fail fast with BulkheadFullError.
+"""
+
+import asyncio
+import contextlib
+import functools
+import os
+import threading
+import time
+from api.metrics import registry
+
+# default concurrency limit and wait timeout per bulkhead
+BULKHEAD_DEFAULTS = {
+    "auth": (8, 2.0),
+    "homepage": (4, 1.0),
+    "listings": (8, 1.0),
+    "writes": (4, 2.0),
+}
+
+# longest pause between two attempts of an async call to get a slot
+MAX_POLL_INTERVAL_SECONDS = 0.05
+
+
+class BulkheadFullError(Exception):
+    """
+    raised when a call could not get a slot in its bulkhead in time
+    """
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Bulkhead {name} is full")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """
+    concurrency limit shared by sync calls in worker threads and async calls on the event loop
+    """
+    def __init__(self, name: str, max_concurrency: int, wait_timeout_seconds: float):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.wait_timeout_seconds = wait_timeout_seconds
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+
+    def _update(self, active: int = 0, waiting: int = 0):
+        with self._lock:
+            self.active += active
+            self.waiting += waiting
+
+    def _reject(self):
+        registry.inc("bulkhead_rejected_calls_total", description="calls rejected by a full bulkhead",
+                     bulkhead=self.name)
+        raise BulkheadFullError(self.name, self.wait_timeout_seconds)
+
+    @contextlib.contextmanager
+    def acquire(self):
+        """
+        hold a slot for a blocking call, waiting up to the wait timeout for one.
+        A call made directly on the event loop thread does not wait, because waiting would stall the loop.
+        """
+        if not self._semaphore.acquire(blocking=False):
+            if _on_event_loop():
+                self._reject()
+            self._update(waiting=1)
+            try:
+                acquired = self._semaphore.acquire(timeout=self.wait_timeout_seconds)
+            finally:
+                self._update(waiting=-1)
+            if not acquired:
+                self._reject()
+
+        self._update(active=1)
+        try:
+            yield
+        finally:
+            self._update(active=-1)
+            self._semaphore.release()
+
+    @contextlib.asynccontextmanager
+    async def acquire_async(self):
+        """
+        hold a slot for a call on the event loop, waiting up to the wait timeout for one without blocking the loop
+        """
+        if not self._semaphore.acquire(blocking=False):
+            self._update(waiting=1)
+            try:
+                deadline = time.monotonic() + self.wait_timeout_seconds
+                interval = 0.001
+                while not self._semaphore.acquire(blocking=False):
+                    if time.monotonic() >= deadline:
+                        self._reject()
+                    await asyncio.sleep(interval)
+                    interval = min(interval * 2, MAX_POLL_INTERVAL_SECONDS)
+            finally:
+                self._update(waiting=-1)
+
+        self._update(active=1)
+        try:
+            yield
+        finally:
+            self._update(active=-1)
+            self._semaphore.release()
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+def bulkhead_from_env(name: str) -> Bulkhead:
+    """
+    create a bulkhead configured by BULKHEAD_<NAME>_MAX_CONCURRENCY and BULKHEAD_<NAME>_WAIT_SECONDS
+    """
+    max_concurrency, wait_timeout_seconds = BULKHEAD_DEFAULTS[name]
+    return Bulkhead(
+        name,
+        max_concurrency=int(os.environ.get(f"BULKHEAD_{name.upper()}_MAX_CONCURRENCY", max_concurrency)),
+        wait_timeout_seconds=float(os.environ.get(f"BULKHEAD_{name.upper()}_WAIT_SECONDS", wait_timeout_seconds)),
+    )
+
+
+bulkheads = {name: bulkhead_from_env(name) for name in BULKHEAD_DEFAULTS}
+
+
+def bulkhead(name: str):
+    """
+    decorator running a sync or async function inside the named bulkhead
+    """
+    def decorator(function):
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                async with bulkheads[name].acquire_async():
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with bulkheads[name].acquire():
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def report_bulkhead_metrics(metrics):
+    """
+    report the occupancy of every bulkhead
+    """
+    for name, instance in bulkheads.items():
+        metrics.set("bulkhead_active_calls", instance.active, "calls holding a bulkhead slot", bulkhead=name)
+        metrics.set("bulkhead_waiting_calls", instance.waiting, "calls waiting for a bulkhead slot", bulkhead=name)
+        metrics.set("bulkhead_max_concurrency", instance.max_concurrency, "bulkhead slots", bulkhead=name)
+
+
+registry.register_collector(report_bulkhead_metrics)
@@ -0,0 +1,158 @@
+"""
+change notification hub module.
+A single poller per process asks each channel what changed since the position reached by its previous poll
+and publishes the surrogate keys of the changed rows to every subscribed client, so the upstream load is the
+same for one or thousands of clients and does not grow with the size of the tables. The poller only runs
+while clients are subscribed. Each client has a small bounded queue; a client too slow to keep up has its
+queue dropped and receives a reset event telling it to refetch.
+"""
+
+import asyncio
+from api.metrics import registry
+
+# larger diffs are sent as the channel name, clients refetch the whole collection then
+MAX_EVENT_KEYS = 100
+
+
+class Subscription:
+    """
+    the queue of events of one client
+    """
+    def __init__(self, channels: set[str], queue_size: int):
+        self.channels = channels
+        self.queue = asyncio.Queue(queue_size)
+
+    def deliver(self, event: str, data: dict) -> bool:
+        """
+        queue an event for the client, replacing its backlog with a reset event when the queue is full
+        :return: False if the client had fallen behind
+        """
+        if event == "change" and data["channel"] not in self.channels:
+            return True
+        try:
+            self.queue.put_nowait((event, data))
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(("reset", {"reason": "client fell behind"}))
+            return False
+
+
+class ChangeHub:
+    """
+    polls the change sources once per process and fans the changes out to the subscribed clients
+    """
+    def __init__(self, sources: dict, interval_seconds: float, queue_size: int, max_clients: int):
+        """
+        :param sources: channel name -> async callable taking the position returned by its previous poll, or None
+            on the first poll, and returning the changed keys, the removed keys and the position to poll from next,
+            or None on failure. The first poll only returns the current position.
+        :param interval_seconds: the time between two polls
+        :param queue_size: the number of events queued per client
+        :param max_clients: the maximum number of subscribed clients
+        """
+        self.sources = sources
+        self.interval_seconds = interval_seconds
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.subscriptions = set()
+        self.events_published = 0
+        self.resets = 0
+        self._positions = {}
+        self._task = None
+
+    def is_full(self) -> bool:
+        """
+        whether the hub has no room for another client
+        """
+        return len(self.subscriptions) >= self.max_clients
+
+    def subscribe(self, channels: set[str]) -> Subscription | None:
+        """
+        subscribe a client to the changes of the given channels, starting the poller for the first client
+        :return: the subscription, or None if the hub is full
+        """
+        if self.is_full():
+            return None
+        subscription = Subscription(channels, self.queue_size)
+        self.subscriptions.add(subscription)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        unsubscribe a client, stopping the poller after the last one.
+        Synchronous, as it runs while the stream of a disconnected client is being cancelled.
+        """
+        self.subscriptions.discard(subscription)
+        if not self.subscriptions and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._positions = {}
+
+    async def stop(self):
+        """
+        disconnect every client and stop polling
+        """
+        self.subscriptions.clear()
+        if self._task is not None:
+            task, self._task = self._task, None
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._positions = {}
+
+    def publish(self, event: str, data: dict):
+        """
+        send an event to every subscribed client
+        """
+        self.events_published += 1
+        for subscription in list(self.subscriptions):
+            if not subscription.deliver(event, data):
+                self.resets += 1
+
+    async def poll(self):
+        """
+        ask every channel for the keys changed since its previous poll and publish them.
+        The first poll of a channel only records its position.
+        """
+        for channel, source in self.sources.items():
+            try:
+                changes = await source(self._positions.get(channel))
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"Error polling changes of {channel}: {e}")
+                continue
+            if changes is None:
+                continue
+
+            changed, removed, self._positions[channel] = changes
+            if not changed and not removed:
+                continue
+            if len(changed) + len(removed) > MAX_EVENT_KEYS:
+                changed, removed = [channel], []
+            self.publish("change", {"channel": channel, "changed": list(changed), "removed": list(removed)})
+
+    async def _run(self):
+        while True:
+            await self.poll()
+            await asyncio.sleep(self.interval_seconds)
+
+
+def report_change_hub_metrics(hub: ChangeHub, metrics):
+    """
+    report the clients and events of a change hub
+    """
+    metrics.set("stream_clients", len(hub.subscriptions), "clients subscribed to the change stream")
+    metrics.set("stream_events_published", hub.events_published, "change stream events published")
+    metrics.set("stream_client_resets", hub.resets, "change stream clients reset after falling behind")
+
+
+def register_change_hub_metrics(hub: ChangeHub):
+    """
+    report the metrics of a change hub on every scrape
+    """
+    registry.register_collector(lambda metrics: report_change_hub_metrics(hub, metrics))
@@ -2,21 +2,101 @@
 database operations module
 """
 
+import asyncio
+import functools
 import os
-from supabase import Client, create_client
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING
 from dotenv import load_dotenv
+from data.bulkhead import bulkhead
+from data.identity_map import forget, recall, remember
+from data.ttl_cache import TTLCache
 
-def get_database_client() -> Client:
+if TYPE_CHECKING:
+    from supabase import Client
+
+# the warm-up creates the clients in the background, requests arriving meanwhile must not create a second one
+_client_lock = threading.Lock()
+
+def get_database_client(role: str = "write") -> "Client":
+    """
+    get the supabase client for a role.
+    Writes go to DATABASE_URL. Reads go to the read replica at DATABASE_READ_URL when one is configured,
+    and share the primary client otherwise.
+    :param role: write or read
+    """
+    _load_environment()
+    with _client_lock:
+        if role == "read" and os.environ.get("DATABASE_READ_URL"):
+            return _create_database_client("read")
+        return _create_database_client("write")
+
+@functools.cache
+def _load_environment():
     """
-    create supabase client using environment variables
+    load the .env file once per process
     """
     load_dotenv()
 
+@functools.cache
+def _create_database_client(role: str) -> "Client":
+    """
+    create supabase client using environment variables.
+    The client is created once per process and role on first use, and supabase is only imported then,
+    because importing it accounts for a large share of the cold start time.
+    """
+    from supabase import create_client  # pylint: disable=import-outside-toplevel
+    from data.upstream_transport import configure_transport  # pylint: disable=import-outside-toplevel
+
+    if role == "read":
+        client: Client = create_client(
+            os.environ.get("DATABASE_READ_URL"),
+            os.environ.get("DATABASE_READ_API_KEY") or os.environ.get("DATABASE_API_KEY")
+        )
+        return configure_transport(client, name="database_read")
+
     client: Client = create_client(
         os.environ.get("DATABASE_URL"),
         os.environ.get("DATABASE_API_KEY")
     )
-    return client
+    return configure_transport(client)
+
+def prewarm_database_client():
+    """
+    create the database clients and open their upstream connections ahead of the first query
+    """
+    from data.upstream_transport import prewarm  # pylint: disable=import-outside-toplevel
+
+    write_client = get_database_client("write")
+    prewarm(write_client)
+    read_client = get_database_client("read")
+    if read_client is not write_client:
+        prewarm(read_client)
+
+def keyset_position(position) -> tuple[str, str | None]:
+    """
+    validate the keyset position of a change query: the ISO timestamp of the last row already seen and its
+    int or uuid id, or no id to start before every row of that timestamp.
+    Positions come from client version tokens and end up in the query filter, so anything else is rejected.
+    :raise ValueError: if the position is malformed
+    """
+    if not isinstance(position, (list, tuple)) or len(position) != 2 or not isinstance(position[0], str):
+        raise ValueError(f"Invalid keyset position: {position!r}")
+    changed_at, row_id = datetime.fromisoformat(position[0]).isoformat(), position[1]
+    if row_id is None:
+        return changed_at, None
+    if isinstance(row_id, int) and not isinstance(row_id, bool):
+        return changed_at, str(row_id)
+    if isinstance(row_id, str) and row_id.isascii() and row_id.isdigit():
+        return changed_at, row_id
+    if isinstance(row_id, str):
+        return changed_at, str(uuid.UUID(row_id))
+    raise ValueError(f"Invalid keyset position: {position!r}")
+
+# row counts are shared by all repository instances so that listing does not count on every request
+row_count_cache = TTLCache(ttl_seconds=float(os.environ.get("PAGINATION_COUNT_TTL_SECONDS", "30")))
 
 class DatabaseRepository:
     """
@@ -24,81 +104,288 @@ class DatabaseRepository:
     This class encapsulates the database operations and provides methods to interact with the database.
     """
     def __init__(self):
-        self.client = get_database_client()
+        self._client = None
+        self._read_client = None
+
+    @property
+    def client(self) -> "Client":
+        """
+        database client for writes, created on first use
+        """
+        if self._client is None:
+            self._client = get_database_client("write")
+        return self._client
+
+    @property
+    def read_client(self) -> "Client":
+        """
+        database client for reads, created on first use. This is the write client without a read replica.
+        """
+        if self._read_client is None:
+            self._read_client = get_database_client("read")
+        return self._read_client
 
-    def user_exists(self, value: str):
+    async def _get_user_rows(self, username: str) -> list[dict]:
+        """
+        get the rows of a user from the read replica.
+        A user that was just created may not have reached the replica yet, so a miss is re-checked
+        on the primary to keep signing up and logging in consistent.
+        """
+        rows = recall("users", username.lower())
+        if rows is not None:
+            return rows
+
+        query = self.read_client.table("users").select("*").eq("username", username.lower())
+        response = await asyncio.to_thread(query.execute)
+        if not response.data and self.read_client is not self.client:
+            query = self.client.table("users").select("*").eq("username", username.lower())
+            response = await asyncio.to_thread(query.execute)
+        remember("users", username.lower(), response.data)
+        return response.data
+
+    @bulkhead("auth")
+    async def user_exists(self, value: str):
         """
         check if user exists in database
         """
         try:
-            response = self.client.table("users").select(
-                "*").eq("username", value.lower()).execute()
-            return len(response.data) > 0 and response.data[0]["active"] == 1
+            rows = await self._get_user_rows(value)
+            return len(rows) > 0 and rows[0]["active"] == 1
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error checking if user exists: {e}")
             return False
 
 
-    def get_user_by_username(self, username: str):
+    @bulkhead("auth")
+    async def get_user_by_username(self, username: str):
         """
         get user from database by username
         """
         try:
-            response = self.client.table("users").select(
-                "*").eq("username", username.lower()).execute()
-            return response.data[0]
+            return (await self._get_user_rows(username))[0]
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting user by username: {e}")
             return None
 
 
-    def insert_user(self, username: str, hashed_password: str):
+    @bulkhead("writes")
+    async def insert_user(self, username: str, hashed_password: str):
         """
         inserts new user into database
         """
         try:
-            response = self.client.table("users")\
-                .insert({"username": username.lower(), "password": hashed_password})\
-                .execute()
-            return response.data
+            forget("users", username.lower())
+            query = self.client.table("users")\
+                .insert({"username": username.lower(), "password": hashed_password})
+            return (await asyncio.to_thread(query.execute)).data
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error inserting user into database: {e}")
             return None
 
 
-    def get_litigations(self):
+    @bulkhead("writes")
+    async def update_user_password(self, username: str, hashed_password: str):
+        """
+        replaces the stored password hash of a user
+        """
+        try:
+            forget("users", username.lower())
+            query = self.client.table("users")\
+                .update({"password": hashed_password})\
+                .eq("username", username.lower())
+            return (await asyncio.to_thread(query.execute)).data
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error updating user password: {e}")
+            return None
+
+
+    @bulkhead("writes")
+    async def insert_revoked_token(self, jti: str, expires_at: str):
+        """
+        inserts a revoked token id into database unless it is there already.
+        Relies on the unique constraint on jti, so that exactly one of several concurrent inserts succeeds.
+        :return: the inserted row in a list, an empty list if the token id was already revoked,
+            or None if the insert failed
+        """
+        try:
+            query = self.client.table("revoked_tokens")\
+                .upsert({"jti": jti, "expires_at": expires_at}, on_conflict="jti", ignore_duplicates=True)
+            return (await asyncio.to_thread(query.execute)).data
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error inserting revoked token into database: {e}")
+            return None
+
+
+    @bulkhead("auth")
+    async def get_revoked_tokens(self, revoked_after: str | None = None, batch_size: int = 1000):
+        """
+        get the revoked token ids that have not expired yet from database, fetched in batches that stay
+        within the API row limit
+        :param revoked_after: only get the tokens revoked at or after this ISO timestamp, or None for all of them
+        :param batch_size: the number of rows per request
+        :return: list of revoked tokens or None if they could not be read
+        """
+        try:
+            rows = []
+            while True:
+                query = self.read_client.table("revoked_tokens").select("jti, expires_at, revoked_at")\
+                    .gt("expires_at", datetime.now(timezone.utc).isoformat())
+                if revoked_after is not None:
+                    query = query.gte("revoked_at", revoked_after)
+                query = query.order("revoked_at").order("jti").range(len(rows), len(rows) + batch_size - 1)
+                response = await asyncio.to_thread(query.execute)
+                rows.extend(response.data)
+                if len(response.data) < batch_size:
+                    return rows
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting revoked tokens: {e}")
+            return None
+
+
+    @bulkhead("listings")
+    async def get_litigations(self):
         """
         get all litigations from database
         """
         try:
-            response = self.client.table("Litigation").select("*").execute()
-            return response.data
+            query = self.read_client.table("Litigation").select("*")
+            return (await asyncio.to_thread(query.execute)).data
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting all litigations: {e}")
             return None
 
+    @bulkhead("homepage")
     async def get_homepage_data(self):
         """
         get homepage data through join queries from database
         """
         try:
-            response = self.client.rpc("get_homepage_data").execute()
-            return response.data
+            query = self.read_client.rpc("get_homepage_data")
+            return (await asyncio.to_thread(query.execute)).data
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting homepage data: {e}")
             return None
 
+    @bulkhead("homepage")
+    async def get_litigations_by_harm_and_risk_ids(self, harm_and_risk_ids: list):
+        """
+        get litigations for the given harm and risk ids with a single query
+        :param harm_and_risk_ids: the ids of the harms and risks
+        :return: list of litigations
+        """
+        return await self._get_by_harm_and_risk_ids("Litigation", harm_and_risk_ids)
+
+    @bulkhead("homepage")
+    async def get_policies_by_harm_and_risk_ids(self, harm_and_risk_ids: list):
+        """
+        get policies for the given harm and risk ids with a single query
+        :param harm_and_risk_ids: the ids of the harms and risks
+        :return: list of policies
+        """
+        return await self._get_by_harm_and_risk_ids("policies", harm_and_risk_ids)
+
+    @bulkhead("homepage")
+    async def get_resources_by_harm_and_risk_ids(self, harm_and_risk_ids: list):
+        """
+        get resources for the given harm and risk ids with a single query
+        :param harm_and_risk_ids: the ids of the harms and risks
+        :return: list of resources
+        """
+        return await self._get_by_harm_and_risk_ids("resources", harm_and_risk_ids)
+
+    async def _get_by_harm_and_risk_ids(self, table: str, harm_and_risk_ids: list):
+        """
+        fetch all rows of a table linked to any of the given harm and risk ids.
+        The blocking query runs in a worker thread so that several of these can run concurrently.
+        """
+        try:
+            query = self.read_client.table(table).select("*").in_("harm_and_risk_id", harm_and_risk_ids)
+            response = await asyncio.to_thread(query.execute)
+            return response.data
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting {table} by harm and risk ids: {e}")
+            return None
+
+    @bulkhead("listings")
+    async def get_all_rows(self, table: str, batch_size: int = 1000):
+        """
+        get every row of a table, fetched in batches that stay within the API row limit
+        :param table: the table to read
+        :param batch_size: the number of rows per request
+        :return: list of rows or None if the table could not be read
+        """
+        try:
+            rows = []
+            while True:
+                query = self.read_client.table(table).select("*").order("id")\
+                    .range(len(rows), len(rows) + batch_size - 1)
+                response = await asyncio.to_thread(query.execute)
+                rows.extend(response.data)
+                if len(response.data) < batch_size:
+                    return rows
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting all rows of {table}: {e}")
+            return None
+
+    @bulkhead("listings")
+    async def get_rows_changed_after(self, table: str, column: str, after: list | None, limit: int,
+                                     id_column: str = "id", **equals):
+        """
+        get the rows of a table ordered by a change timestamp and id, starting after a keyset position
+        :param table: the table to read
+        :param column: the change timestamp column, e.g. updated_at
+        :param after: the timestamp and id of the last row already seen, see keyset_position,
+            or None to start from the beginning
+        :param limit: the maximum number of rows
+        :param id_column: the column breaking ties between rows changed at the same time
+        :param equals: additional column filters
+        :return: list of rows or None if the table could not be read
+        """
+        try:
+            query = self.read_client.table(table).select("*")
+            for name, value in equals.items():
+                query = query.eq(name, value)
+            if after is not None:
+                changed_at, row_id = keyset_position(after)
+                if row_id is None:
+                    query = query.gte(column, changed_at)
+                else:
+                    query = query.or_(
+                        f'{column}.gt."{changed_at}",and({column}.eq."{changed_at}",{id_column}.gt."{row_id}")'
+                    )
+            query = query.order(column).order(id_column).limit(limit)
+            return (await asyncio.to_thread(query.execute)).data
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting changed rows of {table}: {e}")
+            return None
+
+    @bulkhead("listings")
+    async def get_nonprofits_by_entity_ids(self, entity_ids: list):
+        """
+        get the nonprofits of the given entities from database
+        :param entity_ids: the ids of the entities
+        :return: list of nonprofits or None if they could not be read
+        """
+        try:
+            query = self.read_client.table("nonprofits").select("*").in_("entity_id", entity_ids)
+            return (await asyncio.to_thread(query.execute)).data
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting nonprofits by entity ids: {e}")
+            return None
+
+    @bulkhead("homepage")
     async def get_structural_subfactors(self):
         """
         get all structural subfactors from database
         """
         try:
-            response = self.client.table("structural_sub_factors").select("*").execute()
-            return response.data
+            query = self.read_client.table("structural_sub_factors").select("*")
+            return (await asyncio.to_thread(query.execute)).data
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting all structural subfactors: {e}")
             return None
 
+    @bulkhead("listings")
     async def get_experts(self, page_number: int = 1, page_size: int = 10):
         """
         get experts from database. Handles pagination.
@@ -107,14 +394,38 @@ class DatabaseRepository:
         :return: list of experts
         """
         try:
-            response = self.client.table("experts").select("*").range(
+            query = self.read_client.table("experts").select("*").range(
                 (page_number - 1) * page_size, page_number * page_size - 1
-            ).execute()
-            return response.data
+            )
+            return (await asyncio.to_thread(query.execute)).data
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting all experts: {e}")
             return None
 
+    @bulkhead("listings")
+    async def count_rows(self, table: str):
+        """
+        get the number of rows of a table. Counts are cached per table for a short time.
+        The count method is configured with PAGINATION_COUNT_METHOD: exact, planned or estimated.
+        :param table: the table to count
+        :return: the row count or None if it could not be determined
+        """
+        total = row_count_cache.get(table)
+        if total is not None:
+            return total
+
+        try:
+            count_method = os.environ.get("PAGINATION_COUNT_METHOD", "estimated")
+            query = self.read_client.table(table).select("*", count=count_method, head=True)
+            response = await asyncio.to_thread(query.execute)
+            if response.count is not None:
+                row_count_cache.set(table, response.count)
+            return response.count
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error counting rows of {table}: {e}")
+            return None
+
+    @bulkhead("listings")
     async def get_expert_by_id(self, expert_id: str):
         """
         get expert by given expert id from database
@@ -122,12 +433,18 @@ class DatabaseRepository:
         :return: expert data or None if not found
         """
         try:
-            response = self.client.table("experts").select("*").eq("id", expert_id).execute()
+            rows = recall("experts", expert_id)
+            if rows is not None:
+                return rows
+            query = self.read_client.table("experts").select("*").eq("id", expert_id)
+            response = await asyncio.to_thread(query.execute)
+            remember("experts", expert_id, response.data)
             return response.data
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting expert by id: {e}")
             return None
 
+    @bulkhead("listings")
     async def get_nonprofits(self, page_number: int = 1, page_size: int = 4):
         """
         get nonprofits from database. Handles pagination.
@@ -136,23 +453,24 @@ class DatabaseRepository:
         :return: list of nonprofits
         """
         try:
-            response = self.client.table("nonprofits").select("*").range(
+            query = self.read_client.table("nonprofits").select("*").range(
                 (page_number - 1) * page_size, page_number * page_size - 1
-            ).execute()
+            )
+            response = await asyncio.to_thread(query.execute)
             if not response.data:
                 print(f"Error getting all nonprofits: {response}")
                 return None
-            entities = []
             for nonprofit in response.data:
-                entity = await self.get_entity_by_nonprofit_id(nonprofit["id"])
-                if entity:
-                    entities.append(entity[0])
+                remember("nonprofits", nonprofit["id"], [nonprofit])
 
-            return entities
+            # the page already holds the entity ids, so the entities are fetched with one query
+            entity_ids = [nonprofit["entity_id"] for nonprofit in response.data if nonprofit.get("entity_id")]
+            return await self._get_rows_by_ids("entities", entity_ids)
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting all nonprofits: {e}")
             return None
 
+    @bulkhead("listings")
     async def get_entity_by_nonprofit_id(self, nonprofit_id: str):
         """
         get entity by given nonprofit id from database
@@ -160,14 +478,65 @@ class DatabaseRepository:
         :return: entity data or None if not found
         """
         try:
-            response = self.client.table("nonprofits").select("entity_id").eq("id", nonprofit_id).execute()
-            if not response.data:
-                print(f"Error getting entity by nonprofit id: {response}")
-                return None
+            nonprofits = recall("nonprofits", nonprofit_id)
+            if nonprofits is None:
+                query = self.read_client.table("nonprofits").select("*").eq("id", nonprofit_id)
+                response = await asyncio.to_thread(query.execute)
+                if not response.data:
+                    print(f"Error getting entity by nonprofit id: {response}")
+                    return None
+                nonprofits = response.data
+                remember("nonprofits", nonprofit_id, nonprofits)
 
-            entity_id = response.data[0]["entity_id"]
-            response = self.client.table("entities").select("*").eq("id", entity_id).execute()
-            return response.data
+            entity_id = nonprofits[0]["entity_id"]
+            entities = recall("entities", entity_id)
+            if entities is None:
+                query = self.read_client.table("entities").select("*").eq("id", entity_id)
+                entities = (await asyncio.to_thread(query.execute)).data
+                remember("entities", entity_id, entities)
+            return entities
         except Exception as e:  # pylint: disable=broad-except
             print(f"Error getting entity by nonprofit id: {e}")
             return None
+
+    @bulkhead("listings")
+    async def get_experts_by_ids(self, expert_ids: list):
+        """
+        get the experts with the given ids from database, in the order of the given ids
+        :param expert_ids: the ids of the experts
+        :return: list of experts
+        """
+        try:
+            return await self._get_rows_by_ids("experts", expert_ids)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting experts by ids: {e}")
+            return None
+
+    @bulkhead("listings")
+    async def get_nonprofits_by_ids(self, nonprofit_ids: list):
+        """
+        get the entities of the nonprofits with the given ids from database, in the order of the given ids
+        :param nonprofit_ids: the ids of the nonprofits
+        :return: list of nonprofit entities
+        """
+        try:
+            nonprofits = await self._get_rows_by_ids("nonprofits", nonprofit_ids)
+            entity_ids = [nonprofit["entity_id"] for nonprofit in nonprofits]
+            return await self._get_rows_by_ids("entities", entity_ids)
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error getting nonprofits by ids: {e}")
+            return None
+
+    async def _get_rows_by_ids(self, table: str, ids: list) -> list[dict]:
+        """
+        fetch the rows of a table with the given ids in the order of the ids.
+        Rows already loaded during the current request are reused, the others are fetched with one query.
+        """
+        rows = {str(row_id): recall(table, row_id) for row_id in ids}
+        missing_ids = [row_id for row_id in ids if rows[str(row_id)] is None]
+        if missing_ids:
+            query = self.read_client.table(table).select("*").in_("id", missing_ids)
+            for row in (await asyncio.to_thread(query.execute)).data:
+                rows[str(row["id"])] = [row]
+                remember(table, row["id"], [row])
+        return [rows[str(row_id)][0] for row_id in ids if rows[str(row_id)]]
@@ -0,0 +1,32 @@
+"""
+edge cache purge module.
+Purges cached responses from the edge network by surrogate key through the purge API configured with
+EDGE_PURGE_URL and EDGE_PURGE_TOKEN.
+"""
+
+import os
+
+
+def is_edge_purge_configured() -> bool:
+    """
+    check if an edge purge API is configured
+    """
+    return bool(os.environ.get("EDGE_PURGE_URL"))
+
+
+async def purge_edge_cache(keys: list[str]):
+    """
+    purge every cached response tagged with any of the given surrogate keys
+    :param keys: the surrogate keys to purge
+    :raises httpx.HTTPError: if the purge API could not be reached or rejected the request
+    """
+    # httpx is only needed when purging, so it is not imported at startup
+    import httpx  # pylint: disable=import-outside-toplevel
+
+    async with httpx.AsyncClient(timeout=float(os.environ.get("EDGE_PURGE_TIMEOUT_SECONDS", "5"))) as client:
+        response = await client.post(
+            os.environ["EDGE_PURGE_URL"],
+            json={"tags": keys},
+            headers={"Authorization": f"Bearer {os.environ.get('EDGE_PURGE_TOKEN', '')}"},
+        )
+        response.raise_for_status()
@@ -0,0 +1,89 @@
+"""
+homepage facet index module.
+The homepage payload is a tree of structural subfactors, their harms and risks and the experts and
+nonprofits linked to each harm and risk. The index flattens that tree once per data version into
+subfactor -> harm and risk -> item id lookups, so that list endpoints can filter by a node of the tree
+without a join query, and keeps every subfactor and harm and risk addressable by id so that a single
+subtree can be served without walking or sending the whole tree.
+"""
+
+# the item collections of a harm and risk that can be filtered by facet
+FACET_COLLECTIONS = ("experts", "nonprofits")
+
+
+class HomepageIndex:
+    """
+    immutable facet index over one version of the homepage payload
+    """
+    def __init__(self, subfactors: list[dict], version=None):
+        self.version = version
+        self.subfactors = []
+        self._harm_and_risk_ids = {}
+        self._items = {}
+        self._subfactor_items = {}
+        self._subfactor_nodes = {}
+        self._harm_and_risk_nodes = {}
+
+        for subfactor in subfactors or []:
+            subfactor_id = str(subfactor["id"])
+            harms_and_risks = subfactor.get("harms_and_risks") or []
+            self._subfactor_nodes[subfactor_id] = subfactor
+            summary = {key: value for key, value in subfactor.items() if not isinstance(value, (list, dict))}
+            summary["harms_and_risks"] = []
+            self._harm_and_risk_ids[subfactor_id] = [str(harm_and_risk["id"]) for harm_and_risk in harms_and_risks]
+
+            for harm_and_risk in harms_and_risks:
+                item_ids = {
+                    collection: list(dict.fromkeys(str(item["id"]) for item in harm_and_risk.get(collection) or []))
+                    for collection in FACET_COLLECTIONS
+                }
+                self._items[str(harm_and_risk["id"])] = item_ids
+                self._harm_and_risk_nodes[str(harm_and_risk["id"])] = harm_and_risk
+                harm_and_risk_summary = {
+                    key: value for key, value in harm_and_risk.items() if not isinstance(value, (list, dict))
+                }
+                for collection in FACET_COLLECTIONS:
+                    harm_and_risk_summary[f"{collection}_count"] = len(item_ids[collection])
+                summary["harms_and_risks"].append(harm_and_risk_summary)
+            self.subfactors.append(summary)
+            self._subfactor_items[subfactor_id] = {
+                collection: self._union(self._harm_and_risk_ids[subfactor_id], collection)
+                for collection in FACET_COLLECTIONS
+            }
+
+    def subfactor(self, subfactor_id) -> dict | None:
+        """
+        get a subfactor with its harms and risks and their items, or None if it does not exist
+        """
+        return self._subfactor_nodes.get(str(subfactor_id))
+
+    def harm_and_risk(self, harm_and_risk_id) -> dict | None:
+        """
+        get a harm and risk with its items, or None if it does not exist
+        """
+        return self._harm_and_risk_nodes.get(str(harm_and_risk_id))
+
+    def item_ids(self, collection: str, subfactor_id: str | None = None,
+                 harm_and_risk_id: str | None = None) -> list[str]:
+        """
+        get the ids of the items of a collection linked to a subfactor and/or a harm and risk,
+        in the order they appear in the homepage payload
+        :param collection: experts or nonprofits
+        :param subfactor_id: only items linked to a harm and risk of this subfactor
+        :param harm_and_risk_id: only items linked to this harm and risk
+        """
+        if harm_and_risk_id is None:
+            if subfactor_id is None:
+                return self._union(self._items, collection)
+            return self._subfactor_items.get(str(subfactor_id), {}).get(collection, [])
+
+        if subfactor_id is not None and str(harm_and_risk_id) not in self._harm_and_risk_ids.get(str(subfactor_id), []):
+            return []
+        return self._items.get(str(harm_and_risk_id), {}).get(collection, [])
+
+    def _union(self, harm_and_risk_ids, collection: str) -> list[str]:
+        return list(dict.fromkeys(
+            item_id
+            for harm_and_risk_id in harm_and_risk_ids
+            for item_id in self._items.get(harm_and_risk_id, {}).get(collection, [])
+        ))
@@ -0,0 +1,129 @@
+"""
+homepage snapshot storage module.
+A snapshot is a single local file holding a fixed size header followed by the serialized homepage payload.
+Snapshots are written atomically and read through a memory map so that serving them does not copy
+or re-serialize the payload.
+"""
+
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+SNAPSHOT_MAGIC = b"GBHS"
+SNAPSHOT_FORMAT_VERSION = 1
+# magic, format version, data version, payload length
+SNAPSHOT_HEADER = struct.Struct(">4sHQQ")
+
+
+def get_snapshot_path() -> str | None:
+    """
+    get the configured homepage snapshot path. Snapshots are disabled when it is not set.
+    """
+    return os.environ.get("HOMEPAGE_SNAPSHOT_PATH") or None
+
+
+def write_snapshot(path: str, payload: bytes, version: int | None = None) -> int:
+    """
+    atomically write a new snapshot file.
+    The payload is written to a temporary file in the same directory, flushed to disk and renamed over
+    the previous snapshot, so readers either see the old or the new snapshot but never a partial one.
+    :param path: the snapshot file path
+    :param payload: the serialized homepage payload
+    :param version: the data version, defaults to the current time in nanoseconds
+    :return: the data version that was written
+    """
+    version = version if version is not None else time.time_ns()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".homepage-snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            tmp_file.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, version, len(payload)))
+            tmp_file.write(payload)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return version
+
+
+class HomepageSnapshotReader:
+    """
+    memory-mapped reader for the homepage snapshot file.
+    The file is mapped once per snapshot version and re-mapped when the materializer replaces it.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_id = None
+        self._version = None
+        self._payload = None
+
+    @property
+    def version(self) -> int | None:
+        """
+        data version of the currently mapped snapshot
+        """
+        return self._version
+
+    def read(self) -> memoryview | None:
+        """
+        get a zero-copy view on the latest snapshot payload
+        :return: the payload or None if no valid snapshot exists
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+
+        file_id = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if file_id != self._file_id:
+                self._payload, self._version = self._map(stat.st_size)
+                self._file_id = file_id
+            return self._payload
+
+    def _map(self, size: int):
+        """
+        map the snapshot file and validate its header.
+        Previously returned views keep the old mapping alive until they are released.
+        """
+        if size < SNAPSHOT_HEADER.size:
+            print(f"Error reading homepage snapshot: file {self.path} is truncated")
+            return None, None
+
+        try:
+            with open(self.path, "rb") as snapshot_file:
+                mapped = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            print(f"Error reading homepage snapshot: {e}")
+            return None, None
+
+        magic, format_version, version, length = SNAPSHOT_HEADER.unpack_from(mapped)
+        if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION \
+                or SNAPSHOT_HEADER.size + length != len(mapped):
+            print(f"Error reading homepage snapshot: file {self.path} has an invalid header")
+            mapped.close()
+            return None, None
+
+        return memoryview(mapped)[SNAPSHOT_HEADER.size:], version
+
+
+_readers: dict[str, HomepageSnapshotReader] = {}
+
+
+def get_snapshot_reader(path: str) -> HomepageSnapshotReader:
+    """
+    get the process wide reader for the given snapshot path
+    """
+    reader = _readers.get(path)
+    if reader is None:
+        reader = _readers.setdefault(path, HomepageSnapshotReader(path))
+    return reader
@@ -0,0 +1,68 @@
+"""
+request-scoped identity map module.
+Within one request the same row is often looked up more than once, for example the user on login.
+The identity map remembers the rows loaded by key for the lifetime of the current request, so repeated
+lookups are served without another upstream query. The map lives in a context variable that is set
+per request by IdentityMapMiddleware, so lookups outside of a request are never cached.
+"""
+
+import contextvars
+
+
+class IdentityMap:
+    """
+    rows loaded during one request, by table and key
+    """
+    def __init__(self):
+        self._rows = {}
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, table: str, key, default=None):
+        """
+        get a remembered row, or the default if it was not loaded yet
+        """
+        return self._rows.get((table, str(key)), default)
+
+    def set(self, table: str, key, value):
+        """
+        remember a loaded row
+        """
+        self._rows[(table, str(key))] = value
+
+    def discard(self, table: str, key):
+        """
+        forget a row, e.g. after it was written
+        """
+        self._rows.pop((table, str(key)), None)
+
+
+current_identity_map: contextvars.ContextVar[IdentityMap | None] = contextvars.ContextVar(
+    "current_identity_map", default=None)
+
+
+def recall(table: str, key):
+    """
+    get a row loaded earlier in the current request, or None
+    """
+    identity_map = current_identity_map.get()
+    return identity_map.get(table, key) if identity_map is not None else None
+
+
+def remember(table: str, key, value):
+    """
+    remember a loaded row for the rest of the current request. Missing rows are not remembered.
+    """
+    identity_map = current_identity_map.get()
+    if identity_map is not None and value:
+        identity_map.set(table, key, value)
+
+
+def forget(table: str, key):
+    """
+    forget a row of the current request after it was written
+    """
+    identity_map = current_identity_map.get()
+    if identity_map is not None:
+        identity_map.discard(table, key)
@@ -0,0 +1,117 @@
+"""
+next page prefetching module.
+Users browsing a list almost always request page N+1 right after page N, so after serving a page the
+next one can be fetched in the background into a short-lived cache. Prefetching is opt-in with
+PREFETCH_NEXT_PAGE and bounded: only a few prefetches run at a time, and none start while the listings
+bulkhead is busy, so that prefetching never adds load to an upstream that is already struggling.
+Prefetches outlive the request that started them, so they read through their own repository and run
+outside the request context, never holding on to the request's repository or identity map.
+"""
+
+import asyncio
+import contextvars
+import os
+from api.metrics import registry
+from data.bulkhead import bulkheads
+from data.database_repository import DatabaseRepository
+from data.ttl_cache import TTLCache
+
+# list -> repository method reading its pages
+PAGE_READERS = {"experts": "get_experts", "nonprofits": "get_nonprofits"}
+
+
+class PagePrefetcher:
+    """
+    serves list pages from a cache of prefetched pages and prefetches the following pages
+    """
+    def __init__(self, enabled: bool, ttl_seconds: float, max_in_flight: int, bulkhead_name: str = "listings",
+                 repository_factory=DatabaseRepository):
+        self.enabled = enabled
+        self.repository_factory = repository_factory
+        self.max_in_flight = max_in_flight
+        self.bulkhead_name = bulkhead_name
+        self.pages = TTLCache(ttl_seconds=ttl_seconds, max_entries=256)
+        self._in_flight = {}
+
+    @classmethod
+    def from_env(cls) -> "PagePrefetcher":
+        """
+        create a prefetcher from PREFETCH_NEXT_PAGE, PREFETCH_TTL_SECONDS and PREFETCH_MAX_IN_FLIGHT
+        """
+        return cls(
+            enabled=os.environ.get("PREFETCH_NEXT_PAGE", "false").lower() == "true",
+            ttl_seconds=float(os.environ.get("PREFETCH_TTL_SECONDS", "10")),
+            max_in_flight=int(os.environ.get("PREFETCH_MAX_IN_FLIGHT", "2")),
+        )
+
+    async def get_page(self, table: str, page_number: int, page_size: int, fetch):
+        """
+        get a page from the prefetched pages, or fetch it
+        :param table: the listed table
+        :param page_number: the page number
+        :param page_size: the number of rows per page
+        :param fetch: async callable taking page_number and page_size that reads the page
+        """
+        if self.enabled:
+            rows = self.pages.get((table, page_number, page_size))
+            if rows is not None:
+                registry.inc("page_prefetch_total", description="next page prefetches by outcome", outcome="hit")
+                return rows
+        return await fetch(page_number=page_number, page_size=page_size)
+
+    def has_budget(self) -> bool:
+        """
+        check if another prefetch may start: the in flight limit is not reached and the bulkhead has headroom
+        """
+        if len(self._in_flight) >= self.max_in_flight:
+            return False
+        bulkhead = bulkheads.get(self.bulkhead_name)
+        return bulkhead is None or (bulkhead.waiting == 0 and bulkhead.active < bulkhead.max_concurrency // 2)
+
+    def prefetch(self, table: str, page_number: int, page_size: int) -> bool:
+        """
+        fetch a page in the background if prefetching is enabled and within budget
+        :param table: the listed table, one of PAGE_READERS
+        :return: True if the prefetch was started
+        """
+        key = (table, page_number, page_size)
+        if not self.enabled or key in self._in_flight or self.pages.get(key) is not None:
+            return False
+        if not self.has_budget():
+            registry.inc("page_prefetch_total", description="next page prefetches by outcome", outcome="skipped")
+            return False
+        # an empty context keeps the request's identity map out of the task
+        self._in_flight[key] = asyncio.create_task(self._prefetch(key), context=contextvars.Context())
+        return True
+
+    async def _prefetch(self, key: tuple):
+        table, page_number, page_size = key
+        try:
+            fetch = getattr(self.repository_factory(), PAGE_READERS[table])
+            rows = await fetch(page_number=page_number, page_size=page_size)
+            if rows:
+                self.pages.set(key, rows)
+            outcome = "fetched" if rows is not None else "failed"
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error prefetching page {key}: {e}")
+            outcome = "failed"
+        finally:
+            self._in_flight.pop(key, None)
+        registry.inc("page_prefetch_total", description="next page prefetches by outcome", outcome=outcome)
+
+    def invalidate(self):
+        """
+        drop every prefetched page
+        """
+        self.pages.clear()
+
+
+page_prefetcher = PagePrefetcher.from_env()
+
+
+def get_page_prefetcher() -> PagePrefetcher:
+    """
+    dependency to get the process wide page prefetcher.
+    This allows for easy testing and mocking of the prefetcher.
+    """
+    return page_prefetcher
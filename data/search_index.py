@@ -0,0 +1,208 @@
+"""
+in-process full-text search index module.
+Documents are tokenized into an inverted index (term -> document -> term frequency). Query terms match
+indexed terms exactly or by prefix, results must match every query term and are ranked with BM25.
+The index is updated incrementally: syncing a table only re-indexes rows whose content changed and
+removes rows that disappeared. Rows are tokenized before the index lock is taken and applied in small
+batches, so that searches only ever wait for a short update.
+"""
+
+import bisect
+import hashlib
+import heapq
+import json
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# prefix matches rank below exact matches
+PREFIX_MATCH_WEIGHT = 0.5
+# a short prefix can match many terms, only the most frequent ones are used
+MAX_PREFIX_EXPANSIONS = 64
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# number of changed documents applied per hold of the index lock during a sync
+SYNC_BATCH_SIZE = 256
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    split text into lowercase word tokens
+    """
+    return TOKEN_PATTERN.findall(text.casefold())
+
+
+def _fingerprint(row: dict) -> bytes:
+    return hashlib.blake2b(json.dumps(row, sort_keys=True, default=str).encode(), digest_size=16).digest()
+
+
+def searchable_text(row: dict) -> str:
+    """
+    get the text of a row that is indexed: every string value except ids, timestamps and links
+    """
+    return " ".join(
+        value for key, value in row.items()
+        if isinstance(value, str) and not key.endswith(("id", "_at", "url")) and not value.startswith("http")
+    )
+
+
+class SearchIndex:
+    """
+    inverted index over documents identified by (type, id)
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._lengths = {}
+        self._total_length = 0
+        self._sorted_terms = []
+        self._terms_dirty = False
+
+    def __len__(self):
+        return len(self._documents)
+
+    def upsert(self, doc_type: str, row: dict) -> bool:
+        """
+        index a row, replacing the previous version of the same document
+        :return: True if the document was added or changed
+        """
+        key, fingerprint = (doc_type, str(row["id"])), _fingerprint(row)
+        terms = Counter(tokenize(searchable_text(row)))
+        with self._lock:
+            return self._apply(key, fingerprint, row, terms)
+
+    def _apply(self, key, fingerprint: bytes, row: dict, terms: Counter) -> bool:
+        existing = self._documents.get(key)
+        if existing and existing["fingerprint"] == fingerprint:
+            return False
+        if existing:
+            self._remove(key)
+
+        for term, frequency in terms.items():
+            if term not in self._postings:
+                self._terms_dirty = True
+            self._postings[term][key] = frequency
+        length = sum(terms.values())
+        self._documents[key] = {"row": row, "terms": terms, "fingerprint": fingerprint}
+        self._lengths[key] = length
+        self._total_length += length
+        return True
+
+    def remove(self, doc_type: str, doc_id) -> bool:
+        """
+        remove a document from the index
+        :return: True if the document was indexed
+        """
+        with self._lock:
+            key = (doc_type, str(doc_id))
+            if key not in self._documents:
+                return False
+            self._remove(key)
+            return True
+
+    def _remove(self, key):
+        document = self._documents.pop(key)
+        self._total_length -= self._lengths.pop(key)
+        for term in document["terms"]:
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                self._terms_dirty = True
+
+    def sync(self, doc_type: str, rows: list[dict]) -> tuple[int, int]:
+        """
+        bring all documents of a type in line with the given rows
+        :return: the number of changed and removed documents
+        """
+        # fingerprinting and tokenizing happen without the lock, only changed documents are applied under it
+        current_ids = {str(row["id"]) for row in rows}
+        documents = []
+        for row in rows:
+            key, fingerprint = (doc_type, str(row["id"])), _fingerprint(row)
+            existing = self._documents.get(key)
+            if not existing or existing["fingerprint"] != fingerprint:
+                documents.append((key, fingerprint, row, Counter(tokenize(searchable_text(row)))))
+
+        changed = 0
+        for start in range(0, len(documents), SYNC_BATCH_SIZE):
+            with self._lock:
+                changed += sum(self._apply(*document) for document in documents[start:start + SYNC_BATCH_SIZE])
+        with self._lock:
+            stale_keys = [key for key in self._documents if key[0] == doc_type and key[1] not in current_ids]
+            for key in stale_keys:
+                self._remove(key)
+        return changed, len(stale_keys)
+
+    def _expand(self, token: str) -> list[tuple[str, float]]:
+        """
+        get the indexed terms matching a query token exactly or by prefix, with their weights
+        """
+        if self._terms_dirty:
+            self._sorted_terms = sorted(self._postings)
+            self._terms_dirty = False
+
+        start = bisect.bisect_left(self._sorted_terms, token)
+        end = bisect.bisect_right(self._sorted_terms, token + "\U0010ffff")
+        matches = self._sorted_terms[start:end]
+        if len(matches) > MAX_PREFIX_EXPANSIONS:
+            matches = sorted(matches, key=lambda term: len(self._postings[term]), reverse=True)[:MAX_PREFIX_EXPANSIONS]
+        return [(term, 1.0 if term == token else PREFIX_MATCH_WEIGHT) for term in matches]
+
+    def search(self, query: str, doc_types: set[str] | None = None, offset: int = 0, limit: int = 10):
+        """
+        find the documents matching every term of the query, ranked by relevance
+        :param query: the search query, every term also matches as a prefix
+        :param doc_types: restrict the results to these document types
+        :param offset: the number of ranked results to skip
+        :param limit: the maximum number of results to return
+        :return: the total number of matches and the requested page of results
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens:
+            return 0, []
+
+        with self._lock:
+            document_count = len(self._documents)
+            average_length = self._total_length / document_count if document_count else 0
+            lengths = self._lengths
+            expansions = [self._expand(token) for token in tokens]
+            # score the rarest token first, the other tokens then only need to look at its matches
+            expansions.sort(key=lambda terms: sum(len(self._postings[term]) for term, _ in terms))
+            scores = None
+            for terms in expansions:
+                token_scores = {}
+                for term, weight in terms:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    if scores is None:
+                        candidates = (
+                            (key, frequency) for key, frequency in postings.items()
+                            if not doc_types or key[0] in doc_types
+                        )
+                    else:
+                        candidates = ((key, postings[key]) for key in scores if key in postings)
+                    for key, frequency in candidates:
+                        length_norm = 1 - BM25_B + BM25_B * lengths[key] / average_length
+                        score = weight * idf * frequency * (BM25_K1 + 1) / (frequency + BM25_K1 * length_norm)
+                        if score > token_scores.get(key, 0.0):
+                            token_scores[key] = score
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {key: score + token_scores[key] for key, score in scores.items() if key in token_scores}
+                if not scores:
+                    return 0, []
+
+            ranked = heapq.nsmallest(offset + limit, scores.items(), key=lambda item: (-item[1], item[0]))
+            results = [
+                {"type": key[0], "id": key[1], "score": round(score, 4), "document": self._documents[key]["row"]}
+                for key, score in ranked[offset:]
+            ]
+            return len(scores), results
@@ -0,0 +1,92 @@
+"""
+upstream transport module.
+Replaces the default HTTP session of the supabase database client with a pooled HTTP/2 session whose
+pool limits, keep-alive expiry and timeouts are configured through environment variables, and reports
+pool utilization as metrics.
+"""
+
+import os
+import httpx
+from api.metrics import registry
+
+
+def get_transport_limits() -> httpx.Limits:
+    """
+    get the connection pool limits from environment variables
+    """
+    return httpx.Limits(
+        max_connections=int(os.environ.get("DATABASE_POOL_MAX_CONNECTIONS", "20")),
+        max_keepalive_connections=int(os.environ.get("DATABASE_POOL_MAX_KEEPALIVE", "10")),
+        keepalive_expiry=float(os.environ.get("DATABASE_POOL_KEEPALIVE_EXPIRY_SECONDS", "30")),
+    )
+
+
+def get_transport_timeout() -> httpx.Timeout:
+    """
+    get the connect, read, write and pool timeouts from environment variables
+    """
+    return httpx.Timeout(
+        connect=float(os.environ.get("DATABASE_CONNECT_TIMEOUT_SECONDS", "5")),
+        read=float(os.environ.get("DATABASE_READ_TIMEOUT_SECONDS", "10")),
+        write=float(os.environ.get("DATABASE_WRITE_TIMEOUT_SECONDS", "10")),
+        pool=float(os.environ.get("DATABASE_POOL_TIMEOUT_SECONDS", "5")),
+    )
+
+
+def create_http_session(base_url: str, headers) -> httpx.Client:
+    """
+    create a pooled HTTP/2 session for the database REST endpoint
+    """
+    transport = httpx.HTTPTransport(http2=True, limits=get_transport_limits())
+    return httpx.Client(
+        base_url=base_url,
+        headers=headers,
+        timeout=get_transport_timeout(),
+        transport=transport,
+        follow_redirects=True,
+    )
+
+
+def configure_transport(client, name: str = "database"):
+    """
+    swap the REST session of a supabase client for a tuned HTTP/2 session and export its pool metrics
+    :param client: the supabase client
+    :param name: the pool name used as metrics label
+    """
+    postgrest = client.postgrest
+    default_session = postgrest.session
+    postgrest.session = create_http_session(default_session.base_url, default_session.headers)
+    default_session.close()
+
+    pool = postgrest.session._transport._pool  # pylint: disable=protected-access
+    registry.register_collector(lambda metrics: report_pool_metrics(metrics, pool, name))
+    return client
+
+
+def report_pool_metrics(metrics, pool, name: str):
+    """
+    report the utilization of an httpcore connection pool
+    """
+    connections = pool.connections
+    requests = list(pool._requests)  # pylint: disable=protected-access
+    metrics.set("upstream_pool_connections", len(connections),
+                "open upstream connections", pool=name)
+    metrics.set("upstream_pool_idle_connections", sum(connection.is_idle() for connection in connections),
+                "idle upstream connections", pool=name)
+    metrics.set("upstream_pool_max_connections", pool._max_connections,  # pylint: disable=protected-access
+                "upstream connection limit", pool=name)
+    metrics.set("upstream_pool_active_requests", sum(not request.is_queued() for request in requests),
+                "requests using an upstream connection", pool=name)
+    metrics.set("upstream_pool_queued_requests", sum(request.is_queued() for request in requests),
+                "requests waiting for an upstream connection", pool=name)
+
+
+def prewarm(client):
+    """
+    open an upstream connection ahead of the first query so that its TLS and HTTP/2 handshakes
+    are not paid by a user request
+    """
+    try:
+        client.postgrest.session.head("/")
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error pre-warming database connection: {e}")
@@ -0,0 +1,20 @@
+"""
+batch request model
+"""
+from typing import Literal
+from pydantic import BaseModel, Field
+
+
+class BatchSubRequest(BaseModel):
+    """
+    a single request of a batch
+    """
+    method: Literal["GET"] = "GET"
+    path: str = Field(pattern=r"^/v1/", max_length=2048)
+
+
+class BatchRequest(BaseModel):
+    """
+    batch request model
+    """
+    requests: list[BatchSubRequest] = Field(min_length=1)
@@ -0,0 +1,14 @@
+"""
+list changes response model
+"""
+from pydantic import BaseModel
+
+
+class Changes(BaseModel):
+    """
+    list changes response model
+    """
+    data: list[dict]
+    deleted: list[str]
+    version: str
+    has_more: bool
@@ -0,0 +1,31 @@
+"""
+paginated list response model
+"""
+from pydantic import BaseModel
+
+
+class Page(BaseModel):
+    """
+    paginated list response model
+    """
+    data: list[dict] | None
+    total: int | None
+    has_next: bool
+    next_cursor: str | None
+
+    @classmethod
+    def from_rows(cls, rows: list[dict] | None, total: int | None, page_number: int, page_size: int) -> "Page":
+        """
+        build the page envelope for the rows of one page.
+        A full page always has a next page, because the total may be an estimate or cached from before
+        rows were added, and a stale total must not end the pagination early.
+        """
+        has_next = bool(rows) and len(rows) == page_size
+        if total is not None:
+            has_next = has_next or page_number * page_size < total
+        return cls(
+            data=rows,
+            total=total,
+            has_next=has_next,
+            next_cursor=str(page_number + 1) if has_next else None,
+        )
@@ -0,0 +1,11 @@
+"""
+cache purge request model
+"""
+from pydantic import BaseModel, Field
+
+
+class PurgeRequest(BaseModel):
+    """
+    cache purge request model
+    """
+    keys: list[str] = Field(min_length=1, max_length=100)
@@ -0,0 +1,11 @@
+"""
+refresh token request model
+"""
+from pydantic import BaseModel
+
+
+class RefreshTokenRequest(BaseModel):
+    """
+    refresh token request model
+    """
+    refresh_token: str
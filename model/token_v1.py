@@ -10,3 +10,4 @@ class Token(BaseModel):
     """
     access_token: str
     token_type: str
+    refresh_token: str | None = None
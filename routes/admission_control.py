@@ -0,0 +1,143 @@
+"""
+admission control and load shedding.
+Only a limited number of requests run concurrently per worker. Requests beyond that wait in a short,
+bounded queue, and are rejected right away when the queue is full or when the expected wait, estimated
+from recent service times, exceeds the queue timeout. Cheap, cached public endpoints are admitted ahead
+of expensive ones and may use the whole queue, while the others are shed once it is half full.
+"""
+
+import asyncio
+import os
+from collections import deque
+from api.metrics import registry
+
+HIGH_PRIORITY = "high"
+LOW_PRIORITY = "low"
+
+# endpoints served from in-memory snapshots and indexes
+HIGH_PRIORITY_PATH_PREFIXES = ("/v1/home", "/v1/search")
+# monitoring must keep working while the worker is overloaded,
+# change streams stay open for as long as the client is connected, which would hold a slot forever,
+# and batches are admitted per sub-request, so that a batch never waits for slots while holding one
+EXEMPT_PATHS = ("/health", "/ready", "/metrics", "/v1/stream", "/v1/batch")
+
+# weight of the latest request in the moving average of service times
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+def get_priority(scope) -> str:
+    """
+    get the admission priority of a request
+    """
+    if scope["method"] in ("GET", "HEAD") and scope["path"].startswith(HIGH_PRIORITY_PATH_PREFIXES):
+        return HIGH_PRIORITY
+    return LOW_PRIORITY
+
+
+class AdmissionController:
+    """
+    concurrency limit with a bounded, prioritized queue.
+    Must be used from a single event loop: the state is only changed between awaits.
+    """
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout_seconds: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.active = 0
+        self.service_time = None
+        self._waiters = {HIGH_PRIORITY: deque(), LOW_PRIORITY: deque()}
+
+    @property
+    def queued(self) -> int:
+        """
+        number of requests waiting for a slot
+        """
+        return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _ahead_of(self, priority: str) -> int:
+        if priority == HIGH_PRIORITY:
+            return len(self._waiters[HIGH_PRIORITY])
+        return self.queued
+
+    def estimate_wait(self, priority: str) -> float:
+        """
+        estimate how long a new request of the given priority would wait for a slot
+        """
+        if self.service_time is None:
+            return 0.0
+        return (self._ahead_of(priority) + 1) * self.service_time / self.max_concurrency
+
+    async def acquire(self, priority: str) -> float | None:
+        """
+        wait for a slot
+        :return: None once admitted, otherwise the number of seconds after which the client should retry
+        """
+        if self.active < self.max_concurrency and self._ahead_of(priority) == 0:
+            self.active += 1
+            return None
+
+        queue_limit = self.max_queue if priority == HIGH_PRIORITY else self.max_queue // 2
+        estimated_wait = self.estimate_wait(priority)
+        if self.queued >= queue_limit or estimated_wait > self.queue_timeout_seconds:
+            return max(estimated_wait, 1.0)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[priority].append(waiter)
+        admitted = False
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout_seconds)
+            admitted = True
+            return None
+        except asyncio.TimeoutError:
+            return max(self.estimate_wait(priority), 1.0)
+        finally:
+            if not admitted:
+                if waiter.done():
+                    # the slot was handed over just as this request stopped waiting
+                    self.release(None)
+                else:
+                    waiter.cancel()
+                    self._waiters[priority].remove(waiter)
+
+    def release(self, service_time: float | None):
+        """
+        free a slot, handing it to the next waiting request with the highest priority
+        :param service_time: how long the request held the slot, used to estimate queue waits
+        """
+        if service_time is not None:
+            self.service_time = service_time if self.service_time is None else (
+                SERVICE_TIME_SMOOTHING * service_time + (1 - SERVICE_TIME_SMOOTHING) * self.service_time)
+
+        for priority in (HIGH_PRIORITY, LOW_PRIORITY):
+            waiters = self._waiters[priority]
+            while waiters:
+                waiter = waiters.popleft()
+                if not waiter.done():
+                    waiter.set_result(None)
+                    return
+        self.active -= 1
+
+
+def admission_controller_from_env() -> AdmissionController:
+    """
+    create the admission controller from environment variables
+    """
+    return AdmissionController(
+        max_concurrency=int(os.environ.get("ADMISSION_MAX_CONCURRENCY", "64")),
+        max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", "128")),
+        queue_timeout_seconds=float(os.environ.get("ADMISSION_QUEUE_TIMEOUT_SECONDS", "2")),
+    )
+
+
+admission_controller = admission_controller_from_env()
+
+
+def report_admission_metrics(metrics):
+    """
+    report the occupancy of the admission controller
+    """
+    metrics.set("admission_active_requests", admission_controller.active, "requests currently admitted")
+    metrics.set("admission_queued_requests", admission_controller.queued, "requests waiting for admission")
+
+
+registry.register_collector(report_admission_metrics)
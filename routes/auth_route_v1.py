@@ -2,16 +2,23 @@
 user auth operations module v1
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 import os
+import uuid
 from typing import Annotated, Dict, Any
 import jwt
 from jwt.exceptions import InvalidTokenError, ExpiredSignatureError
 import bcrypt
-from fastapi import APIRouter, Depends, status, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, Request, status, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
+from model.refresh_token_request_v1 import RefreshTokenRequest
 from model.token_v1 import Token
+from data.bulkhead import BulkheadFullError
 from data.database_repository import DatabaseRepository
+from .password_hashing import hash_password, needs_rehash
+from .rate_limiter import enforce_rate_limits, get_client_ip, login_ip_limiter, login_username_limiter
+from .token_revocation import revocation_list, revoke_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
@@ -28,21 +35,40 @@ def get_database_repository() -> DatabaseRepository:
     """
     return DatabaseRepository()
 
-def authenticate_user(username: str, password: str, repository: DatabaseRepository = Depends(get_database_repository)):
+async def authenticate_user(username: str, password: str,
+                            repository: DatabaseRepository = Depends(get_database_repository),
+                            background_tasks: BackgroundTasks | None = None):
     """
-    verify if user exists in the database and check if password matches the hashed password
+    verify if user exists in the database and check if password matches the hashed password.
+    If the stored hash uses a lower work factor than the configured floor, the password is rehashed
+    in a background task after the response has been sent.
+    bcrypt runs in a worker thread, since a check takes a few hundred milliseconds by design.
     """
     try:
         # get user from database
-        user = repository.get_user_by_username(username=username)
+        user = await repository.get_user_by_username(username=username)
         # check if user exists and password matches with hashed password
-        if user and bcrypt.checkpw(password.encode(), user["password"].encode()):
+        if user and await asyncio.to_thread(bcrypt.checkpw, password.encode(), user["password"].encode()):
+            if background_tasks is not None and needs_rehash(user["password"]):
+                background_tasks.add_task(rehash_password, repository, username, password)
             return True
 
         return False
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error verifying user: {e}")
-        return {"exception": "Invalid username or password"}
+        return False
+
+
+async def rehash_password(repository: DatabaseRepository, username: str, password: str):
+    """
+    store the password hashed with the current work factor
+    """
+    try:
+        await repository.update_user_password(username, await asyncio.to_thread(hash_password, password))
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error rehashing password: {e}")
 
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
@@ -55,6 +81,9 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     else:
         expire = datetime.now(timezone.utc) + timedelta(minutes=30)
     to_encode.update({"exp": expire})
+    # every token gets a unique id so that it can be revoked
+    to_encode.setdefault("jti", uuid.uuid4().hex)
+    to_encode.setdefault("type", "access")
     encoded_jwt = jwt.encode(
         to_encode,
         os.environ.get("SECRET_KEY"),
@@ -63,21 +92,53 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     return encoded_jwt
 
 
+def create_refresh_token(data: dict, expires_delta: timedelta | None = None):
+    """
+    encodes data and creates a long-lived jwt encoded refresh token
+    """
+    if expires_delta is None:
+        expires_delta = timedelta(
+            milliseconds=int(os.environ.get("REFRESH_TOKEN_EXPIRE_MILLISECONDS", str(7 * 24 * 60 * 60 * 1000)))
+        )
+    return create_access_token({**data, "type": "refresh"}, expires_delta=expires_delta)
+
+
+def create_tokens(username: str) -> Token:
+    """
+    create an access and a refresh token for a user
+    """
+    access_token_expires = timedelta(
+        milliseconds=int(os.environ.get(
+            "ACCESS_TOKEN_EXPIRE_MILLISECONDS"))
+    )
+    access_token = create_access_token(
+        data={"sub": username}, expires_delta=access_token_expires
+    )
+    refresh_token = create_refresh_token(data={"sub": username})
+    return Token(access_token=access_token, token_type="bearer", refresh_token=refresh_token)
+
+
 @router.post("/")
-async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], repository: DatabaseRepository = Depends(get_database_repository)) -> Token:
+async def login(request: Request, form_data: Annotated[OAuth2PasswordRequestForm, Depends()], background_tasks: BackgroundTasks,
+                repository: DatabaseRepository = Depends(get_database_repository)) -> Token:
     """
     verify if user exists in the database, check if password matches the stored hashed password,
     authenticate user and return a token
     """
-    if not repository.user_exists(value=form_data.username):
+    enforce_rate_limits(
+        (login_ip_limiter, get_client_ip(request)),
+        (login_username_limiter, form_data.username.lower()),
+    )
+
+    if not await repository.user_exists(value=form_data.username):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user_authenticated = authenticate_user(
-        form_data.username, form_data.password)
+    user_authenticated = await authenticate_user(
+        form_data.username, form_data.password, repository, background_tasks)
     if not user_authenticated:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -86,14 +147,7 @@ async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()], repo
         )
 
     try:
-        access_token_expires = timedelta(
-            milliseconds=int(os.environ.get(
-                "ACCESS_TOKEN_EXPIRE_MILLISECONDS"))
-        )
-        access_token = create_access_token(
-            data={"sub": form_data.username}, expires_delta=access_token_expires
-        )
-        return Token(access_token=access_token, token_type="bearer")
+        return create_tokens(form_data.username)
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error logging in: {e}")
         raise HTTPException(
@@ -106,6 +160,14 @@ async def verify_access_token(token: Annotated[str, Depends(oauth2_scheme)]) ->
     """
     get current user from database using bearer token
     """
+    return decode_token(token, token_type="access")
+
+
+def decode_token(token: str, token_type: str) -> Dict[str, Any]:
+    """
+    decode and validate a jwt of the given type ("access" or "refresh").
+    Rejects tokens of another type and tokens that have been revoked.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -126,6 +188,11 @@ async def verify_access_token(token: Annotated[str, Depends(oauth2_scheme)]) ->
         token_username: str = payload.get("sub")
         if token_username is None:
             raise credentials_exception
+        # tokens issued before refresh tokens existed carry neither a type nor an id
+        if payload.get("type", "access") != token_type:
+            raise credentials_exception
+        if payload.get("jti") and revocation_list.is_revoked(payload["jti"]):
+            raise credentials_exception
         return payload
     except ExpiredSignatureError as e:
         print(f"JWT expired signature error: {e}")
@@ -133,6 +200,68 @@ async def verify_access_token(token: Annotated[str, Depends(oauth2_scheme)]) ->
     except InvalidTokenError as e:
         print(f"JWT decoding error: {e}")
         raise credentials_exception from e
+    except HTTPException:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error verifying access token: {e}")
         return {"exception": "Unknown error with token"}
+
+
+@router.post("/refresh")
+async def refresh(body: RefreshTokenRequest, repository: DatabaseRepository = Depends(get_database_repository)) -> Token:
+    """
+    exchange a refresh token for a new access and refresh token without checking the password again.
+    The used refresh token is revoked, so each refresh token can only be used once, whichever worker it is sent to.
+    """
+    payload = decode_token(body.refresh_token, token_type="refresh")
+    if not payload.get("sub") or not await repository.user_exists(value=payload["sub"]):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    consumed = await revoke_token(repository, payload)
+    if consumed is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not revoke the refresh token",
+        )
+    if not consumed:
+        # another request already exchanged this refresh token, possibly on another worker
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    try:
+        return create_tokens(payload["sub"])
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error refreshing token: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e),
+        ) from e
+
+
+@router.post("/revoke")
+async def revoke(access_token: Annotated[Dict[str, Any], Depends(verify_access_token)], body: RefreshTokenRequest | None = None,
+                 repository: DatabaseRepository = Depends(get_database_repository)):
+    """
+    revoke the access token of the request and, if given, a refresh token of the same user
+    """
+    persisted = await revoke_token(repository, access_token) is not None
+    if body is not None:
+        try:
+            refresh_token = decode_token(body.refresh_token, token_type="refresh")
+            if refresh_token.get("sub") == access_token.get("sub"):
+                persisted = await revoke_token(repository, refresh_token) is not None and persisted
+        except HTTPException as e:
+            print(f"Error revoking refresh token: {e.detail}")
+    if not persisted:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Could not revoke the token",
+        )
+    return {"message": "Token revoked"}
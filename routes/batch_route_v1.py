@@ -0,0 +1,139 @@
+"""
+batch route v1.
+Runs several GET requests of the v1 api concurrently inside the process, so that clients on high latency
+networks can load the data of a page in a single round trip. Each sub-request is dispatched to the router
+with the headers of the batch request, so it gets the same authentication and dependency injection as when
+sent on its own, and it shares the identity map of the batch request. Each sub-request is admitted by admission
+control like a request of its own, while the batch request itself does not hold a slot.
+"""
+
+import asyncio
+import json
+import os
+from urllib.parse import urlsplit
+from fastapi import APIRouter, HTTPException, Request, status
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from model.batch_request_v1 import BatchRequest, BatchSubRequest
+from .content_negotiation import JSON_MEDIA_TYPE, response_media_type
+from .middleware import AdmissionControlMiddleware
+
+router = APIRouter(
+    prefix="/batch",
+    tags=["batch"],
+    responses={404: {"description": "Not found"}}
+)
+
+# paths that cannot be part of a batch -> reason
+UNBATCHABLE_PATHS = {
+    "/v1/batch": "Batches cannot be nested",
+    "/v1/stream": "Streams cannot be batched",
+}
+# headers describing the body of the batch request, which the sub-requests don't have
+BODY_HEADERS = {b"content-length", b"content-type", b"transfer-encoding"}
+
+
+def get_batch_limits() -> tuple[int, float]:
+    """
+    get the maximum number of sub-requests and the time limit of a batch
+    """
+    return int(os.environ.get("BATCH_MAX_REQUESTS", "10")), float(os.environ.get("BATCH_TIMEOUT_SECONDS", "10"))
+
+
+def sub_response(sub_request: BatchSubRequest, status_code: int, body) -> dict:
+    """
+    build the result of a sub-request
+    """
+    return {"path": sub_request.path, "status": status_code, "body": body}
+
+
+async def run_sub_request(request: Request, sub_request: BatchSubRequest) -> dict:
+    """
+    dispatch a sub-request to the router and collect its response
+    :param request: the batch request
+    :param sub_request: the sub-request to run
+    """
+    url = urlsplit(sub_request.path)
+    reason = UNBATCHABLE_PATHS.get(url.path.rstrip("/"))
+    if reason:
+        return sub_response(sub_request, status.HTTP_400_BAD_REQUEST, {"detail": reason})
+
+    scope = {
+        "type": "http",
+        "asgi": request.scope.get("asgi", {"version": "3.0"}),
+        "http_version": request.scope.get("http_version", "1.1"),
+        "method": sub_request.method,
+        "scheme": request.scope.get("scheme", "http"),
+        "server": request.scope.get("server"),
+        "client": request.scope.get("client"),
+        "root_path": request.scope.get("root_path", ""),
+        "path": url.path,
+        "raw_path": url.path.encode(),
+        "query_string": url.query.encode(),
+        "headers": [(name, value) for name, value in request.scope["headers"] if name not in BODY_HEADERS],
+        "app": request.app,
+        "state": request.scope.get("state", {}),
+        # lets the routes answer errors with the app's exception handlers, as they do outside a batch
+        "starlette.exception_handlers": request.scope.get("starlette.exception_handlers", ({}, {})),
+    }
+    response = {"status": 500, "headers": [], "body": bytearray()}
+    body_sent = False
+    # sub-responses are embedded in the batch response, which is encoded as a whole
+    response_media_type.set(JSON_MEDIA_TYPE)
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            return {"type": "http.disconnect"}
+        body_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].extend(message.get("body", b""))
+
+    try:
+        # rejected sub-requests are answered with a 503 like requests sent on their own
+        await AdmissionControlMiddleware(request.app.router)(scope, receive, send)
+    except StarletteHTTPException as e:
+        # raised by the router itself, e.g. for unknown paths
+        return sub_response(sub_request, e.status_code, {"detail": e.detail})
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error running batch sub-request {sub_request.path}: {e}")
+        return sub_response(sub_request, status.HTTP_500_INTERNAL_SERVER_ERROR, {"detail": "Internal Server Error"})
+
+    content_type = dict(response["headers"]).get(b"content-type", b"")
+    body = bytes(response["body"])
+    if content_type.startswith(b"application/json") and body:
+        return sub_response(sub_request, response["status"], json.loads(body))
+    return sub_response(sub_request, response["status"], body.decode(errors="replace"))
+
+
+async def run_sub_request_with_timeout(request: Request, sub_request: BatchSubRequest, timeout: float) -> dict:
+    """
+    run a sub-request, answering it with a 504 when it doesn't finish within the time limit of the batch
+    """
+    try:
+        return await asyncio.wait_for(run_sub_request(request, sub_request), timeout)
+    except asyncio.TimeoutError:
+        return sub_response(sub_request, status.HTTP_504_GATEWAY_TIMEOUT, {"detail": "Sub-request timed out"})
+
+
+@router.post("")
+async def run_batch(request: Request, batch: BatchRequest):
+    """
+    run GET requests of the v1 api concurrently and return their responses in request order
+    """
+    max_requests, timeout = get_batch_limits()
+    if len(batch.requests) > max_requests:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"A batch can contain at most {max_requests} requests",
+        )
+
+    responses = await asyncio.gather(
+        *(run_sub_request_with_timeout(request, sub_request, timeout) for sub_request in batch.requests)
+    )
+    return {"responses": responses}
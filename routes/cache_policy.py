@@ -0,0 +1,61 @@
+"""
+edge caching policies.
+Public read endpoints are cached by the edge network in front of the app. Each response carries a
+Cache-Control header with its shared cache lifetime and surrogate keys naming the collections and
+entities it contains, so that a change to one entity can purge exactly the responses that include it.
+Requests carrying credentials are never cached by shared caches.
+"""
+
+from fastapi import Request, Response
+
+
+class CachePolicy:
+    """
+    shared cache lifetime of a group of routes
+    """
+    def __init__(self, s_maxage: int, stale_while_revalidate: int):
+        self.s_maxage = s_maxage
+        self.stale_while_revalidate = stale_while_revalidate
+
+    def apply(self, request: Request, response: Response, *keys: str):
+        """
+        mark a successful response as cacheable by the edge and tag it with surrogate keys
+        :param request: the request being answered
+        :param response: the response to set the headers on
+        :param keys: the surrogate keys of the collections and entities in the response
+        """
+        if request.headers.get("Authorization"):
+            response.headers["Cache-Control"] = "private, no-store"
+            return
+
+        response.headers["Cache-Control"] = (
+            f"public, max-age=0, s-maxage={self.s_maxage}, stale-while-revalidate={self.stale_while_revalidate}"
+        )
+        # authenticated requests get different responses and must not be answered from the shared cache,
+        # and the same data is served as JSON or MessagePack
+        response.headers["Vary"] = "Authorization, Accept"
+        keys = list(dict.fromkeys(key for key in keys if key))
+        if keys:
+            response.headers["Surrogate-Key"] = " ".join(keys)
+            response.headers["Cache-Tag"] = ",".join(keys)
+
+
+def entity_key(entity_type: str, entity_id) -> str:
+    """
+    surrogate key of a single entity
+    """
+    return f"{entity_type}:{entity_id}"
+
+
+def entity_keys(entity_type: str, rows: list[dict] | None) -> list[str]:
+    """
+    surrogate keys of every entity in a list of rows
+    """
+    return [entity_key(entity_type, row["id"]) for row in rows or [] if isinstance(row, dict) and "id" in row]
+
+
+# the homepage is materialized periodically, so it can be cached for as long as a snapshot lives
+HOMEPAGE_CACHE = CachePolicy(s_maxage=60, stale_while_revalidate=300)
+LISTING_CACHE = CachePolicy(s_maxage=60, stale_while_revalidate=300)
+DETAIL_CACHE = CachePolicy(s_maxage=300, stale_while_revalidate=3600)
+SEARCH_CACHE = CachePolicy(s_maxage=30, stale_while_revalidate=120)
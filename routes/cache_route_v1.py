@@ -0,0 +1,103 @@
+"""
+edge cache purge route v1
+"""
+
+import os
+from typing import Annotated, Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, status
+from data.database_repository import DatabaseRepository, row_count_cache
+from data.homepage_snapshot import get_snapshot_path
+from data.page_prefetcher import page_prefetcher
+from data.edge_cache import is_edge_purge_configured, purge_edge_cache
+from model.purge_request_v1 import PurgeRequest
+from usecase.materialize_homepage import MaterializeHomePage
+from .auth_route_v1 import verify_access_token
+from .home_route_v1 import homepage_index_loader
+from .search_route_v1 import search_index_refresher
+
+router = APIRouter(
+    prefix="/cache",
+    tags=["cache"],
+    responses={404: {"description": "Not found"}}
+)
+
+# surrogate key type -> list whose cached row count depends on it
+COUNTED_LISTS = {
+    "experts": "experts", "expert": "experts",
+    "nonprofits": "nonprofits", "nonprofit": "nonprofits", "entity": "nonprofits",
+}
+HOMEPAGE_KEY_PREFIXES = ("homepage", "subfactor:", "harm:")
+# surrogate key types of the search results and the documents they are built from
+SEARCH_KEY_TYPES = {"search", "experts", "expert", "nonprofits", "nonprofit", "entity", "litigation"}
+
+
+def get_purge_users() -> set[str]:
+    """
+    get the usernames allowed to purge the cache, from the comma separated CACHE_PURGE_USERS
+    """
+    return {username.strip().lower() for username in os.environ.get("CACHE_PURGE_USERS", "").split(",") if username.strip()}
+
+
+async def invalidate_local_caches(keys: list[str]) -> float:
+    """
+    refresh the in-process caches and the homepage snapshot holding data tagged with the given surrogate keys.
+    The homepage snapshot is shared by the workers on the host, so writing a new version makes each of them
+    rebuild its homepage index. The other caches are per worker: they are refreshed on this worker and
+    expire on the others.
+    :param keys: the purged surrogate keys
+    :return: the seconds until the other workers stop serving the purged data from their caches
+    """
+    key_types = {key.split(":", 1)[0] for key in keys}
+    lifetimes = [0.0]
+    tables = {COUNTED_LISTS[key_type] for key_type in key_types if key_type in COUNTED_LISTS}
+    for table in tables:
+        row_count_cache.delete(table)
+    if tables:
+        page_prefetcher.invalidate()
+        lifetimes.append(row_count_cache.ttl_seconds)
+        if page_prefetcher.enabled:
+            lifetimes.append(page_prefetcher.pages.ttl_seconds)
+
+    if any(key.startswith(HOMEPAGE_KEY_PREFIXES) for key in keys):
+        snapshot_path = get_snapshot_path()
+        if snapshot_path:
+            # a fresh materializer always writes a new version, even if the data did not change
+            await MaterializeHomePage(DatabaseRepository, snapshot_path).execute()
+        else:
+            homepage_index_loader.invalidate()
+            lifetimes.append(homepage_index_loader.ttl_seconds)
+
+    if key_types & SEARCH_KEY_TYPES:
+        await search_index_refresher.refresh()
+        lifetimes.append(search_index_refresher.interval_seconds)
+    return max(lifetimes)
+
+
+@router.post("/purge")
+async def purge_cache(purge_request: PurgeRequest, token: Annotated[Dict[str, Any], Depends(verify_access_token)]):
+    """
+    purge cached responses by surrogate key, e.g. "experts" or "expert:42", after the data changed.
+    The homepage snapshot and this worker's caches are refreshed right away, the other workers' caches
+    within the returned number of seconds.
+    """
+    if token.get("sub", "").lower() not in get_purge_users():
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to purge the cache",
+        )
+
+    # refreshed before the edge is purged, so that the edge does not refetch the purged data from this worker
+    other_workers_seconds = await invalidate_local_caches(purge_request.keys)
+    purged = {"purged": purge_request.keys, "edge": False, "other_workers_within_seconds": other_workers_seconds}
+    if not is_edge_purge_configured():
+        return purged
+
+    try:
+        await purge_edge_cache(purge_request.keys)
+        return {**purged, "edge": True}
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error purging edge cache: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_502_BAD_GATEWAY,
+            detail="Error purging edge cache",
+        ) from e
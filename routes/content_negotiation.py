@@ -0,0 +1,103 @@
+"""
+response content negotiation.
+Responses are JSON by default and MessagePack for clients that send Accept: application/msgpack, which is
+smaller and faster to encode and decode for internal services. The middleware records the format the
+client accepts for the current request, and the app's default response class encodes with it, so every
+route returning data supports both formats. msgpack is only imported on first use and the API answers
+with JSON when it is not installed.
+"""
+
+import functools
+import json
+from contextvars import ContextVar
+from fastapi.responses import JSONResponse
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# media type of the current request's response
+response_media_type: ContextVar[str] = ContextVar("response_media_type", default=JSON_MEDIA_TYPE)
+
+
+@functools.cache
+def load_msgpack():
+    """
+    import msgpack once, or get None if it is not installed
+    """
+    try:
+        import msgpack  # pylint: disable=import-outside-toplevel
+        return msgpack
+    except ImportError:
+        print("msgpack is not installed, answering MessagePack requests with JSON")
+        return None
+
+
+def parse_accept(accept: str) -> dict[str, float]:
+    """
+    get the quality of every media type of an Accept header
+    """
+    qualities = {}
+    for part in accept.split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type:
+            qualities[media_type.lower()] = quality
+    return qualities
+
+
+def negotiate_media_type(accept: str | None) -> str:
+    """
+    choose MessagePack when the client accepts it at least as much as JSON, and JSON otherwise
+    """
+    if not accept or "msgpack" not in accept:
+        return JSON_MEDIA_TYPE
+    qualities = parse_accept(accept)
+    msgpack_quality = max(qualities.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    json_quality = qualities.get(JSON_MEDIA_TYPE, qualities.get("application/*", qualities.get("*/*", 0.0)))
+    if msgpack_quality > 0 and msgpack_quality >= json_quality and load_msgpack() is not None:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+
+def encode_msgpack(content) -> bytes:
+    """
+    encode JSON compatible content as MessagePack
+    """
+    return load_msgpack().packb(content, use_bin_type=True)
+
+
+# version and MessagePack encoding of the last converted JSON payload
+_converted_payload = {"version": None, "body": None}
+
+
+def json_payload_to_msgpack(version, payload) -> bytes:
+    """
+    convert a versioned, pre-encoded JSON payload such as the homepage snapshot to MessagePack.
+    The conversion is kept until the version changes, since snapshots are served many times.
+    """
+    if _converted_payload["version"] != version or _converted_payload["body"] is None:
+        _converted_payload["body"] = encode_msgpack(json.loads(bytes(payload)))
+        _converted_payload["version"] = version
+    return _converted_payload["body"]
+
+
+class NegotiatedResponse(JSONResponse):
+    """
+    JSON response that is encoded as MessagePack when the client asked for it
+    """
+    def __init__(self, content, status_code: int = 200, headers=None, media_type: str | None = None, background=None):
+        self.msgpack = media_type is None and response_media_type.get() == MSGPACK_MEDIA_TYPE
+        super().__init__(content, status_code, headers, MSGPACK_MEDIA_TYPE if self.msgpack else media_type, background)
+
+    def render(self, content) -> bytes:
+        if self.msgpack:
+            return encode_msgpack(content)
+        return super().render(content)
@@ -2,8 +2,16 @@
 experts data operations route v1
 """
 
-from fastapi import APIRouter, Depends
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from data.bulkhead import BulkheadFullError
 from data.database_repository import DatabaseRepository
+from data.page_prefetcher import PagePrefetcher, get_page_prefetcher
+from model.page_v1 import Page
+from usecase.get_list_changes import GetListChanges, InvalidVersionError
+from usecase.load_homepage_index import LoadHomepageIndex
+from .cache_policy import DETAIL_CACHE, LISTING_CACHE, entity_key, entity_keys
+from .home_route_v1 import get_homepage_index_loader
 
 router = APIRouter(
     prefix="/experts",
@@ -20,22 +28,62 @@ def get_database_repository() -> DatabaseRepository:
 
 # retrieve all experts with page_size and page_number query parameters
 @router.get("/")
-async def get_experts(page_number: int = 1, page_size: int = 10, repository: DatabaseRepository = Depends(get_database_repository)):
+async def get_experts(request: Request, response: Response,
+                      page_number: int = 1, page_size: int = 10, cursor: str | None = None,
+                      subfactor_id: str | None = None, harm_and_risk_id: str | None = None, since: str | None = None,
+                      index_loader: LoadHomepageIndex = Depends(get_homepage_index_loader),
+                      prefetcher: PagePrefetcher = Depends(get_page_prefetcher),
+                      repository: DatabaseRepository = Depends(get_database_repository)):
     """
     retrieve all experts with pagination
     :param page_number: the page number to fetch
     :param page_size: the number of items per page
+    :param cursor: the next_cursor of a previous page, takes precedence over page_number
+    :param subfactor_id: only list the experts linked to this structural subfactor
+    :param harm_and_risk_id: only list the experts linked to this harm and risk
+    :param since: the version of a previous sync, or "0", to only get the experts changed since then
     """
     try:
-        experts = await repository.get_experts(page_number=page_number, page_size=page_size)
-        return {"data": experts}
+        if since is not None:
+            changes = await GetListChanges(repository).execute("experts", since)
+            LISTING_CACHE.apply(request, response, "experts", *entity_keys("expert", changes.data))
+            return changes
+        if cursor is not None:
+            page_number = int(cursor)
+        if subfactor_id is not None or harm_and_risk_id is not None:
+            # facet filters resolve to ids through the homepage index, the page is then fetched by id
+            index = await index_loader.execute()
+            if index is None:
+                raise RuntimeError("homepage index is not available")
+            expert_ids = index.item_ids("experts", subfactor_id, harm_and_risk_id)
+            page_ids = expert_ids[(page_number - 1) * page_size:page_number * page_size]
+            experts = await repository.get_experts_by_ids(page_ids) if page_ids else []
+            if experts is not None:
+                LISTING_CACHE.apply(request, response, "experts", *entity_keys("expert", experts))
+            return Page.from_rows(experts, len(expert_ids), page_number, page_size)
+        # the cached count goes first so that a count query starts before the page query
+        total, experts = await asyncio.gather(
+            repository.count_rows("experts"),
+            prefetcher.get_page("experts", page_number, page_size, repository.get_experts),
+        )
+        if experts is not None:
+            LISTING_CACHE.apply(request, response, "experts", *entity_keys("expert", experts))
+        page = Page.from_rows(experts, total, page_number, page_size)
+        if page.has_next:
+            prefetcher.prefetch("experts", page_number + 1, page_size)
+        return page
+    except InvalidVersionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid version") from e
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching paged experts: {e}")
         return {"message": "Error fetching paged experts"}
 
 
 @router.get("/{expert_id}")
-async def get_expert_by_id(expert_id: str, repository: DatabaseRepository = Depends(get_database_repository)):
+async def get_expert_by_id(expert_id: str, request: Request, response: Response,
+                           repository: DatabaseRepository = Depends(get_database_repository)):
     """
     retrieve expert by id
     """
@@ -43,7 +91,10 @@ async def get_expert_by_id(expert_id: str, repository: DatabaseRepository = Depe
         expert = await repository.get_expert_by_id(expert_id)
         if expert is None:
             return {"message": "Expert not found"}
+        DETAIL_CACHE.apply(request, response, entity_key("expert", expert_id))
         return {"data": expert}
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching expert by id: {e}")
         return {"message": "Error fetching expert by id"}
@@ -0,0 +1,27 @@
+"""
+health check route
+"""
+
+import os
+import time
+from fastapi import APIRouter
+
+router = APIRouter(
+    prefix="/health",
+    tags=["health"],
+)
+
+started_at = time.monotonic()
+
+
+@router.get("")
+async def get_health():
+    """
+    report the liveness of the worker process that handles the request
+    """
+    return {
+        "status": "ok",
+        "worker_id": os.environ.get("WORKER_ID", "0"),
+        "pid": os.getpid(),
+        "uptime_seconds": round(time.monotonic() - started_at, 3),
+    }
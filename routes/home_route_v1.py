@@ -2,11 +2,16 @@
 structural subfactors data operations route v1
 """
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
 
+from data.bulkhead import BulkheadFullError
 from data.database_repository import DatabaseRepository
+from data.homepage_snapshot import HomepageSnapshotReader, get_snapshot_path, get_snapshot_reader
 from usecase.get_homepage_data import GetHomePageData
+from usecase.load_homepage_index import LoadHomepageIndex
 from model.home_v1 import HomePageData
+from .cache_policy import HOMEPAGE_CACHE, entity_key
+from .content_negotiation import MSGPACK_MEDIA_TYPE, json_payload_to_msgpack, response_media_type
 
 router = APIRouter(
     prefix="/home",
@@ -28,13 +33,46 @@ def get_homepage_data() -> GetHomePageData:
     """
     return GetHomePageData(repository=get_database_repository())
 
+def get_homepage_snapshot() -> HomepageSnapshotReader | None:
+    """
+    dependency to get the homepage snapshot reader, or None if snapshots are disabled.
+    """
+    path = get_snapshot_path()
+    return get_snapshot_reader(path) if path else None
+
+homepage_index_loader = LoadHomepageIndex(DatabaseRepository, get_homepage_snapshot)
+
+def get_homepage_index_loader() -> LoadHomepageIndex:
+    """
+    dependency to get the process wide homepage facet index loader.
+    This allows for easy testing and mocking of the index.
+    """
+    return homepage_index_loader
+
 
 @router.get("/")
-async def get_home_page(usecase: GetHomePageData = Depends(get_homepage_data)):
+async def get_home_page(request: Request, response: Response,
+                        usecase: GetHomePageData = Depends(get_homepage_data),
+                        snapshot: HomepageSnapshotReader | None = Depends(get_homepage_snapshot)):
     """
-    retrieve composite homepage data
+    retrieve composite homepage data.
+    Serves the last materialized snapshot when one exists and falls back to querying the database.
     """
     try:
+        payload = snapshot.read() if snapshot else None
+        if payload is not None:
+            if response_media_type.get() == MSGPACK_MEDIA_TYPE:
+                payload, media_type = json_payload_to_msgpack(snapshot.version, payload), MSGPACK_MEDIA_TYPE
+            else:
+                media_type = "application/json"
+            snapshot_response = Response(
+                content=payload,
+                media_type=media_type,
+                headers={"X-Snapshot-Version": str(snapshot.version)},
+            )
+            HOMEPAGE_CACHE.apply(request, snapshot_response, "homepage")
+            return snapshot_response
+
         # Execute the use case to fetch homepage data
         data = await usecase.execute()
         # If the data is None, return a message
@@ -43,7 +81,74 @@ async def get_home_page(usecase: GetHomePageData = Depends(get_homepage_data)):
         elif not isinstance(data, HomePageData):
             return {"message": "Data is not in the expected format. Current type: " + str(type(data)) + " .. expected type: HomePageData"}
 
+        HOMEPAGE_CACHE.apply(request, response, "homepage")
         return data
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching homepage data: {e}")
         return {"message": "Error fetching homepage data"}
+
+
+@router.get("/subfactors")
+async def get_subfactors(request: Request, response: Response,
+                         index_loader: LoadHomepageIndex = Depends(get_homepage_index_loader)):
+    """
+    retrieve the structural subfactors with their harms and risks and the number of experts and
+    nonprofits linked to each, as facets for filtering the experts and nonprofits lists
+    """
+    try:
+        index = await index_loader.execute()
+        if index is None:
+            return {"message": "Error fetching subfactors"}
+        HOMEPAGE_CACHE.apply(request, response, "homepage")
+        return {"data": index.subfactors}
+    except BulkheadFullError:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error fetching subfactors: {e}")
+        return {"message": "Error fetching subfactors"}
+
+
+@router.get("/subfactors/{subfactor_id}")
+async def get_subfactor(subfactor_id: str, request: Request, response: Response,
+                        index_loader: LoadHomepageIndex = Depends(get_homepage_index_loader)):
+    """
+    retrieve one structural subfactor with its harms and risks and their related items
+    """
+    try:
+        index = await index_loader.execute()
+        if index is None:
+            return {"message": "Error fetching subfactor"}
+        subfactor = index.subfactor(subfactor_id)
+        if subfactor is None:
+            return {"message": "Subfactor not found"}
+        HOMEPAGE_CACHE.apply(request, response, "homepage", entity_key("subfactor", subfactor_id))
+        return {"data": subfactor}
+    except BulkheadFullError:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error fetching subfactor: {e}")
+        return {"message": "Error fetching subfactor"}
+
+
+@router.get("/harms/{harm_and_risk_id}")
+async def get_harm_and_risk(harm_and_risk_id: str, request: Request, response: Response,
+                            index_loader: LoadHomepageIndex = Depends(get_homepage_index_loader)):
+    """
+    retrieve one harm and risk with its related items
+    """
+    try:
+        index = await index_loader.execute()
+        if index is None:
+            return {"message": "Error fetching harm and risk"}
+        harm_and_risk = index.harm_and_risk(harm_and_risk_id)
+        if harm_and_risk is None:
+            return {"message": "Harm and risk not found"}
+        HOMEPAGE_CACHE.apply(request, response, "homepage", entity_key("harm", harm_and_risk_id))
+        return {"data": harm_and_risk}
+    except BulkheadFullError:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error fetching harm and risk: {e}")
+        return {"message": "Error fetching harm and risk"}
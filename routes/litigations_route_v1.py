@@ -5,6 +5,7 @@ litigations data operations route v1
 from typing import Annotated, Dict, Any
 from fastapi import APIRouter, Depends
 from .auth_route_v1 import verify_access_token
+from data.bulkhead import BulkheadFullError
 from data.database_repository import DatabaseRepository
 
 router = APIRouter(
@@ -27,8 +28,10 @@ async def fetch_litigations(_: Annotated[Dict[str, Any], Depends(verify_access_t
     retrieve all litigations from database
     """
     try:
-        litigations = repository.get_litigations()
+        litigations = await repository.get_litigations()
         return {"data": litigations}
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching litigations: {e}")
         return {"message": "Error fetching litigations"}
@@ -0,0 +1,20 @@
+"""
+metrics route
+"""
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from api.metrics import registry
+
+router = APIRouter(
+    prefix="/metrics",
+    tags=["metrics"],
+)
+
+
+@router.get("", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    expose the metrics of this worker in the Prometheus text format
+    """
+    return registry.render()
@@ -2,10 +2,22 @@
 middleware API interceptor
 """
 
+import asyncio
+import cProfile
+import math
+import os
+import random
+import time
+import uuid
 from fastapi import Request, HTTPException
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
+from data.identity_map import IdentityMap, current_identity_map
+from api.metrics import registry
+from api.profiling import PROFILE_HEADER, verify_profile_request, write_profile
+from routes.admission_control import AdmissionController, EXEMPT_PATHS, admission_controller, get_priority
 from routes.auth_route_v1 import verify_access_token
+from routes.content_negotiation import negotiate_media_type, response_media_type
 
 
 class AuthMiddleware(BaseHTTPMiddleware):  # pylint: disable=too-few-public-methods
@@ -35,3 +47,143 @@ class AuthMiddleware(BaseHTTPMiddleware):  # pylint: disable=too-few-public-meth
             print(f"AuthMiddleware Exception: {e}")
             # If token validation fails due to other exceptions, return a generic error response
             return JSONResponse(content={"detail": f"Error: {str(e)}"}, status_code=500)
+
+
+class IdentityMapMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    gives every request its own identity map, which is dropped when the request ends.
+    This is a plain ASGI middleware so that the map is set in the context the endpoint runs in.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_identity_map.set(IdentityMap())
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_identity_map.reset(token)
+
+
+class ContentNegotiationMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    records the response media type the client accepts, for the response class to encode with.
+    This is a plain ASGI middleware so that the media type is set in the context the endpoint runs in.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"accept"), None)
+        token = response_media_type.set(negotiate_media_type(accept))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            response_media_type.reset(token)
+
+
+class AdmissionControlMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    admits requests through the admission controller and sheds the ones it rejects with a fast 503
+    """
+
+    def __init__(self, app, controller: AdmissionController | None = None):
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        priority = get_priority(scope)
+        retry_after = await self.controller.acquire(priority)
+        if retry_after is not None:
+            registry.inc("admission_rejected_requests_total", description="requests shed by admission control",
+                         priority=priority)
+            response = JSONResponse(
+                content={"detail": "Server is overloaded, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+            await response(scope, receive, send)
+            return
+
+        started_at = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(time.monotonic() - started_at)
+
+
+class ProfilingMiddleware:  # pylint: disable=too-few-public-methods
+    """
+    profiles requests carrying a signed X-Debug-Profile header, and a sampled fraction of all requests.
+    The profiler records everything that runs on the event loop thread while the request is handled,
+    so only one request is profiled at a time. Blocking calls moved to worker threads are not recorded.
+    """
+
+    def __init__(self, app, directory: str, secret: str | None = None, sample_rate: float = 0.0):
+        self.app = app
+        self.directory = directory
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self._busy = False
+
+    def _get_trigger(self, scope) -> str | None:
+        if self.secret:
+            for name, value in scope["headers"]:
+                if name == PROFILE_HEADER.encode() and verify_profile_request(value.decode("latin-1"), self.secret):
+                    return "header"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        trigger = self._get_trigger(scope) if scope["type"] == "http" and not self._busy else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+
+        self._busy = True
+        profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        status_code = None
+
+        async def send_with_profile_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        started_at = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            self._busy = False
+            route = scope.get("route")
+            metadata = {
+                "id": profile_id,
+                "trigger": trigger,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(route, "path", None),
+                "status": status_code,
+                "duration_ms": round(duration_ms, 3),
+                "worker_id": os.environ.get("WORKER_ID", "0"),
+            }
+            await asyncio.to_thread(write_profile, self.directory, profile_id, profiler, metadata)
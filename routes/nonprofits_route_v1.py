@@ -3,8 +3,16 @@
 experts data operations route v1
 """
 
-from fastapi import APIRouter, Depends
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from data.bulkhead import BulkheadFullError
 from data.database_repository import DatabaseRepository
+from data.page_prefetcher import PagePrefetcher, get_page_prefetcher
+from model.page_v1 import Page
+from usecase.get_list_changes import GetListChanges, InvalidVersionError
+from usecase.load_homepage_index import LoadHomepageIndex
+from .cache_policy import DETAIL_CACHE, LISTING_CACHE, entity_key, entity_keys
+from .home_route_v1 import get_homepage_index_loader
 
 router = APIRouter(
     prefix="/nonprofits",
@@ -20,22 +28,62 @@ def get_database_repository() -> DatabaseRepository:
     return DatabaseRepository()
 
 @router.get("/")
-async def get_nonprofits(page_number: int = 1, page_size: int = 10, repository: DatabaseRepository = Depends(get_database_repository)):
+async def get_nonprofits(request: Request, response: Response,
+                         page_number: int = 1, page_size: int = 10, cursor: str | None = None,
+                         subfactor_id: str | None = None, harm_and_risk_id: str | None = None, since: str | None = None,
+                         index_loader: LoadHomepageIndex = Depends(get_homepage_index_loader),
+                         prefetcher: PagePrefetcher = Depends(get_page_prefetcher),
+                         repository: DatabaseRepository = Depends(get_database_repository)):
     """
     retrieve all nonprofits with pagination
     :param page_number: the page number to fetch
     :param page_size: the number of items per page
+    :param cursor: the next_cursor of a previous page, takes precedence over page_number
+    :param subfactor_id: only list the nonprofits linked to this structural subfactor
+    :param harm_and_risk_id: only list the nonprofits linked to this harm and risk
+    :param since: the version of a previous sync, or "0", to only get the nonprofits changed since then
     """
     try:
-        nonprofits = await repository.get_nonprofits(page_number=page_number, page_size=page_size)
-        return {"data": nonprofits}
+        if since is not None:
+            changes = await GetListChanges(repository).execute("nonprofits", since)
+            LISTING_CACHE.apply(request, response, "nonprofits", *entity_keys("entity", changes.data))
+            return changes
+        if cursor is not None:
+            page_number = int(cursor)
+        if subfactor_id is not None or harm_and_risk_id is not None:
+            # facet filters resolve to ids through the homepage index, the page is then fetched by id
+            index = await index_loader.execute()
+            if index is None:
+                raise RuntimeError("homepage index is not available")
+            nonprofit_ids = index.item_ids("nonprofits", subfactor_id, harm_and_risk_id)
+            page_ids = nonprofit_ids[(page_number - 1) * page_size:page_number * page_size]
+            nonprofits = await repository.get_nonprofits_by_ids(page_ids) if page_ids else []
+            if nonprofits is not None:
+                LISTING_CACHE.apply(request, response, "nonprofits", *entity_keys("entity", nonprofits))
+            return Page.from_rows(nonprofits, len(nonprofit_ids), page_number, page_size)
+        # the cached count goes first so that a count query starts before the page query
+        total, nonprofits = await asyncio.gather(
+            repository.count_rows("nonprofits"),
+            prefetcher.get_page("nonprofits", page_number, page_size, repository.get_nonprofits),
+        )
+        if nonprofits is not None:
+            LISTING_CACHE.apply(request, response, "nonprofits", *entity_keys("entity", nonprofits))
+        page = Page.from_rows(nonprofits, total, page_number, page_size)
+        if page.has_next:
+            prefetcher.prefetch("nonprofits", page_number + 1, page_size)
+        return page
+    except InvalidVersionError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid version") from e
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching paged nonprofits: {e}")
         return {"message": "Error fetching paged nonprofits"}
 
 
 @router.get("/{nonprofit_id}")
-async def get_nonprofit_by_id(nonprofit_id: str, repository: DatabaseRepository = Depends(get_database_repository)):
+async def get_nonprofit_by_id(nonprofit_id: str, request: Request, response: Response,
+                              repository: DatabaseRepository = Depends(get_database_repository)):
     """
     retrieve nonprofit by id
     """
@@ -43,7 +91,10 @@ async def get_nonprofit_by_id(nonprofit_id: str, repository: DatabaseRepository
         nonprofit = await repository.get_entity_by_nonprofit_id(nonprofit_id)
         if nonprofit is None:
             return {"message": "Nonprofit not found"}
+        DETAIL_CACHE.apply(request, response, entity_key("nonprofit", nonprofit_id), *entity_keys("entity", nonprofit))
         return {"data": nonprofit}
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching nonprofit by id: {e}")
         return {"message": "Error fetching nonprofit by id"}
@@ -0,0 +1,89 @@
+"""
+password hashing module.
+The bcrypt work factor is either configured with BCRYPT_ROUNDS or calibrated once per process
+so that hashing a password takes about BCRYPT_TARGET_MS on the current hardware.
+Calibrated work factors vary between processes, so stored hashes are only upgraded on login when
+they are below a configured floor, never compared against the calibration of the current process.
+"""
+
+import math
+import os
+import threading
+import time
+import bcrypt
+
+MIN_BCRYPT_ROUNDS = 10
+MAX_BCRYPT_ROUNDS = 16
+CALIBRATION_PROBE_ROUNDS = 8
+
+_rounds = None
+_rounds_lock = threading.Lock()
+
+
+def calibrate_bcrypt_rounds(target_ms: float, min_rounds: int = MIN_BCRYPT_ROUNDS,
+                            max_rounds: int = MAX_BCRYPT_ROUNDS) -> int:
+    """
+    find the highest work factor whose hash time stays within the target.
+    Hashes once with a cheap probe work factor and extrapolates, since every additional round doubles the work.
+    :param target_ms: the target hash latency in milliseconds
+    :return: the work factor, clamped to [min_rounds, max_rounds]
+    """
+    start = time.perf_counter()
+    bcrypt.hashpw(b"calibration", bcrypt.gensalt(CALIBRATION_PROBE_ROUNDS))
+    probe_ms = max((time.perf_counter() - start) * 1000, 0.001)
+
+    rounds = CALIBRATION_PROBE_ROUNDS + math.floor(math.log2(target_ms / probe_ms))
+    return max(min_rounds, min(max_rounds, rounds))
+
+
+def get_bcrypt_rounds() -> int:
+    """
+    get the current bcrypt work factor, calibrating it on first use unless BCRYPT_ROUNDS is set
+    """
+    global _rounds  # pylint: disable=global-statement
+    if _rounds is None:
+        with _rounds_lock:
+            if _rounds is None:
+                configured_rounds = os.environ.get("BCRYPT_ROUNDS")
+                if configured_rounds:
+                    _rounds = int(configured_rounds)
+                else:
+                    _rounds = calibrate_bcrypt_rounds(float(os.environ.get("BCRYPT_TARGET_MS", "250")))
+                print(f"Using bcrypt work factor {_rounds}")
+    return _rounds
+
+
+def hash_password(password: str) -> str:
+    """
+    hash and salt a password with the current work factor, and at least the rehash floor
+    so that new hashes are never rehashed again
+    """
+    rounds = max(get_bcrypt_rounds(), get_rehash_rounds())
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def get_hash_rounds(hashed_password: str) -> int | None:
+    """
+    get the work factor of a bcrypt hash of the form $2b$<rounds>$<salt and hash>
+    """
+    try:
+        return int(hashed_password.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def get_rehash_rounds() -> int:
+    """
+    get the lowest work factor a stored hash may have: BCRYPT_ROUNDS when it is set,
+    BCRYPT_MIN_ROUNDS otherwise. It is the same in every process, unlike a calibrated work factor.
+    """
+    configured_rounds = os.environ.get("BCRYPT_ROUNDS") or os.environ.get("BCRYPT_MIN_ROUNDS")
+    return int(configured_rounds) if configured_rounds else MIN_BCRYPT_ROUNDS
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    check if a stored hash was created with a lower work factor than the configured floor
+    """
+    rounds = get_hash_rounds(hashed_password)
+    return rounds is None or rounds < get_rehash_rounds()
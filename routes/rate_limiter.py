@@ -0,0 +1,111 @@
+"""
+in-memory token bucket rate limiting
+"""
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from fastapi import Request, HTTPException, status
+
+
+class TokenBucketLimiter:
+    """
+    token bucket rate limiter keyed by an arbitrary string such as a client ip or a username.
+    Buckets are spread over independently locked shards. Each shard keeps its buckets in least recently
+    used order, drops buckets that have been idle long enough to be full again and never holds more than
+    max_keys_per_shard buckets, so memory stays bounded no matter how many keys are seen.
+    """
+    def __init__(self, capacity: float, period_seconds: float, shards: int = 16,
+                 max_keys_per_shard: int = 4096, clock=time.monotonic):
+        self.capacity = capacity
+        self.refill_per_second = capacity / period_seconds
+        self.max_keys_per_shard = max_keys_per_shard
+        self.clock = clock
+        # a bucket idle for this long has refilled completely and behaves like a new one
+        self.idle_seconds = period_seconds
+        self._shards = [(threading.Lock(), OrderedDict()) for _ in range(shards)]
+
+    def acquire(self, key: str) -> float:
+        """
+        take one token from the bucket of the given key
+        :return: 0 if the request is allowed, otherwise the seconds until a token is available
+        """
+        lock, buckets = self._shards[hash(key) % len(self._shards)]
+        now = self.clock()
+        with lock:
+            self._evict_idle(buckets, now)
+            tokens, updated_at = buckets.pop(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / self.refill_per_second
+
+            buckets[key] = (tokens, now)
+            if len(buckets) > self.max_keys_per_shard:
+                buckets.popitem(last=False)
+            return retry_after
+
+    def _evict_idle(self, buckets: OrderedDict, now: float):
+        """
+        drop idle buckets from the least recently used end of a shard
+        """
+        while buckets:
+            _, updated_at = next(iter(buckets.values()))
+            if now - updated_at < self.idle_seconds:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self):
+        return sum(len(buckets) for _, buckets in self._shards)
+
+    def reset(self):
+        """
+        drop all buckets
+        """
+        for lock, buckets in self._shards:
+            with lock:
+                buckets.clear()
+
+
+def limiter_from_env(name: str, default: str) -> TokenBucketLimiter:
+    """
+    create a limiter from an environment variable of the form "<requests>/<seconds>"
+    """
+    requests, seconds = os.environ.get(name, default).split("/")
+    return TokenBucketLimiter(capacity=float(requests), period_seconds=float(seconds))
+
+
+login_ip_limiter = limiter_from_env("LOGIN_IP_RATE_LIMIT", "20/60")
+login_username_limiter = limiter_from_env("LOGIN_USERNAME_RATE_LIMIT", "5/60")
+signup_ip_limiter = limiter_from_env("SIGNUP_IP_RATE_LIMIT", "5/60")
+signup_username_limiter = limiter_from_env("SIGNUP_USERNAME_RATE_LIMIT", "3/60")
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    get the client ip of a request.
+    X-Forwarded-For is only trusted when TRUST_FORWARDED_FOR is enabled, i.e. behind a proxy that sets it.
+    """
+    if os.environ.get("TRUST_FORWARDED_FOR", "false").lower() == "true":
+        forwarded_for = request.headers.get("X-Forwarded-For")
+        if forwarded_for:
+            return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+def enforce_rate_limits(*checks: tuple[TokenBucketLimiter, str]):
+    """
+    take a token from every given (limiter, key) bucket and reject the request if any of them is empty
+    """
+    retry_after = max(limiter.acquire(key) for limiter, key in checks)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
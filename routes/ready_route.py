@@ -0,0 +1,79 @@
+"""
+readiness check route
+"""
+
+import asyncio
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from data.database_repository import DatabaseRepository, prewarm_database_client
+from data.page_prefetcher import PAGE_READERS, page_prefetcher
+from usecase.warm_up import WarmUp
+from .home_route_v1 import homepage_index_loader
+from .password_hashing import get_bcrypt_rounds
+
+router = APIRouter(
+    prefix="/ready",
+    tags=["health"],
+)
+
+# the first pages of the lists are warmed with the default page size of the list routes
+FIRST_PAGE_SIZE = 10
+
+
+async def warm_up_list(table: str):
+    """
+    cache the row count of a list, and its first page when prefetching is enabled, since the list routes
+    only read prefetched pages then
+    """
+    repository = DatabaseRepository()
+    if not page_prefetcher.enabled:
+        if await repository.count_rows(table) is None:
+            raise RuntimeError(f"the rows of {table} could not be counted")
+        return
+
+    total, rows = await asyncio.gather(
+        repository.count_rows(table),
+        getattr(repository, PAGE_READERS[table])(page_number=1, page_size=FIRST_PAGE_SIZE),
+    )
+    if total is None or rows is None:
+        raise RuntimeError(f"the first page of {table} could not be read")
+    page_prefetcher.pages.set((table, 1, FIRST_PAGE_SIZE), rows)
+
+
+async def warm_up_homepage_index():
+    """
+    build the homepage facet index read by the facet and filter routes, from the snapshot if there is one.
+    The homepage itself is served from the snapshot, or read from the database on every request without one.
+    """
+    if await homepage_index_loader.execute() is None:
+        raise RuntimeError("the homepage data could not be read")
+
+
+worker_warm_up = WarmUp([
+    # calibrate the bcrypt work factor and open the upstream connections first, the other steps use them
+    {
+        "password_hashing": lambda: asyncio.to_thread(get_bcrypt_rounds),
+        "database": lambda: asyncio.to_thread(prewarm_database_client),
+    },
+    {
+        "homepage_index": warm_up_homepage_index,
+        **{f"{table}_list": lambda table=table: warm_up_list(table) for table in PAGE_READERS},
+    },
+])
+
+
+def get_worker_warm_up() -> WarmUp:
+    """
+    dependency to get the warm-up of this worker.
+    This allows for easy testing and mocking of the readiness.
+    """
+    return worker_warm_up
+
+
+@router.get("")
+async def get_ready(warm_up: WarmUp = Depends(get_worker_warm_up)):
+    """
+    report if the worker that handles the request is warmed up, with a 503 until it is,
+    so that load balancers only route traffic to warm workers
+    """
+    return JSONResponse(content=warm_up.status(), status_code=200 if warm_up.ready else 503)
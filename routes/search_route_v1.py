@@ -0,0 +1,80 @@
+"""
+full-text search route v1
+"""
+
+from typing import Annotated
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
+from fastapi.security import OAuth2PasswordBearer
+from data.bulkhead import BulkheadFullError
+from data.database_repository import DatabaseRepository
+from data.search_index import SearchIndex
+from model.page_v1 import Page
+from usecase.refresh_search_index import RefreshSearchIndex, SEARCH_TABLES
+from .auth_route_v1 import verify_access_token
+from .cache_policy import SEARCH_CACHE
+
+router = APIRouter(
+    prefix="/search",
+    tags=["search"],
+    responses={404: {"description": "Not found"}}
+)
+
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+
+# litigations are only listed for authenticated users, so they are only searchable for them too
+PROTECTED_TYPES = {"litigation"}
+
+search_index = SearchIndex()
+search_index_refresher = RefreshSearchIndex(DatabaseRepository, search_index)
+
+
+def get_search_index_refresher() -> RefreshSearchIndex:
+    """
+    dependency to get the process wide search index refresher.
+    This allows for easy testing and mocking of the index.
+    """
+    return search_index_refresher
+
+
+async def is_authenticated(token: Annotated[str | None, Depends(optional_oauth2_scheme)]) -> bool:
+    """
+    check if the request carries a valid access token, without requiring one
+    """
+    if not token:
+        return False
+    try:
+        payload = await verify_access_token(token)
+        return "sub" in payload
+    except HTTPException:
+        return False
+
+
+@router.get("/")
+async def search(request: Request, response: Response,
+                 q: str, types: Annotated[list[str] | None, Query()] = None, page_number: int = 1, page_size: int = 10,
+                 authenticated: bool = Depends(is_authenticated),
+                 refresher: RefreshSearchIndex = Depends(get_search_index_refresher)):
+    """
+    search experts, nonprofits and litigations
+    :param q: the search terms, each term also matches words starting with it
+    :param types: restrict the results to these types: expert, nonprofit, litigation
+    :param page_number: the page number to fetch
+    :param page_size: the number of items per page
+    """
+    try:
+        doc_types = set(types) if types else set(SEARCH_TABLES)
+        if not authenticated:
+            doc_types -= PROTECTED_TYPES
+        if not doc_types:
+            return Page.from_rows([], 0, page_number, page_size)
+
+        await refresher.ensure_fresh()
+        total, results = refresher.index.search(
+            q, doc_types=doc_types, offset=(page_number - 1) * page_size, limit=page_size)
+        SEARCH_CACHE.apply(request, response, "search")
+        return Page.from_rows(results, total, page_number, page_size)
+    except BulkheadFullError:
+        raise
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"Error searching: {e}")
+        return {"message": "Error searching"}
@@ -0,0 +1,143 @@
+"""
+change stream route v1.
+Pushes change notifications of the homepage and of the experts and nonprofits listings to clients as
+server-sent events, so that they don't need to poll the listings to notice changes. An event names the
+surrogate keys of the changed rows, the same keys the cached responses are tagged with.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timezone
+from typing import Annotated
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from data.change_hub import MAX_EVENT_KEYS, ChangeHub, register_change_hub_metrics
+from data.database_repository import DatabaseRepository
+from usecase.get_list_changes import GetListChanges, version_at
+from .cache_policy import entity_key, entity_keys
+from .home_route_v1 import homepage_index_loader
+
+router = APIRouter(
+    prefix="/stream",
+    tags=["stream"],
+    responses={404: {"description": "Not found"}}
+)
+
+# how long a disconnected client waits before reconnecting
+RECONNECT_MILLISECONDS = 5000
+
+
+async def list_changes(list_name: str, key_type: str, version: str | None) -> tuple[list, list, str]:
+    """
+    get the surrogate keys of the rows of a list changed since a delta sync version.
+    Only the rows after the version are read, see GetListChanges.
+    :param list_name: experts or nonprofits
+    :param key_type: the surrogate key type of the rows of the list
+    :param version: the version returned by the previous poll, or None to start from now
+    :return: the changed keys, the removed keys and the version to poll from next
+    """
+    if version is None:
+        return [], [], version_at(list_name, datetime.now(timezone.utc))
+
+    polled_at = datetime.now(timezone.utc)
+    changes = await GetListChanges(DatabaseRepository(), limit=MAX_EVENT_KEYS).execute(list_name, version)
+    if changes.has_more:
+        # the clients refetch the whole list, so the rest of the changes need not be read
+        return [list_name], [], version_at(list_name, polled_at)
+    removed = [entity_key(key_type, row_id) for row_id in changes.deleted]
+    return entity_keys(key_type, changes.data), removed, changes.version
+
+
+async def homepage_changes(version) -> tuple[list, list, str] | None:
+    """
+    get the homepage key when the version of the homepage facet index changed
+    :param version: the index version of the previous poll, or None on the first poll
+    """
+    index = await homepage_index_loader.execute()
+    if index is None:
+        return None
+    changed = ["homepage"] if version is not None and index.version != version else []
+    return changed, [], index.version
+
+
+change_hub = ChangeHub(
+    sources={
+        "home": homepage_changes,
+        "experts": lambda version: list_changes("experts", "expert", version),
+        # the nonprofits listing serves the entities of the nonprofits
+        "nonprofits": lambda version: list_changes("nonprofits", "entity", version),
+    },
+    interval_seconds=float(os.environ.get("STREAM_POLL_SECONDS", "30")),
+    queue_size=int(os.environ.get("STREAM_QUEUE_SIZE", "16")),
+    max_clients=int(os.environ.get("STREAM_MAX_CLIENTS", "5000")),
+)
+register_change_hub_metrics(change_hub)
+
+
+def get_change_hub() -> ChangeHub:
+    """
+    dependency to get the process wide change hub.
+    This allows for easy testing and mocking of the hub.
+    """
+    return change_hub
+
+
+def format_event(event: str, data: dict) -> str:
+    """
+    format an event in the server-sent events wire format
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def event_stream(hub: ChangeHub, channels: set[str], heartbeat_seconds: float):
+    """
+    subscribe to the hub and stream the events of the subscription, with a comment line as heartbeat while
+    there are none so that proxies keep idle connections open.
+    The subscription is made once the response starts streaming, so a response that is never sent holds none.
+    """
+    yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+    subscription = hub.subscribe(channels)
+    if subscription is None:
+        # the hub filled up after the request was accepted, the client reconnects after the retry interval
+        return
+    try:
+        while True:
+            try:
+                async with asyncio.timeout(heartbeat_seconds):
+                    event, data = await subscription.queue.get()
+            except TimeoutError:
+                yield ": heartbeat\n\n"
+                continue
+            yield format_event(event, data)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+@router.get("")
+async def stream_changes(channels: Annotated[list[str] | None, Query()] = None,
+                         hub: ChangeHub = Depends(get_change_hub)):
+    """
+    stream change events of the home, experts and nonprofits channels as server-sent events
+    :param channels: the channels to subscribe to, all of them by default
+    """
+    selected = set(channels or hub.sources)
+    unknown = selected - set(hub.sources)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown channels: {', '.join(sorted(unknown))}",
+        )
+
+    if hub.is_full():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many stream clients, retry later",
+            headers={"Retry-After": str(RECONNECT_MILLISECONDS // 1000)},
+        )
+    return StreamingResponse(
+        event_stream(hub, selected, float(os.environ.get("STREAM_HEARTBEAT_SECONDS", "15"))),
+        media_type="text/event-stream",
+        # keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
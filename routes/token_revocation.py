@@ -0,0 +1,172 @@
+"""
+token revocation module.
+Revoked token ids are persisted in the database and mirrored in memory, so that checking a token on
+every authenticated request does not need a database round trip. Lookups go through a Bloom filter
+first and only possible hits are confirmed against the exact set. Each sync only reads the tokens revoked
+since the previous one, and expired token ids are dropped from memory.
+"""
+
+import asyncio
+import hashlib
+import math
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+
+class BloomFilter:
+    """
+    fixed size Bloom filter for strings using double hashing
+    """
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = capacity
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], "big"), int.from_bytes(digest[8:], "big") | 1
+        return ((first + i * second) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        """
+        add an item to the filter
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    in-memory view of the revoked token ids and their expiry times
+    """
+    def __init__(self, capacity: int = 100_000):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._expires_at = {}
+        self._filter = BloomFilter(capacity)
+
+    def add(self, jti: str, expires_at: datetime):
+        """
+        mark a token id as revoked until it expires
+        """
+        with self._lock:
+            self._expires_at[jti] = expires_at
+            if len(self._expires_at) > self._filter.capacity:
+                self._rebuild()
+            else:
+                self._filter.add(jti)
+
+    def is_revoked(self, jti: str) -> bool:
+        """
+        check if a token id has been revoked
+        """
+        if jti not in self._filter:
+            return False
+        return jti in self._expires_at
+
+    def merge(self, revoked_tokens: list[dict]):
+        """
+        add the given revoked token rows and drop expired token ids
+        """
+        with self._lock:
+            for revoked_token in revoked_tokens:
+                self._expires_at[revoked_token["jti"]] = datetime.fromisoformat(revoked_token["expires_at"])
+            self._rebuild()
+
+    def _rebuild(self):
+        now = datetime.now(timezone.utc)
+        self._expires_at = {jti: expires_at for jti, expires_at in self._expires_at.items() if expires_at > now}
+        bloom_filter = BloomFilter(max(self.capacity, 2 * len(self._expires_at)))
+        for jti in self._expires_at:
+            bloom_filter.add(jti)
+        self._filter = bloom_filter
+
+    def __len__(self):
+        return len(self._expires_at)
+
+
+revocation_list = RevocationList(capacity=int(os.environ.get("REVOCATION_FILTER_CAPACITY", "100000")))
+
+# incremental syncs re-read this far behind the latest revocation already seen, so that revocations
+# committed late or stamped by a clock running slightly behind are not missed
+REVOCATION_SYNC_OVERLAP = timedelta(minutes=1)
+
+
+async def revoke_token(repository, payload: dict) -> bool | None:
+    """
+    revoke a decoded token in the database and locally.
+    The database insert is conditional, so a token is consumed exactly once across all workers, even before
+    the other workers have synced the revocation.
+    :return: True if this call revoked the token, False if it was already revoked, by this or another worker,
+        or None if the revocation could not be persisted, the other workers then still accept the token
+    """
+    jti = payload.get("jti")
+    if not jti:
+        return True
+    expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    inserted = await repository.insert_revoked_token(jti, expires_at.isoformat())
+    revocation_list.add(jti, expires_at)
+    if inserted is None:
+        return None
+    return len(inserted) > 0
+
+
+class RevocationListSync:
+    """
+    periodically loads the tokens revoked by other workers from the database in the background
+    """
+    def __init__(self, repository_factory, interval_seconds: float | None = None):
+        self.repository_factory = repository_factory
+        self.interval_seconds = interval_seconds if interval_seconds is not None else float(
+            os.environ.get("REVOCATION_SYNC_SECONDS", "30"))
+        self.last_revoked_at = None
+        self._task = None
+
+    async def execute(self):
+        """
+        load the tokens revoked since the previous sync that have not expired yet, all of them on the first sync
+        """
+        revoked_after = None
+        if self.last_revoked_at is not None:
+            revoked_after = (self.last_revoked_at - REVOCATION_SYNC_OVERLAP).isoformat()
+        revoked_tokens = await self.repository_factory().get_revoked_tokens(revoked_after)
+        if revoked_tokens is None:
+            return
+        revocation_list.merge(revoked_tokens)
+        for revoked_token in revoked_tokens:
+            if revoked_token.get("revoked_at"):
+                revoked_at = datetime.fromisoformat(revoked_token["revoked_at"])
+                if self.last_revoked_at is None or revoked_at > self.last_revoked_at:
+                    self.last_revoked_at = revoked_at
+
+    def start(self):
+        """
+        start syncing in the background on the running event loop
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        stop the background sync
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.execute()
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"Error syncing revoked tokens: {e}")
+            await asyncio.sleep(self.interval_seconds)
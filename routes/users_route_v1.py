@@ -2,12 +2,15 @@
 user data operations module v1
 """
 
+import asyncio
 from typing import Annotated, Dict, Any
-import bcrypt
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from model.create_user_request_v1 import CreateUserRequest
 from model.user_v1 import User
 from .auth_route_v1 import verify_access_token
+from .password_hashing import hash_password
+from .rate_limiter import enforce_rate_limits, get_client_ip, signup_ip_limiter, signup_username_limiter
+from data.bulkhead import BulkheadFullError
 from data.database_repository import DatabaseRepository
 
 router = APIRouter(
@@ -25,30 +28,36 @@ def get_database_repository() -> DatabaseRepository:
 
 
 @router.post("/")
-async def create_user(user: CreateUserRequest, repository: DatabaseRepository = Depends(get_database_repository)):
+async def create_user(request: Request, user: CreateUserRequest, repository: DatabaseRepository = Depends(get_database_repository)):
     """
     hash and salt password, check if user already exists, insert user into database
     """
+    enforce_rate_limits(
+        (signup_ip_limiter, get_client_ip(request)),
+        (signup_username_limiter, user.username.lower()),
+    )
+
     try:
         # convert email to lowercase
         username = user.username.lower()
 
         # hash password
-        hashed_password = bcrypt.hashpw(
-            user.password.encode(), bcrypt.gensalt()).decode()
+        hashed_password = await asyncio.to_thread(hash_password, user.password)
 
         # check if user already exists
-        if repository.user_exists(value=username):
+        if await repository.user_exists(value=username):
             return {"message": "User already exists"}
 
         # insert user into database
-        new_user = repository.insert_user(username, hashed_password)
+        new_user = await repository.insert_user(username, hashed_password)
 
         # check if user was inserted successfully
         if new_user:
             return {"message": "User created successfully"}
 
         return {"message": "User creation failed"}
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error creating user: {e}")
         return {"message": "User creation failed"}
@@ -61,10 +70,12 @@ async def get_user(access_token: Annotated[Dict[str, Any], Depends(verify_access
     """
     try:
         token_username: str = access_token.get("sub")
-        user = repository.get_user_by_username(token_username)
+        user = await repository.get_user_by_username(token_username)
         if not user:
             return {"message": "Invalid access token. No username found in token."}
         return user
+    except BulkheadFullError:
+        raise
     except Exception as e:  # pylint: disable=broad-except
         print(f"Error fetching user: {e}")
         return {"message": "Error fetching user"}
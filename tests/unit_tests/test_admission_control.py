@@ -0,0 +1,92 @@
+"""
+admission control unit tests
+"""
+
+import asyncio
+from fastapi.testclient import TestClient
+from api.main import app
+from routes.admission_control import AdmissionController, HIGH_PRIORITY, LOW_PRIORITY, admission_controller
+
+client = TestClient(app)
+
+
+async def test_queued_requests_are_admitted_in_priority_order():
+    """
+    test a freed slot goes to the waiting high priority request first
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=4, queue_timeout_seconds=1)
+    assert await controller.acquire(LOW_PRIORITY) is None
+
+    low = asyncio.create_task(controller.acquire(LOW_PRIORITY))
+    high = asyncio.create_task(controller.acquire(HIGH_PRIORITY))
+    await asyncio.sleep(0)
+    assert controller.queued == 2
+
+    controller.release(0.01)
+    assert await high is None
+    assert not low.done()
+
+    controller.release(0.01)
+    assert await low is None
+    controller.release(0.01)
+    assert controller.active == 0
+    assert controller.queued == 0
+
+
+async def test_requests_are_shed_when_the_queue_is_full():
+    """
+    test low priority requests are shed once half of the queue is used, high priority ones when it is full
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=2, queue_timeout_seconds=1)
+    await controller.acquire(LOW_PRIORITY)
+    waiter = asyncio.create_task(controller.acquire(HIGH_PRIORITY))
+    await asyncio.sleep(0)
+
+    assert await controller.acquire(LOW_PRIORITY) == 1.0
+    other_waiter = asyncio.create_task(controller.acquire(HIGH_PRIORITY))
+    await asyncio.sleep(0)
+    assert await controller.acquire(HIGH_PRIORITY) == 1.0
+
+    controller.release(0.01)
+    controller.release(0.01)
+    assert await waiter is None
+    assert await other_waiter is None
+
+
+async def test_requests_are_shed_when_the_expected_wait_is_too_long():
+    """
+    test requests are rejected right away when recent service times predict a wait beyond the timeout
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout_seconds=1)
+    await controller.acquire(LOW_PRIORITY)
+    controller.service_time = 5
+
+    assert await controller.acquire(HIGH_PRIORITY) == 5
+    assert controller.queued == 0
+
+
+async def test_waiting_requests_time_out():
+    """
+    test a request that waited for the whole queue timeout is rejected and leaves the queue
+    """
+    controller = AdmissionController(max_concurrency=1, max_queue=10, queue_timeout_seconds=0.01)
+    await controller.acquire(LOW_PRIORITY)
+
+    assert await controller.acquire(LOW_PRIORITY) == 1.0
+    assert controller.queued == 0
+    controller.release(0.01)
+    assert controller.active == 0
+
+
+def test_overloaded_worker_returns_503(mocker):
+    """
+    test the middleware sheds requests with a fast 503 while monitoring endpoints stay available
+    """
+    mocker.patch.object(admission_controller, "active", admission_controller.max_concurrency)
+    mocker.patch.object(admission_controller, "service_time", 600)
+
+    response = client.get("/v1/experts/")
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+
+    assert client.get("/health").status_code == 200
@@ -25,6 +25,7 @@ def test_login_success(mocker):
     mocker.patch("routes.auth_route_v1.DatabaseRepository.user_exists", return_value=True)
     mocker.patch("routes.auth_route_v1.DatabaseRepository.get_user_by_username", return_value={
                  "password": bcrypt.hashpw(b"test", bcrypt.gensalt()).decode()})
+    mocker.patch("routes.auth_route_v1.DatabaseRepository.update_user_password", return_value=[])
 
     response = client.post(
         "/v1/login/",
@@ -34,6 +35,22 @@ def test_login_success(mocker):
     assert "access_token" in response.json()
 
 
+def test_login_failure_wrong_password(mocker):
+    """
+    test login failure with a wrong password for an existing user
+    """
+    mocker.patch("routes.auth_route_v1.DatabaseRepository.user_exists", return_value=True)
+    mocker.patch("routes.auth_route_v1.DatabaseRepository.get_user_by_username", return_value={
+                 "password": bcrypt.hashpw(b"test", bcrypt.gensalt(4)).decode()})
+
+    response = client.post(
+        "/v1/login/",
+        data={"username": "testuser2", "password": "wrong"}
+    )
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Incorrect username or password"}
+
+
 def test_login_failure_invalid_credentials(mocker):
     """
     test login failure with invalid credentials
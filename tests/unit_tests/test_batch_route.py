@@ -0,0 +1,111 @@
+"""
+batch route unit tests
+"""
+
+import asyncio
+from fastapi.testclient import TestClient
+from api.main import app
+from routes.admission_control import admission_controller
+from routes.auth_route_v1 import create_access_token
+
+client = TestClient(app)
+
+
+def test_batch_runs_sub_requests_with_the_callers_credentials(mocker):
+    """
+    test sub-requests are answered in request order and authenticated with the batch request's token
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts",
+                 return_value=[{"id": "1", "name": "Expert One"}])
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=1)
+    mocker.patch("routes.users_route_v1.DatabaseRepository.get_user_by_username",
+                 return_value={"username": "batchuser", "password": "hashed_pw", "active": 1})
+    token = create_access_token({"sub": "batchuser"})
+
+    response = client.post(
+        "/v1/batch",
+        json={"requests": [{"path": "/v1/experts/?page_size=10"}, {"path": "/v1/users/me"}]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert response.status_code == 200
+    experts, me = response.json()["responses"]
+    assert experts == {
+        "path": "/v1/experts/?page_size=10",
+        "status": 200,
+        "body": {"data": [{"id": "1", "name": "Expert One"}], "total": 1, "has_next": False, "next_cursor": None},
+    }
+    assert me["status"] == 200
+    assert me["body"]["username"] == "batchuser"
+
+
+def test_batch_reports_errors_per_sub_request():
+    """
+    test failing sub-requests don't fail the batch
+    """
+    response = client.post("/v1/batch", json={"requests": [
+        {"path": "/v1/does-not-exist"},
+        {"path": "/v1/users/me"},
+        {"path": "/v1/batch"},
+        {"path": "/v1/stream"},
+    ]})
+
+    assert response.status_code == 200
+    missing, unauthenticated, nested, stream = response.json()["responses"]
+    assert missing["status"] == 404
+    assert unauthenticated["status"] == 401
+    assert nested == {"path": "/v1/batch", "status": 400, "body": {"detail": "Batches cannot be nested"}}
+    assert stream["status"] == 400
+
+
+def test_batch_only_accepts_v1_get_requests():
+    """
+    test sub-requests outside the v1 api or with other methods are rejected
+    """
+    assert client.post("/v1/batch", json={"requests": [{"path": "/metrics"}]}).status_code == 422
+    assert client.post("/v1/batch", json={"requests": [{"method": "POST", "path": "/v1/users/"}]}).status_code == 422
+    assert client.post("/v1/batch", json={"requests": []}).status_code == 422
+
+
+def test_batch_size_is_limited(monkeypatch):
+    """
+    test batches above BATCH_MAX_REQUESTS are rejected
+    """
+    monkeypatch.setenv("BATCH_MAX_REQUESTS", "2")
+    response = client.post("/v1/batch", json={"requests": [{"path": "/v1/home/"}] * 3})
+    assert response.status_code == 413
+
+
+def test_slow_sub_requests_time_out(mocker, monkeypatch):
+    """
+    test sub-requests still running at the batch time limit are answered with a 504
+    """
+    async def slow_search(*_args, **_kwargs):
+        await asyncio.sleep(1)
+
+    monkeypatch.setenv("BATCH_TIMEOUT_SECONDS", "0.1")
+    mocker.patch("routes.search_route_v1.RefreshSearchIndex.ensure_fresh", side_effect=slow_search)
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts", return_value=[])
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=0)
+
+    response = client.post("/v1/batch", json={"requests": [{"path": "/v1/search/?q=ai"}, {"path": "/v1/experts/"}]})
+
+    search, experts = response.json()["responses"]
+    assert search["status"] == 504
+    assert experts["status"] == 200
+
+
+def test_batch_sub_requests_go_through_admission_control(mocker):
+    """
+    test an overloaded worker sheds every sub-request of a batch instead of running them past its limit
+    """
+    mocker.patch.object(admission_controller, "active", admission_controller.max_concurrency)
+    mocker.patch.object(admission_controller, "service_time", 600)
+    mock_get_experts = mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts", return_value=[])
+
+    response = client.post("/v1/batch", json={"requests": [{"path": "/v1/experts/"}, {"path": "/v1/nonprofits/"}]})
+
+    assert response.status_code == 200
+    assert [sub_response["status"] for sub_response in response.json()["responses"]] == [503, 503]
+    mock_get_experts.assert_not_called()
+    assert admission_controller.active == admission_controller.max_concurrency
@@ -0,0 +1,123 @@
+"""
+bulkhead unit tests
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from api.metrics import MetricsRegistry
+from data.bulkhead import Bulkhead, BulkheadFullError, bulkheads, report_bulkhead_metrics
+from data.database_repository import DatabaseRepository
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def small_bulkheads(mocker):
+    """
+    replace every bulkhead with a single slot one that gives up quickly
+    """
+    mocker.patch.dict(bulkheads, {name: Bulkhead(name, 1, 0.05) for name in bulkheads})
+    return bulkheads
+
+
+@pytest.fixture
+def mock_client(mocker):
+    """
+    mock the database client
+    """
+    mock_db_client = MagicMock()
+    mocker.patch("data.database_repository.get_database_client", return_value=mock_db_client)
+    return mock_db_client
+
+
+async def test_async_calls_wait_for_a_slot():
+    """
+    test async calls wait up to the wait timeout for a slot and fail fast afterwards
+    """
+    bulkhead = Bulkhead("test", max_concurrency=1, wait_timeout_seconds=0.05)
+    async with bulkhead.acquire_async():
+        assert bulkhead.active == 1
+        started_at = time.monotonic()
+        with pytest.raises(BulkheadFullError):
+            async with bulkhead.acquire_async():
+                pass
+        assert time.monotonic() - started_at < 1
+
+    async with bulkhead.acquire_async():
+        assert bulkhead.active == 1
+    assert bulkhead.active == 0
+    assert bulkhead.waiting == 0
+
+
+def test_sync_calls_wait_in_worker_threads():
+    """
+    test a blocking call waits for a slot held by another thread
+    """
+    bulkhead = Bulkhead("test", max_concurrency=1, wait_timeout_seconds=5)
+    released = threading.Event()
+
+    def hold_slot():
+        with bulkhead.acquire():
+            released.wait()
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    while bulkhead.active == 0:
+        time.sleep(0.001)
+
+    threading.Timer(0.05, released.set).start()
+    with bulkhead.acquire():
+        assert bulkhead.active == 1
+    holder.join()
+
+    metrics = MetricsRegistry()
+    report_bulkhead_metrics(metrics)
+    assert metrics.get("bulkhead_max_concurrency", bulkhead="auth") == bulkheads["auth"].max_concurrency
+
+
+async def test_full_bulkhead_only_affects_its_own_operations(small_bulkheads, mock_client):
+    """
+    test a saturated homepage bulkhead rejects homepage calls while auth calls keep working
+    """
+    mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
+        MagicMock(data=[{"username": "testuser", "active": 1}])
+    repository = DatabaseRepository()
+
+    async with small_bulkheads["homepage"].acquire_async():
+        with pytest.raises(BulkheadFullError):
+            await repository.get_homepage_data()
+        assert await repository.user_exists("testuser") is True
+
+
+def test_login_returns_503_when_the_auth_bulkhead_is_full(small_bulkheads):
+    """
+    test requests rejected by a bulkhead are answered with a fast 503
+    """
+    with small_bulkheads["auth"].acquire():
+        response = client.post("/v1/login/", data={"username": "bulkheaduser", "password": "test"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_list_route_returns_503_when_the_listings_bulkhead_is_full(small_bulkheads, mock_client, mocker):
+    """
+    test a list route lets the rejection of its page query through instead of answering with an error message
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=30)
+    with small_bulkheads["listings"].acquire():
+        response = client.get("/v1/experts/?page_number=3&page_size=7")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_homepage_returns_503_when_the_homepage_bulkhead_is_full(small_bulkheads, mock_client):
+    """
+    test the homepage use case lets the rejection through to the 503 handler
+    """
+    with small_bulkheads["homepage"].acquire():
+        response = client.get("/v1/home/")
+    assert response.status_code == 503
@@ -0,0 +1,99 @@
+"""
+edge caching unit tests
+"""
+
+from fastapi.testclient import TestClient
+from api.main import app
+from data.database_repository import row_count_cache
+from data.homepage_snapshot import HomepageSnapshotReader, write_snapshot
+from model.home_v1 import HomePageData
+from routes.auth_route_v1 import create_access_token
+from routes.search_route_v1 import search_index_refresher
+
+client = TestClient(app)
+
+
+def test_public_listing_is_cacheable_and_tagged(mocker):
+    """
+    test anonymous list responses are cacheable by the edge and tagged with their entities
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts",
+                 return_value=[{"id": "1", "name": "Expert One"}, {"id": "2", "name": "Expert Two"}])
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=2)
+
+    response = client.get("/v1/experts/")
+    assert response.headers["Cache-Control"] == "public, max-age=0, s-maxage=60, stale-while-revalidate=300"
+    assert response.headers["Surrogate-Key"] == "experts expert:1 expert:2"
+    assert response.headers["Cache-Tag"] == "experts,expert:1,expert:2"
+
+
+def test_errors_and_authenticated_responses_are_not_shared(mocker):
+    """
+    test failed lookups are not cached and authenticated responses stay private
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_expert_by_id", return_value=None)
+    response = client.get("/v1/experts/1")
+    assert "Cache-Control" not in response.headers
+
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_expert_by_id", return_value=[{"id": "1"}])
+    mocker.patch("routes.middleware.verify_access_token", return_value={"sub": "testuser"})
+    response = client.get("/v1/experts/1", headers={"Authorization": "Bearer token"})
+    assert response.headers["Cache-Control"] == "private, no-store"
+    assert "Surrogate-Key" not in response.headers
+
+
+def test_purge_requires_a_purge_user(mocker):
+    """
+    test only configured users may purge the cache
+    """
+    mocker.patch.dict("os.environ", {"CACHE_PURGE_USERS": "admin"})
+    token = create_access_token({"sub": "testuser"})
+
+    response = client.post("/v1/cache/purge", json={"keys": ["experts"]}, headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 403
+
+
+def test_purge_invalidates_local_and_edge_caches(mocker):
+    """
+    test purging drops the in-process caches and forwards the keys to the edge purge API
+    """
+    mocker.patch.dict("os.environ", {"CACHE_PURGE_USERS": "admin", "EDGE_PURGE_URL": "https://edge.example/purge"})
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    mock_purge = mocker.patch("routes.cache_route_v1.purge_edge_cache")
+    mock_invalidate = mocker.patch("routes.cache_route_v1.homepage_index_loader.invalidate")
+    mock_refresh = mocker.patch("routes.cache_route_v1.search_index_refresher.refresh")
+    row_count_cache.set("experts", 12)
+
+    response = client.post("/v1/cache/purge", json={"keys": ["expert:1", "homepage"]}, headers=headers)
+    assert response.json() == {"purged": ["expert:1", "homepage"], "edge": True,
+                               "other_workers_within_seconds": search_index_refresher.interval_seconds}
+    mock_purge.assert_called_once_with(["expert:1", "homepage"])
+    mock_invalidate.assert_called_once()
+    mock_refresh.assert_awaited_once()
+    assert row_count_cache.get("experts") is None
+
+    mock_purge.side_effect = Exception("edge unavailable")
+    response = client.post("/v1/cache/purge", json={"keys": ["experts"]}, headers=headers)
+    assert response.status_code == 502
+
+
+def test_purge_materializes_a_new_homepage_snapshot_before_purging_the_edge(mocker, tmp_path):
+    """
+    test a homepage purge writes a new snapshot version, which every worker serves, before the edge refetches
+    """
+    snapshot_path = str(tmp_path / "homepage.snapshot")
+    write_snapshot(snapshot_path, b'{"subfactors":[]}', version=1)
+    mocker.patch.dict("os.environ", {"CACHE_PURGE_USERS": "admin", "EDGE_PURGE_URL": "https://edge.example/purge",
+                                     "HOMEPAGE_SNAPSHOT_PATH": snapshot_path})
+    mocker.patch("usecase.materialize_homepage.GetHomePageData.execute",
+                 return_value=HomePageData(subfactors=[{"id": "s1", "name": "Subfactor One"}]))
+    reader = HomepageSnapshotReader(snapshot_path)
+    snapshot_versions = []
+    mocker.patch("routes.cache_route_v1.purge_edge_cache",
+                 side_effect=lambda keys: snapshot_versions.append(reader.read() and reader.version))
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+
+    response = client.post("/v1/cache/purge", json={"keys": ["homepage"]}, headers=headers)
+    assert response.json() == {"purged": ["homepage"], "edge": True, "other_workers_within_seconds": 0}
+    assert snapshot_versions[0] > 1
+    assert b"Subfactor One" in bytes(reader.read())
@@ -0,0 +1,188 @@
+"""
+change hub and stream route unit tests
+"""
+
+import asyncio
+from fastapi.testclient import TestClient
+from api.main import app
+from data.change_hub import ChangeHub, MAX_EVENT_KEYS
+from routes.stream_route_v1 import event_stream, get_change_hub, list_changes, stream_changes
+from usecase.get_list_changes import decode_version
+
+client = TestClient(app)
+
+
+def create_hub(changes: list, max_clients: int = 10, queue_size: int = 4) -> ChangeHub:
+    """
+    create a hub with an experts channel returning the given changes, one per poll, and recording the
+    positions it was polled from
+    """
+    async def experts(position):
+        experts.positions.append(position)
+        return changes.pop(0)
+    experts.positions = []
+
+    return ChangeHub({"experts": experts}, interval_seconds=60, queue_size=queue_size, max_clients=max_clients)
+
+
+async def test_poll_publishes_the_changes_since_the_previous_position():
+    """
+    test the first poll records a position and later polls publish what changed after it
+    """
+    hub = create_hub([
+        ([], [], 1),
+        (["expert:1", "expert:3"], ["expert:2"], 2),
+        ([], [], 2),
+    ])
+    subscription = hub.subscribe({"experts"})
+
+    await hub.poll()
+    assert subscription.queue.empty()
+
+    await hub.poll()
+    assert subscription.queue.get_nowait() == (
+        "change", {"channel": "experts", "changed": ["expert:1", "expert:3"], "removed": ["expert:2"]}
+    )
+
+    await hub.poll()
+    assert subscription.queue.empty()
+    assert hub.sources["experts"].positions == [None, 1, 2]
+    await hub.stop()
+
+
+async def test_large_changes_are_published_as_the_channel():
+    """
+    test a diff with too many keys is replaced by the channel name
+    """
+    hub = create_hub([([], [], 1), ([f"expert:{i}" for i in range(MAX_EVENT_KEYS + 1)], [], 2)])
+    subscription = hub.subscribe({"experts"})
+    await hub.poll()
+    await hub.poll()
+
+    assert subscription.queue.get_nowait() == ("change", {"channel": "experts", "changed": ["experts"], "removed": []})
+    await hub.stop()
+
+
+async def test_clients_only_get_their_channels_and_are_reset_when_behind():
+    """
+    test events are filtered by channel and a full queue is replaced by a reset event
+    """
+    hub = create_hub([], queue_size=2)
+    home = hub.subscribe({"home"})
+    experts = hub.subscribe({"experts"})
+
+    for i in range(3):
+        hub.publish("change", {"channel": "experts", "changed": [f"expert:{i}"], "removed": []})
+
+    assert home.queue.empty()
+    assert experts.queue.qsize() == 1
+    assert experts.queue.get_nowait() == ("reset", {"reason": "client fell behind"})
+    assert hub.resets == 1
+    await hub.stop()
+
+
+async def test_poller_only_runs_while_clients_are_subscribed():
+    """
+    test one poller is shared by every client and stops after the last one leaves
+    """
+    polls = []
+
+    async def experts(position):
+        polls.append(position)
+        return [], [], 1
+
+    hub = ChangeHub({"experts": experts}, interval_seconds=60, queue_size=4, max_clients=2)
+    first = hub.subscribe({"experts"})
+    second = hub.subscribe({"experts"})
+    assert hub.subscribe({"experts"}) is None
+    await asyncio.sleep(0.01)
+    assert len(polls) == 1
+
+    hub.unsubscribe(first)
+    assert hub._task is not None  # pylint: disable=protected-access
+    hub.unsubscribe(second)
+    assert hub._task is None  # pylint: disable=protected-access
+
+
+async def test_event_stream_sends_events_and_heartbeats():
+    """
+    test the stream sends the retry interval, events and heartbeats, and unsubscribes when closed
+    """
+    hub = create_hub([])
+    stream = event_stream(hub, {"experts"}, heartbeat_seconds=0.01)
+
+    assert await anext(stream) == "retry: 5000\n\n"
+    assert await anext(stream) == ": heartbeat\n\n"
+    hub.publish("change", {"channel": "experts", "changed": ["expert:1"], "removed": []})
+    assert await anext(stream) == (
+        'event: change\ndata: {"channel": "experts", "changed": ["expert:1"], "removed": []}\n\n'
+    )
+
+    await stream.aclose()
+    assert not hub.subscriptions
+
+
+async def test_stream_that_is_never_sent_holds_no_subscription():
+    """
+    test a stream response dropped before it started streaming, e.g. when the client went away, leaves no
+    subscription behind
+    """
+    hub = create_hub([])
+
+    response = await stream_changes(["experts"], hub)
+    del response
+    assert not hub.subscriptions
+    assert hub._task is None  # pylint: disable=protected-access
+
+
+async def test_list_changes_reads_only_the_rows_after_the_previous_poll(mocker):
+    """
+    test the experts channel starts from the current time and then reads the rows changed after its position
+    """
+    mock_changed_after = mocker.patch("routes.stream_route_v1.DatabaseRepository.get_rows_changed_after", side_effect=[
+        [{"id": 1, "updated_at": "2024-05-01T10:00:00+00:00"}],
+        [{"row_id": "4", "deleted_at": "2024-05-01T10:00:01+00:00"}],
+    ])
+    mock_get_all_rows = mocker.patch("routes.stream_route_v1.DatabaseRepository.get_all_rows")
+
+    changed, removed, version = await list_changes("experts", "expert", None)
+    assert (changed, removed) == ([], [])
+    mock_changed_after.assert_not_called()
+
+    started_at = decode_version(version)["experts"]["updated"]
+    changed, removed, version = await list_changes("experts", "expert", version)
+    assert (changed, removed) == (["expert:1"], ["expert:4"])
+    assert mock_changed_after.call_args_list[0].args[:3] == ("experts", "updated_at", started_at)
+    assert decode_version(version)["experts"] == {
+        "updated": ["2024-05-01T10:00:00+00:00", 1], "deleted": ["2024-05-01T10:00:01+00:00", "4"]}
+    mock_get_all_rows.assert_not_called()
+
+
+async def test_list_changes_names_the_list_when_too_many_rows_changed(mocker):
+    """
+    test a poll with more changed rows than an event names skips ahead and names the whole list
+    """
+    rows = [{"id": i, "updated_at": "2024-05-01T10:00:00+00:00"} for i in range(MAX_EVENT_KEYS + 1)]
+    mocker.patch("routes.stream_route_v1.DatabaseRepository.get_rows_changed_after", side_effect=[rows, []])
+    _, _, version = await list_changes("experts", "expert", None)
+
+    changed, removed, next_version = await list_changes("experts", "expert", version)
+    assert (changed, removed) == (["experts"], [])
+    assert decode_version(next_version)["experts"]["updated"][1] is None
+
+
+def test_stream_rejects_unknown_channels_and_full_hubs():
+    """
+    test the stream route validates the channels and the number of clients
+    """
+    response = client.get("/v1/stream?channels=litigations")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown channels: litigations"}
+
+    app.dependency_overrides[get_change_hub] = lambda: create_hub([], max_clients=0)
+    try:
+        response = client.get("/v1/stream")
+    finally:
+        app.dependency_overrides.pop(get_change_hub)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
@@ -0,0 +1,28 @@
+"""
+cold start regression tests
+"""
+
+import os
+from tools.profile_startup import DEFERRED_MODULES, measure_cold_start
+
+# generous budget for slow CI runners, the app currently imports in well under a second
+COLD_START_BUDGET_SECONDS = float(os.environ.get("COLD_START_BUDGET_SECONDS", "3"))
+
+
+def test_app_import_defers_heavy_modules():
+    """
+    test importing the app does not import the database client libraries
+    """
+    _, modules, _ = measure_cold_start()
+
+    eager = [module for module in DEFERRED_MODULES if module in modules]
+    assert eager == []
+
+
+def test_app_import_within_budget():
+    """
+    test importing the app stays within the cold start budget
+    """
+    seconds, _, _ = measure_cold_start()
+
+    assert seconds < COLD_START_BUDGET_SECONDS
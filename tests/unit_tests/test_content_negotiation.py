@@ -0,0 +1,93 @@
+"""
+content negotiation unit tests
+"""
+
+import json
+import msgpack
+from fastapi.testclient import TestClient
+from api.main import app
+from routes import content_negotiation
+from data.homepage_snapshot import write_snapshot
+from routes.content_negotiation import JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, json_payload_to_msgpack, negotiate_media_type
+from tools import bench_serialization
+
+client = TestClient(app)
+
+EXPERTS = [{"id": "1", "name": "Expert One"}, {"id": "2", "name": "Expert Two"}]
+
+
+def test_negotiate_media_type():
+    """
+    test MessagePack is chosen when the client accepts it at least as much as JSON
+    """
+    assert negotiate_media_type(None) == JSON_MEDIA_TYPE
+    assert negotiate_media_type("*/*") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/msgpack") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type("application/x-msgpack, application/json;q=0.5") == MSGPACK_MEDIA_TYPE
+    assert negotiate_media_type("application/json, application/msgpack;q=0.5") == JSON_MEDIA_TYPE
+    assert negotiate_media_type("application/msgpack;q=0") == JSON_MEDIA_TYPE
+
+
+def test_falls_back_to_json_without_msgpack(mocker):
+    """
+    test MessagePack requests are answered with JSON when msgpack is not installed
+    """
+    mocker.patch("routes.content_negotiation.load_msgpack", return_value=None)
+    assert negotiate_media_type("application/msgpack") == JSON_MEDIA_TYPE
+
+
+def test_routes_answer_in_the_accepted_format(mocker):
+    """
+    test a list route encodes the same data as JSON by default and as MessagePack on request
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts", return_value=EXPERTS)
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=2)
+
+    json_response = client.get("/v1/experts/")
+    msgpack_response = client.get("/v1/experts/", headers={"Accept": "application/msgpack"})
+
+    assert json_response.headers["content-type"] == "application/json"
+    assert msgpack_response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(msgpack_response.content) == json_response.json()
+    assert "Accept" in msgpack_response.headers["Vary"]
+
+
+def test_batch_embeds_json_sub_responses_in_a_msgpack_batch(mocker):
+    """
+    test sub-responses of a MessagePack batch are embedded as data, not as encoded bytes
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts", return_value=EXPERTS)
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=2)
+
+    response = client.post("/v1/batch", json={"requests": [{"path": "/v1/experts/"}]},
+                           headers={"Accept": "application/msgpack"})
+
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert msgpack.unpackb(response.content)["responses"][0]["body"]["data"] == EXPERTS
+
+
+def test_json_payloads_are_converted_once_per_version(mocker):
+    """
+    test a pre-encoded JSON payload is converted again only when its version changes
+    """
+    encode = mocker.spy(content_negotiation, "encode_msgpack")
+
+    first = json_payload_to_msgpack(101, b'{"subfactors": []}')
+    assert json_payload_to_msgpack(101, b'{"subfactors": []}') == first
+    assert msgpack.unpackb(first) == {"subfactors": []}
+    json_payload_to_msgpack(102, b'{"subfactors": [{"id": 1}]}')
+
+    assert encode.call_count == 2
+
+
+def test_serialization_benchmark_reads_a_snapshot(mocker, tmp_path, capsys):
+    """
+    test the serialization benchmark measures the payload of a materialized homepage snapshot
+    """
+    snapshot_path = str(tmp_path / "homepage.snapshot")
+    write_snapshot(snapshot_path, json.dumps(bench_serialization.build_homepage(2)).encode())
+    mocker.patch("sys.argv", ["bench_serialization", "--snapshot", snapshot_path, "--iterations", "1"])
+
+    bench_serialization.main()
+    lines = capsys.readouterr().out.splitlines()
+    assert [line.split()[0] for line in lines[1:]] == ["json", "msgpack"]
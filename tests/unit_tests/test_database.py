@@ -5,6 +5,7 @@ database operations unit tests
 from unittest.mock import MagicMock
 import pytest
 from data.database_repository import DatabaseRepository
+from data.ttl_cache import TTLCache
 
 @pytest.fixture
 def mock_client(mocker):
@@ -23,7 +24,8 @@ def repository(mock_client):
     """
     return DatabaseRepository()
 
-def test_user_exists(mock_client, repository):
+@pytest.mark.asyncio
+async def test_user_exists(mock_client, repository):
     """
     test user_exists function
     """
@@ -31,17 +33,18 @@ def test_user_exists(mock_client, repository):
     mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
         MagicMock(data=[{"username": "testuser", "active": 1}])
 
-    result = repository.user_exists("testuser")
+    result = await repository.user_exists("testuser")
     assert result is True
 
     # mock response for a user that doesn't exist
     mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
         MagicMock(data=[])
-    result = repository.user_exists("nonexistentuser")
+    result = await repository.user_exists("nonexistentuser")
     assert result is False
 
 
-def test_get_user_by_username(mock_client, repository):
+@pytest.mark.asyncio
+async def test_get_user_by_username(mock_client, repository):
     """
     test get_user_by_username function
     """
@@ -50,17 +53,18 @@ def test_get_user_by_username(mock_client, repository):
         MagicMock(
             data=[{"username": "testuser", "password": "hashed_password"}])
 
-    result = repository.get_user_by_username("testuser")
+    result = await repository.get_user_by_username("testuser")
     assert result == {"username": "testuser", "password": "hashed_password"}
 
     # mock response for a nonexistent user
     mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
         MagicMock(data=[])
-    result = repository.get_user_by_username("nonexistentuser")
+    result = await repository.get_user_by_username("nonexistentuser")
     assert result is None
 
 
-def test_insert_user(mock_client, repository):
+@pytest.mark.asyncio
+async def test_insert_user(mock_client, repository):
     """
     test insert_user function
     """
@@ -69,17 +73,18 @@ def test_insert_user(mock_client, repository):
         data={"username": "testuser", "password": "hashed_password"}
     )
 
-    result = repository.insert_user("testuser", "hashed_password")
+    result = await repository.insert_user("testuser", "hashed_password")
     assert result == {"username": "testuser", "password": "hashed_password"}
 
     # mock response for a failed insertion
     mock_client.table.return_value.insert.return_value.execute.side_effect = Exception(
         "Insertion failed")
-    result = repository.insert_user("testuser", "hashed_password")
+    result = await repository.insert_user("testuser", "hashed_password")
     assert result is None
 
 
-def test_get_litigations(mock_client, repository):
+@pytest.mark.asyncio
+async def test_get_litigations(mock_client, repository):
     """
     test get_litigations function
     """
@@ -89,20 +94,20 @@ def test_get_litigations(mock_client, repository):
               {"id": 2, "case_name": "Litigation B"}]
     )
 
-    result = repository.get_litigations()
+    result = await repository.get_litigations()
     assert result == [{"id": 1, "case_name": "Litigation A"}, {
         "id": 2, "case_name": "Litigation B"}]
 
     # mock response for an empty database
     mock_client.table.return_value.select.return_value.execute.return_value = \
         MagicMock(data=[])
-    result = repository.get_litigations()
+    result = await repository.get_litigations()
     assert result == []
 
     # mock response for a database error
     mock_client.table.return_value.select.return_value.execute.side_effect = Exception(
         "Database error")
-    result = repository.get_litigations()
+    result = await repository.get_litigations()
     assert result is None
 
 @pytest.mark.asyncio
@@ -198,3 +203,42 @@ async def test_get_entity_by_nonprofit_id(mock_client, repository):
         "Database error")
     result = await repository.get_entity_by_nonprofit_id("entity1")
     assert result is None
+
+@pytest.mark.asyncio
+async def test_get_litigations_by_harm_and_risk_ids(mock_client, repository):
+    """
+    test get_litigations_by_harm_and_risk_ids function
+    """
+    # mock response for litigations linked to the given harms and risks
+    mock_client.table.return_value.select.return_value.in_.return_value.execute.return_value = \
+        MagicMock(data=[{"id": 1, "harm_and_risk_id": "h1"}])
+
+    result = await repository.get_litigations_by_harm_and_risk_ids(["h1", "h2"])
+    assert result == [{"id": 1, "harm_and_risk_id": "h1"}]
+    mock_client.table.assert_called_with("Litigation")
+    mock_client.table.return_value.select.return_value.in_.assert_called_with("harm_and_risk_id", ["h1", "h2"])
+
+    # mock response for a database error
+    mock_client.table.return_value.select.return_value.in_.return_value.execute.side_effect = Exception(
+        "Database error")
+    result = await repository.get_resources_by_harm_and_risk_ids(["h1"])
+    assert result is None
+
+@pytest.mark.asyncio
+async def test_count_rows(mock_client, repository, mocker):
+    """
+    test count_rows function caches counts per table
+    """
+    mocker.patch("data.database_repository.row_count_cache", TTLCache(ttl_seconds=30))
+    # mock response for a count query
+    mock_client.table.return_value.select.return_value.execute.return_value = MagicMock(data=[], count=42)
+
+    assert await repository.count_rows("experts") == 42
+    assert await repository.count_rows("experts") == 42
+    mock_client.table.return_value.select.return_value.execute.assert_called_once()
+
+    # mock response for a database error
+    mock_client.table.return_value.select.return_value.execute.side_effect = Exception(
+        "Database error")
+    result = await repository.count_rows("nonprofits")
+    assert result is None
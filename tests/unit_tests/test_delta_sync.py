@@ -0,0 +1,196 @@
+"""
+delta sync unit tests
+"""
+
+from unittest.mock import MagicMock
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from data.database_repository import DatabaseRepository
+from usecase.get_list_changes import GetListChanges, InvalidVersionError, decode_version, encode_version
+
+client = TestClient(app)
+
+
+class InMemoryRepository:
+    """
+    repository keeping tables in memory with the keyset semantics of the database queries
+    """
+    def __init__(self):
+        self.tables = {"experts": [], "nonprofits": [], "entities": [], "tombstones": []}
+        self.clock = 0
+
+    def now(self) -> str:
+        self.clock += 1
+        return f"2024-01-01T00:00:{self.clock:02d}+00:00"
+
+    def upsert(self, table: str, row: dict):
+        self.tables[table] = [existing for existing in self.tables[table] if existing["id"] != row["id"]]
+        self.tables[table].append({**row, "updated_at": self.now()})
+
+    def delete(self, table: str, row_id):
+        row = next(row for row in self.tables[table] if row["id"] == row_id)
+        self.tables[table].remove(row)
+        self.tables["tombstones"].append(
+            {"table_name": table, "row_id": str(row_id), "deleted_at": self.now(), "data": row})
+
+    async def get_rows_changed_after(self, table, column, after, limit, id_column="id", **equals):
+        rows = [row for row in self.tables[table] if all(row[name] == value for name, value in equals.items())]
+        rows.sort(key=lambda row: (row[column], str(row[id_column])))
+        if after is not None and after[1] is None:
+            rows = [row for row in rows if row[column] >= after[0]]
+        elif after is not None:
+            rows = [row for row in rows if (row[column], str(row[id_column])) > (after[0], str(after[1]))]
+        return rows[:limit]
+
+    async def get_nonprofits_by_ids(self, nonprofit_ids):
+        entity_ids = [row["entity_id"] for row in self.tables["nonprofits"] if row["id"] in nonprofit_ids]
+        return [row for row in self.tables["entities"] if row["id"] in entity_ids]
+
+    async def get_nonprofits_by_entity_ids(self, entity_ids):
+        return [row for row in self.tables["nonprofits"] if row["entity_id"] in entity_ids]
+
+
+async def test_sync_returns_only_changes_since_the_version():
+    """
+    test a full sync, an empty incremental sync and a sync after an update and a delete
+    """
+    repository = InMemoryRepository()
+    for expert_id in (1, 2, 3):
+        repository.upsert("experts", {"id": expert_id, "name": f"Expert {expert_id}"})
+    usecase = GetListChanges(repository, limit=10)
+
+    full = await usecase.execute("experts", "0")
+    assert [row["id"] for row in full.data] == [1, 2, 3]
+    assert full.deleted == [] and not full.has_more
+
+    unchanged = await usecase.execute("experts", full.version)
+    assert unchanged.data == [] and unchanged.deleted == []
+
+    repository.upsert("experts", {"id": 2, "name": "Renamed"})
+    repository.delete("experts", 3)
+    delta = await usecase.execute("experts", unchanged.version)
+    assert delta.data == [{"id": 2, "name": "Renamed", "updated_at": repository.tables["experts"][-1]["updated_at"]}]
+    assert delta.deleted == ["3"]
+
+    assert (await usecase.execute("experts", delta.version)).data == []
+
+
+async def test_large_syncs_are_split():
+    """
+    test changes beyond the row limit are returned over several calls without gaps
+    """
+    repository = InMemoryRepository()
+    for expert_id in range(5):
+        repository.upsert("experts", {"id": expert_id})
+    usecase = GetListChanges(repository, limit=2)
+
+    seen, version, has_more = [], "0", True
+    while has_more:
+        changes = await usecase.execute("experts", version)
+        seen += [row["id"] for row in changes.data]
+        version, has_more = changes.version, changes.has_more
+    assert seen == [0, 1, 2, 3, 4]
+
+
+async def test_nonprofit_sync_tracks_nonprofits_and_their_entities():
+    """
+    test the nonprofits list changes with the nonprofits and the entities tables
+    """
+    repository = InMemoryRepository()
+    repository.upsert("entities", {"id": 7, "name": "Org"})
+    repository.upsert("entities", {"id": 8, "name": "Not a nonprofit"})
+    repository.upsert("nonprofits", {"id": 1, "entity_id": 7})
+    usecase = GetListChanges(repository, limit=10)
+
+    full = await usecase.execute("nonprofits", "0")
+    assert [row["id"] for row in full.data] == [7]
+
+    repository.upsert("entities", {"id": 7, "name": "Renamed Org"})
+    repository.upsert("entities", {"id": 8, "name": "Still not a nonprofit"})
+    delta = await usecase.execute("nonprofits", full.version)
+    assert [row["name"] for row in delta.data] == ["Renamed Org"]
+
+    repository.delete("nonprofits", 1)
+    delta = await usecase.execute("nonprofits", delta.version)
+    assert delta.data == [] and delta.deleted == ["7"]
+
+
+def test_versions_round_trip_and_reject_garbage():
+    """
+    test version tokens decode to the cursors they were encoded from and foreign tokens are rejected
+    """
+    cursors = {"experts": {"updated": ["2024-01-01T00:00:01+00:00", 3],
+                           "deleted": ["2024-01-01T00:00:01+00:00", "1b4e28ba-2fa1-11d2-883f-0016d3cca427"]}}
+    assert decode_version(encode_version(cursors)) == cursors
+    assert decode_version("0") == {}
+    for version in ("not a version", encode_version([1, 2])[:-1], "WzFd"):
+        with pytest.raises(InvalidVersionError):
+            decode_version(version)
+
+
+@pytest.mark.parametrize("position", [
+    "2024-01-01T00:00:01+00:00",
+    ["2024-01-01T00:00:01+00:00"],
+    ["yesterday", 3],
+    ['2024-01-01T00:00:01+00:00",id.gt."0', 3],
+    ["2024-01-01T00:00:01+00:00", '3",and(id.gt."0'],
+    ["2024-01-01T00:00:01+00:00", 3.5],
+    ["2024-01-01T00:00:01+00:00", True],
+])
+def test_versions_with_malformed_positions_are_rejected(position):
+    """
+    test every keyset position must be an ISO timestamp and an int or uuid id before it reaches a query
+    """
+    with pytest.raises(InvalidVersionError):
+        decode_version(encode_version({"experts": {"updated": position}}))
+
+
+async def test_repository_reads_rows_after_the_keyset_position(mocker):
+    """
+    test the change query filters after the timestamp and id and orders by both
+    """
+    mock_client = MagicMock()
+    query = mock_client.table.return_value.select.return_value
+    query.eq.return_value = query
+    query.or_.return_value = query
+    query.order.return_value = query
+    query.limit.return_value.execute.return_value.data = [{"id": 4}]
+    mocker.patch("data.database_repository.get_database_client", return_value=mock_client)
+
+    rows = await DatabaseRepository().get_rows_changed_after(
+        "tombstones", "deleted_at", ["2024-01-01T00:00:01+00:00", "3"], 11, id_column="row_id", table_name="experts")
+
+    assert rows == [{"id": 4}]
+    query.eq.assert_called_once_with("table_name", "experts")
+    query.or_.assert_called_once_with(
+        'deleted_at.gt."2024-01-01T00:00:01+00:00",'
+        'and(deleted_at.eq."2024-01-01T00:00:01+00:00",row_id.gt."3")'
+    )
+    query.limit.assert_called_once_with(11)
+
+    await DatabaseRepository().get_rows_changed_after("experts", "updated_at", ["2024-01-01T00:00:02+00:00", None], 11)
+    query.gte.assert_called_once_with("updated_at", "2024-01-01T00:00:02+00:00")
+    query.or_.assert_called_once()
+
+    assert await DatabaseRepository().get_rows_changed_after(
+        "experts", "updated_at", ["2024-01-01T00:00:02+00:00", '1",id.gt."0'], 11) is None
+    query.or_.assert_called_once()
+
+
+def test_list_route_returns_changes_for_since(mocker):
+    """
+    test the experts list answers since requests with a delta and rejects unknown versions
+    """
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.get_rows_changed_after",
+                 return_value=[{"id": 1, "updated_at": "2024-01-01T00:00:01+00:00"}])
+
+    response = client.get("/v1/experts/?since=0")
+    body = response.json()
+    assert body["data"] == [{"id": 1, "updated_at": "2024-01-01T00:00:01+00:00"}]
+    assert body["deleted"] == [] and body["has_more"] is False
+    assert "expert:1" in response.headers["Surrogate-Key"]
+
+    response = client.get("/v1/experts/?since=garbage")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid version"}
@@ -32,10 +32,33 @@ def test_get_experts(mocker):
         "routes.experts_route_v1.DatabaseRepository.get_experts",
         return_value=mock_experts
     )
+    mocker.patch(
+        "routes.experts_route_v1.DatabaseRepository.count_rows",
+        return_value=12
+    )
 
     response = client.get("/v1/experts/")
     assert response.status_code == 200
-    assert response.json() == {"data": mock_experts}
+    assert response.json() == {"data": mock_experts, "total": 12, "has_next": True, "next_cursor": "2"}
+
+def test_get_experts_with_cursor(mocker):
+    """
+    Test the get_experts endpoint resolves the page from the cursor.
+    """
+    mock_get_experts = mocker.patch(
+        "routes.experts_route_v1.DatabaseRepository.get_experts",
+        return_value=[{"id": "11", "name": "Expert Eleven"}, {"id": "12", "name": "Expert Twelve"}]
+    )
+    mocker.patch(
+        "routes.experts_route_v1.DatabaseRepository.count_rows",
+        return_value=12
+    )
+
+    response = client.get("/v1/experts/?cursor=2")
+    assert response.status_code == 200
+    assert response.json()["has_next"] is False
+    assert response.json()["next_cursor"] is None
+    mock_get_experts.assert_called_once_with(page_number=2, page_size=10)
 
 def test_get_expert_by_id(mocker):
     """
@@ -77,3 +100,20 @@ def test_get_expert_by_id_error(mocker):
     response = client.get("/v1/experts/1")
     assert response.status_code == 200
     assert response.json() == {"message": "Error fetching expert by id"}
+
+def test_get_experts_continues_past_a_stale_total(mocker):
+    """
+    Test a full page keeps the pagination going when the estimated total is lower than the rows read so far.
+    """
+    mocker.patch(
+        "routes.experts_route_v1.DatabaseRepository.get_experts",
+        return_value=[{"id": str(expert_id)} for expert_id in range(10)]
+    )
+    mocker.patch(
+        "routes.experts_route_v1.DatabaseRepository.count_rows",
+        return_value=15
+    )
+
+    response = client.get("/v1/experts/?page_number=2&page_size=10")
+    assert response.json()["has_next"] is True
+    assert response.json()["next_cursor"] == "3"
@@ -0,0 +1,89 @@
+"""
+get homepage data use case unit tests
+"""
+
+from unittest.mock import MagicMock, AsyncMock
+import pytest
+from data.database_repository import DatabaseRepository
+from model.home_v1 import HomePageData
+from usecase.get_homepage_data import GetHomePageData
+
+
+@pytest.fixture
+def mock_repository():
+    """
+    Mock DatabaseRepository for testing
+    """
+    mock_repo = MagicMock(spec=DatabaseRepository)
+    mock_repo.get_homepage_data = AsyncMock(return_value=[
+        {"id": "s1", "harms_and_risks": [{"id": "h1"}, {"id": "h2"}]},
+        {"id": "s2", "harms_and_risks": [{"id": "h3"}]},
+    ])
+    mock_repo.get_litigations_by_harm_and_risk_ids = AsyncMock(return_value=[
+        {"id": "l1", "harm_and_risk_id": "h1"},
+        {"id": "l2", "harm_and_risk_id": "h3"},
+    ])
+    mock_repo.get_policies_by_harm_and_risk_ids = AsyncMock(return_value=[
+        {"id": "p1", "harm_and_risk_id": "h1"},
+    ])
+    mock_repo.get_resources_by_harm_and_risk_ids = AsyncMock(return_value=[])
+    return mock_repo
+
+
+@pytest.mark.asyncio
+async def test_execute_attaches_related_items(mock_repository):
+    """
+    test litigations, policies and resources are stitched onto each harm and risk
+    """
+    result = await GetHomePageData(repository=mock_repository).execute()
+
+    assert isinstance(result, HomePageData)
+    harm_1, harm_2 = result.subfactors[0]["harms_and_risks"]
+    harm_3 = result.subfactors[1]["harms_and_risks"][0]
+    assert harm_1["litigations"] == [{"id": "l1", "harm_and_risk_id": "h1"}]
+    assert harm_1["policies"] == [{"id": "p1", "harm_and_risk_id": "h1"}]
+    assert harm_1["resources"] == []
+    assert harm_2["litigations"] == []
+    assert harm_3["litigations"] == [{"id": "l2", "harm_and_risk_id": "h3"}]
+
+
+@pytest.mark.asyncio
+async def test_execute_queries_each_collection_once(mock_repository):
+    """
+    test the number of upstream calls does not grow with the number of harms and risks
+    """
+    await GetHomePageData(repository=mock_repository).execute()
+
+    for method in (
+        mock_repository.get_litigations_by_harm_and_risk_ids,
+        mock_repository.get_policies_by_harm_and_risk_ids,
+        mock_repository.get_resources_by_harm_and_risk_ids,
+    ):
+        method.assert_awaited_once()
+        assert sorted(method.await_args.args[0]) == ["h1", "h2", "h3"]
+
+
+@pytest.mark.asyncio
+async def test_execute_fails_when_a_related_collection_cannot_be_read(mock_repository):
+    """
+    test a failed enrichment query fails the build instead of returning harms and risks without their items
+    """
+    mock_repository.get_policies_by_harm_and_risk_ids = AsyncMock(return_value=None)
+
+    result = await GetHomePageData(repository=mock_repository).execute()
+
+    assert not isinstance(result, HomePageData)
+    assert result == {"message": "Error fetching home page data"}
+
+
+@pytest.mark.asyncio
+async def test_execute_without_harms_and_risks(mock_repository):
+    """
+    test no related queries are issued when there is nothing to enrich
+    """
+    mock_repository.get_homepage_data = AsyncMock(return_value=[{"id": "s1"}])
+
+    result = await GetHomePageData(repository=mock_repository).execute()
+
+    assert result.subfactors == [{"id": "s1"}]
+    mock_repository.get_litigations_by_harm_and_risk_ids.assert_not_awaited()
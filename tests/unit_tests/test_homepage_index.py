@@ -0,0 +1,161 @@
+"""
+homepage facet index unit tests
+"""
+
+import copy
+from unittest.mock import MagicMock, AsyncMock
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from data.database_repository import DatabaseRepository
+from data.homepage_index import HomepageIndex
+from data.homepage_snapshot import HomepageSnapshotReader, write_snapshot
+from model.home_v1 import HomePageData
+from routes import experts_route_v1, nonprofits_route_v1
+from routes.home_route_v1 import get_homepage_index_loader
+from usecase.load_homepage_index import LoadHomepageIndex
+
+client = TestClient(app)
+
+SUBFACTORS = [
+    {
+        "id": 1,
+        "name": "Economic",
+        "harms_and_risks": [
+            {"id": 10, "name": "Wage theft", "experts": [{"id": 100}, {"id": 101}], "nonprofits": [{"id": 200}]},
+            {"id": 11, "name": "Debt", "experts": [{"id": 101}, {"id": 102}], "nonprofits": []},
+        ],
+    },
+    {
+        "id": 2,
+        "name": "Health",
+        "harms_and_risks": [
+            {"id": 20, "name": "Access", "experts": [{"id": 103}], "nonprofits": [{"id": 201}]},
+        ],
+    },
+]
+
+
+@pytest.fixture
+def mock_database_repository():
+    """
+    Mock DatabaseRepository serving the homepage tree
+    """
+    mock_repo = MagicMock(spec=DatabaseRepository)
+    mock_repo.get_homepage_data = AsyncMock(side_effect=lambda: copy.deepcopy(SUBFACTORS))
+    mock_repo.get_litigations_by_harm_and_risk_ids = AsyncMock(return_value=[])
+    mock_repo.get_policies_by_harm_and_risk_ids = AsyncMock(return_value=[])
+    mock_repo.get_resources_by_harm_and_risk_ids = AsyncMock(return_value=[])
+    mock_repo.get_experts_by_ids = AsyncMock(side_effect=lambda ids: [{"id": expert_id} for expert_id in ids])
+    mock_repo.get_nonprofits_by_ids = AsyncMock(side_effect=lambda ids: [{"id": nonprofit_id} for nonprofit_id in ids])
+    return mock_repo
+
+
+@pytest.fixture
+def index_loader(mock_database_repository):
+    """
+    homepage index loader backed by the mocked repository
+    """
+    loader = LoadHomepageIndex(lambda: mock_database_repository)
+    app.dependency_overrides[get_homepage_index_loader] = lambda: loader
+    app.dependency_overrides[experts_route_v1.get_database_repository] = lambda: mock_database_repository
+    app.dependency_overrides[nonprofits_route_v1.get_database_repository] = lambda: mock_database_repository
+    yield loader
+    app.dependency_overrides.pop(get_homepage_index_loader)
+    app.dependency_overrides.pop(experts_route_v1.get_database_repository)
+    app.dependency_overrides.pop(nonprofits_route_v1.get_database_repository)
+
+
+def test_item_ids_by_facet():
+    """
+    test the facet index resolves subfactors and harms and risks to deduplicated item ids
+    """
+    index = HomepageIndex(SUBFACTORS)
+    assert index.item_ids("experts", subfactor_id="1") == ["100", "101", "102"]
+    assert index.item_ids("experts", harm_and_risk_id="11") == ["101", "102"]
+    assert index.item_ids("experts", subfactor_id="2", harm_and_risk_id="11") == []
+    assert index.item_ids("nonprofits") == ["200", "201"]
+    assert index.item_ids("experts", subfactor_id="404") == []
+
+    assert index.subfactors[0]["harms_and_risks"][0] == {
+        "id": 10, "name": "Wage theft", "experts_count": 2, "nonprofits_count": 1,
+    }
+
+
+async def test_index_is_rebuilt_per_snapshot_version(tmp_path, mock_database_repository):
+    """
+    test the index follows the homepage snapshot version without querying the database
+    """
+    path = str(tmp_path / "homepage.snapshot")
+    reader = HomepageSnapshotReader(path)
+    loader = LoadHomepageIndex(lambda: mock_database_repository, lambda: reader)
+
+    write_snapshot(path, HomePageData(subfactors=SUBFACTORS).model_dump_json().encode(), version=1)
+    index = await loader.execute()
+    assert index.version == 1
+    assert await loader.execute() is index
+
+    write_snapshot(path, HomePageData(subfactors=SUBFACTORS[:1]).model_dump_json().encode(), version=2)
+    index = await loader.execute()
+    assert index.version == 2
+    assert index.item_ids("nonprofits") == ["200"]
+    mock_database_repository.get_homepage_data.assert_not_called()
+
+
+async def test_index_is_cached_between_loads(mock_database_repository):
+    """
+    test the index is only rebuilt from the database after its time to live
+    """
+    loader = LoadHomepageIndex(lambda: mock_database_repository, ttl_seconds=60)
+    index = await loader.execute()
+    assert await loader.execute() is index
+    mock_database_repository.get_homepage_data.assert_called_once()
+
+
+def test_get_subfactors(index_loader):
+    """
+    test the subfactor facets endpoint
+    """
+    response = client.get("/v1/home/subfactors")
+    assert response.status_code == 200
+    assert [subfactor["id"] for subfactor in response.json()["data"]] == [1, 2]
+
+
+def test_filter_experts_by_subfactor(index_loader, mock_database_repository):
+    """
+    test the experts list filtered by subfactor only fetches the ids of the requested page
+    """
+    response = client.get("/v1/experts/?subfactor_id=1&page_size=2")
+    assert response.json() == {
+        "data": [{"id": "100"}, {"id": "101"}], "total": 3, "has_next": True, "next_cursor": "2",
+    }
+    mock_database_repository.get_experts_by_ids.assert_called_once_with(["100", "101"])
+    mock_database_repository.get_experts.assert_not_called()
+
+
+def test_filter_nonprofits_by_harm_and_risk(index_loader):
+    """
+    test the nonprofits list filtered by harm and risk
+    """
+    response = client.get("/v1/nonprofits/?harm_and_risk_id=20")
+    assert response.json()["data"] == [{"id": "201"}]
+    assert response.json()["total"] == 1
+
+    response = client.get("/v1/nonprofits/?harm_and_risk_id=11")
+    assert response.json() == {"data": [], "total": 0, "has_next": False, "next_cursor": None}
+
+
+def test_get_subtrees(index_loader):
+    """
+    test single subfactors and harms and risks are served with their subtree only
+    """
+    response = client.get("/v1/home/subfactors/2")
+    assert response.json()["data"]["name"] == "Health"
+    assert [harm["id"] for harm in response.json()["data"]["harms_and_risks"]] == [20]
+    assert response.json()["data"]["harms_and_risks"][0]["litigations"] == []
+
+    response = client.get("/v1/home/harms/11")
+    assert response.json()["data"]["experts"] == [{"id": 101}, {"id": 102}]
+
+    assert client.get("/v1/home/subfactors/404").json() == {"message": "Subfactor not found"}
+    assert client.get("/v1/home/harms/404").json() == {"message": "Harm and risk not found"}
@@ -0,0 +1,135 @@
+"""
+homepage snapshot unit tests
+"""
+
+from unittest.mock import MagicMock, AsyncMock
+import json
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from data.database_repository import DatabaseRepository
+from data.homepage_snapshot import HomepageSnapshotReader, write_snapshot
+from usecase.materialize_homepage import MaterializeHomePage
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    """
+    path of a snapshot file in a temporary directory
+    """
+    return str(tmp_path / "homepage.snapshot")
+
+
+@pytest.fixture
+def mock_database_repository():
+    """
+    Mock DatabaseRepository returning homepage data without harms and risks
+    """
+    mock_repo = MagicMock(spec=DatabaseRepository)
+    mock_repo.get_homepage_data = AsyncMock(return_value=[{"id": "s1", "name": "Subfactor One"}])
+    return mock_repo
+
+
+def test_write_and_read_snapshot(snapshot_path):
+    """
+    test a written snapshot is read back with its version
+    """
+    version = write_snapshot(snapshot_path, b'{"subfactors":[]}', version=7)
+    reader = HomepageSnapshotReader(snapshot_path)
+
+    payload = reader.read()
+    assert bytes(payload) == b'{"subfactors":[]}'
+    assert reader.version == version == 7
+
+
+def test_read_snapshot_after_replace(snapshot_path):
+    """
+    test the reader picks up a replaced snapshot while old views stay valid
+    """
+    write_snapshot(snapshot_path, b"old", version=1)
+    reader = HomepageSnapshotReader(snapshot_path)
+    old_payload = reader.read()
+
+    write_snapshot(snapshot_path, b"newer", version=2)
+    assert bytes(reader.read()) == b"newer"
+    assert reader.version == 2
+    assert bytes(old_payload) == b"old"
+
+
+def test_read_missing_or_invalid_snapshot(snapshot_path):
+    """
+    test missing and corrupted snapshots are ignored
+    """
+    reader = HomepageSnapshotReader(snapshot_path)
+    assert reader.read() is None
+
+    with open(snapshot_path, "wb") as snapshot_file:
+        snapshot_file.write(b"not a snapshot file at all")
+    assert reader.read() is None
+
+
+@pytest.mark.asyncio
+async def test_materialize_homepage(snapshot_path, mock_database_repository):
+    """
+    test the materializer writes a snapshot only when the payload changes
+    """
+    materializer = MaterializeHomePage(lambda: mock_database_repository, snapshot_path)
+
+    version = await materializer.execute()
+    assert version is not None
+    assert await materializer.execute() is None
+
+    payload = HomepageSnapshotReader(snapshot_path).read()
+    assert json.loads(bytes(payload)) == {"subfactors": [{"id": "s1", "name": "Subfactor One"}]}
+
+
+@pytest.mark.asyncio
+async def test_materialize_homepage_keeps_last_good_snapshot(snapshot_path, mock_database_repository):
+    """
+    test a failed build does not replace the last good snapshot
+    """
+    write_snapshot(snapshot_path, b"last good", version=1)
+    mock_database_repository.get_homepage_data = AsyncMock(return_value=None)
+    materializer = MaterializeHomePage(lambda: mock_database_repository, snapshot_path)
+
+    assert await materializer.execute() is None
+    assert bytes(HomepageSnapshotReader(snapshot_path).read()) == b"last good"
+
+
+def test_home_route_serves_snapshot(mocker, snapshot_path):
+    """
+    test the home route serves the snapshot without executing the use case
+    """
+    write_snapshot(snapshot_path, b'{"subfactors":[{"id":"s1"}]}', version=42)
+    mocker.patch.dict("os.environ", {"HOMEPAGE_SNAPSHOT_PATH": snapshot_path})
+    mock_execute = mocker.patch("routes.home_route_v1.GetHomePageData.execute", new_callable=AsyncMock)
+
+    response = client.get("/v1/home/")
+    assert response.status_code == 200
+    assert response.json() == {"subfactors": [{"id": "s1"}]}
+    assert response.headers["X-Snapshot-Version"] == "42"
+    mock_execute.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_materialize_homepage_keeps_snapshot_when_an_enrichment_query_fails(snapshot_path,
+                                                                                  mock_database_repository):
+    """
+    test a build with a failed related items query does not replace a complete snapshot with a stripped one
+    """
+    mock_database_repository.get_homepage_data = AsyncMock(
+        side_effect=lambda: [{"id": "s1", "harms_and_risks": [{"id": "h1"}]}])
+    mock_database_repository.get_litigations_by_harm_and_risk_ids = AsyncMock(
+        return_value=[{"id": "l1", "harm_and_risk_id": "h1"}])
+    mock_database_repository.get_policies_by_harm_and_risk_ids = AsyncMock(return_value=[])
+    mock_database_repository.get_resources_by_harm_and_risk_ids = AsyncMock(return_value=[])
+    materializer = MaterializeHomePage(lambda: mock_database_repository, snapshot_path)
+    assert await materializer.execute() is not None
+
+    mock_database_repository.get_litigations_by_harm_and_risk_ids = AsyncMock(return_value=None)
+    assert await materializer.execute() is None
+
+    payload = json.loads(bytes(HomepageSnapshotReader(snapshot_path).read()))
+    assert payload["subfactors"][0]["harms_and_risks"][0]["litigations"] == [{"id": "l1", "harm_and_risk_id": "h1"}]
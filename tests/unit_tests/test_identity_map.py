@@ -0,0 +1,98 @@
+"""
+request-scoped identity map unit tests
+"""
+
+from unittest.mock import MagicMock
+import bcrypt
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from data.database_repository import DatabaseRepository
+from data.identity_map import IdentityMap, current_identity_map
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def mock_client(mocker):
+    """
+    mock the database client
+    """
+    mock_db_client = MagicMock()
+    mocker.patch("data.database_repository.get_database_client", return_value=mock_db_client)
+    return mock_db_client
+
+
+@pytest.fixture
+def identity_map():
+    """
+    run the test as if it was inside a request
+    """
+    token = current_identity_map.set(IdentityMap())
+    yield current_identity_map.get()
+    current_identity_map.reset(token)
+
+
+async def test_user_lookups_are_deduplicated(mock_client, identity_map):
+    """
+    test the same user is only fetched once per request, and fetched again after it was written
+    """
+    mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
+        MagicMock(data=[{"username": "testuser", "active": 1}])
+    repository = DatabaseRepository()
+
+    assert await repository.user_exists("TestUser") is True
+    assert (await repository.get_user_by_username("testuser"))["username"] == "testuser"
+    assert mock_client.table.return_value.select.return_value.eq.return_value.execute.call_count == 1
+
+    await repository.update_user_password("testuser", "hash")
+    await repository.get_user_by_username("testuser")
+    assert mock_client.table.return_value.select.return_value.eq.return_value.execute.call_count == 2
+    assert len(identity_map) == 1
+
+
+async def test_lookups_are_not_cached_outside_a_request(mock_client):
+    """
+    test lookups outside of a request always reach the database
+    """
+    mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
+        MagicMock(data=[{"username": "testuser", "active": 1}])
+    repository = DatabaseRepository()
+
+    await repository.get_user_by_username("testuser")
+    await repository.get_user_by_username("testuser")
+    assert mock_client.table.return_value.select.return_value.eq.return_value.execute.call_count == 2
+
+
+async def test_nonprofit_rows_are_reused(mock_client, identity_map):
+    """
+    test a nonprofit listed earlier in the request is not queried again
+    """
+    mock_client.table.return_value.select.return_value.range.return_value.execute.return_value = \
+        MagicMock(data=[{"id": 1, "entity_id": 10}, {"id": 2, "entity_id": 20}])
+    mock_client.table.return_value.select.return_value.in_.return_value.execute.return_value = \
+        MagicMock(data=[{"id": 20, "name": "Entity Two"}, {"id": 10, "name": "Entity One"}])
+    repository = DatabaseRepository()
+
+    entities = await repository.get_nonprofits(page_number=1, page_size=2)
+    assert entities == [{"id": 10, "name": "Entity One"}, {"id": 20, "name": "Entity Two"}]
+
+    assert await repository.get_entity_by_nonprofit_id("2") == [{"id": 20, "name": "Entity Two"}]
+    mock_client.table.return_value.select.return_value.eq.assert_not_called()
+    mock_client.table.return_value.select.return_value.in_.assert_called_once_with("id", [10, 20])
+
+
+def test_login_fetches_the_user_once(mocker, mock_client):
+    """
+    test login checks and authenticates the user with a single lookup, and the map ends with the request
+    """
+    mocker.patch("routes.auth_route_v1.bcrypt.checkpw", return_value=True)
+    mocker.patch("routes.auth_route_v1.needs_rehash", return_value=False)
+    mock_client.table.return_value.select.return_value.eq.return_value.execute.return_value = \
+        MagicMock(data=[{"username": "mapuser", "active": 1, "password": bcrypt.hashpw(b"x", bcrypt.gensalt(4)).decode()}])
+
+    for _ in range(2):
+        response = client.post("/v1/login/", data={"username": "mapuser", "password": "test"})
+        assert response.status_code == 200
+    assert mock_client.table.return_value.select.return_value.eq.return_value.execute.call_count == 2
+    assert current_identity_map.get() is None
@@ -0,0 +1,83 @@
+"""
+event loop monitor unit tests
+"""
+
+import asyncio
+import time
+from api.loop_monitor import LoopMonitor
+from api.metrics import MetricsRegistry
+from routes import password_hashing
+
+
+def block_the_loop(seconds: float):
+    """
+    stand-in for blocking work done on the event loop thread
+    """
+    time.sleep(seconds)
+
+
+async def test_stall_is_attributed_to_the_blocking_function():
+    """
+    test a stall above the threshold is reported once with the function that blocked the loop
+    """
+    metrics = MetricsRegistry()
+    monitor = LoopMonitor(interval_seconds=0.01, threshold_seconds=0.05, metrics=metrics)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    block_the_loop(0.3)
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    assert monitor.last_stall["callable"].endswith("test_loop_monitor.block_the_loop")
+    assert monitor.last_stall["location"].startswith("tests/unit_tests/test_loop_monitor.py:")
+    assert "block_the_loop" in monitor.last_stall["stack"]
+    assert metrics.get("event_loop_stalls_total", callable=monitor.last_stall["callable"]) == 1
+    assert metrics.get("event_loop_lag_max_seconds") >= 0.25
+
+
+async def test_stall_in_library_code_is_attributed_to_our_function(mocker):
+    """
+    test a blocking bcrypt call is attributed to the function calling it rather than to the library
+    """
+    mocker.patch.dict("os.environ", {"BCRYPT_ROUNDS": "12"})
+    mocker.patch.object(password_hashing, "_rounds", None)
+    metrics = MetricsRegistry()
+    monitor = LoopMonitor(interval_seconds=0.01, threshold_seconds=0.05, metrics=metrics)
+    monitor.start()
+    await asyncio.sleep(0.03)
+    password_hashing.hash_password("password123")
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    assert monitor.last_stall["callable"] == "routes.password_hashing.hash_password"
+    assert metrics.get("event_loop_stalls_total", callable="routes.password_hashing.hash_password") == 1
+
+
+async def test_no_stall_is_reported_for_a_responsive_loop():
+    """
+    test a loop that keeps yielding is never reported
+    """
+    metrics = MetricsRegistry()
+    monitor = LoopMonitor(interval_seconds=0.01, threshold_seconds=0.1, metrics=metrics)
+    monitor.start()
+    for _ in range(10):
+        block_the_loop(0.005)
+        await asyncio.sleep(0.01)
+    await monitor.stop()
+
+    assert monitor.last_stall is None
+    assert metrics.get("event_loop_lag_seconds") is not None
+
+
+def test_monitor_is_configured_from_environment(monkeypatch):
+    """
+    test the monitor reads its settings from the environment and can be disabled
+    """
+    monkeypatch.setenv("LOOP_LAG_THRESHOLD_MS", "200")
+    monkeypatch.setenv("LOOP_MONITOR_INTERVAL_MS", "50")
+    monitor = LoopMonitor.from_env()
+    assert monitor.threshold_seconds == 0.2
+    assert monitor.interval_seconds == 0.05
+
+    monkeypatch.setenv("LOOP_LAG_THRESHOLD_MS", "0")
+    assert LoopMonitor.from_env() is None
@@ -0,0 +1,36 @@
+"""
+metrics unit tests
+"""
+
+from fastapi.testclient import TestClient
+from api.main import app
+from api.metrics import MetricsRegistry
+
+client = TestClient(app)
+
+
+def test_registry_render():
+    """
+    test counters, gauges and collectors are rendered in the Prometheus text format
+    """
+    metrics = MetricsRegistry()
+    metrics.inc("requests_total", description="handled requests", route="/v1/home/")
+    metrics.inc("requests_total", route="/v1/home/")
+    metrics.set("queue_depth", 3)
+    metrics.register_collector(lambda registry: registry.set("collected", 5, pool="database"))
+
+    rendered = metrics.render()
+    assert "# HELP requests_total handled requests" in rendered
+    assert "# TYPE requests_total counter" in rendered
+    assert 'requests_total{route="/v1/home/"} 2' in rendered
+    assert "queue_depth 3" in rendered
+    assert 'collected{pool="database"} 5' in rendered
+
+
+def test_metrics_route():
+    """
+    test the metrics endpoint serves plain text
+    """
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
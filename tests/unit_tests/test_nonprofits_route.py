@@ -32,10 +32,14 @@ def test_get_nonprofits(mocker):
         "routes.nonprofits_route_v1.DatabaseRepository.get_nonprofits",
         return_value=mock_nonprofits
     )
+    mocker.patch(
+        "routes.nonprofits_route_v1.DatabaseRepository.count_rows",
+        return_value=None
+    )
 
     response = client.get("/v1/nonprofits/")
     assert response.status_code == 200
-    assert response.json() == {"data": mock_nonprofits}
+    assert response.json() == {"data": mock_nonprofits, "total": None, "has_next": False, "next_cursor": None}
 
 def test_get_entity_by_nonprofit_id(mocker):
     """
@@ -0,0 +1,121 @@
+"""
+page prefetcher unit tests
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+from fastapi.testclient import TestClient
+from api.main import app
+from data.bulkhead import Bulkhead, bulkheads
+from data.identity_map import IdentityMap, current_identity_map, recall
+from data.page_prefetcher import PagePrefetcher, get_page_prefetcher
+
+client = TestClient(app)
+
+
+def repository_reading(get_experts) -> MagicMock:
+    """
+    repository class whose instances read experts pages with the given function
+    """
+    return MagicMock(return_value=MagicMock(get_experts=get_experts))
+
+
+async def test_prefetched_pages_are_served_from_the_cache():
+    """
+    test a prefetched page is served without fetching it again
+    """
+    fetch = AsyncMock(return_value=[{"id": "11"}])
+    prefetcher = PagePrefetcher(enabled=True, ttl_seconds=10, max_in_flight=2,
+                                repository_factory=repository_reading(fetch))
+
+    assert prefetcher.prefetch("experts", 2, 10)
+    assert not prefetcher.prefetch("experts", 2, 10)
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+    assert await prefetcher.get_page("experts", 2, 10, fetch) == [{"id": "11"}]
+    fetch.assert_called_once_with(page_number=2, page_size=10)
+    assert not prefetcher.prefetch("experts", 2, 10)
+
+    prefetcher.invalidate()
+    await prefetcher.get_page("experts", 2, 10, fetch)
+    assert fetch.call_count == 2
+
+
+async def test_disabled_prefetcher_always_fetches():
+    """
+    test nothing is prefetched or cached unless prefetching is enabled
+    """
+    fetch = AsyncMock(return_value=[{"id": "1"}])
+    prefetcher = PagePrefetcher(enabled=False, ttl_seconds=10, max_in_flight=2,
+                                repository_factory=repository_reading(fetch))
+
+    assert not prefetcher.prefetch("experts", 2, 10)
+    await prefetcher.get_page("experts", 1, 10, fetch)
+    fetch.assert_called_once_with(page_number=1, page_size=10)
+
+
+async def test_prefetches_stay_within_budget(mocker):
+    """
+    test prefetches are skipped above the in flight limit and while the bulkhead is busy
+    """
+    release = asyncio.Event()
+
+    async def slow_fetch(**_kwargs):
+        await release.wait()
+        return [{"id": "1"}]
+
+    prefetcher = PagePrefetcher(enabled=True, ttl_seconds=10, max_in_flight=1,
+                                repository_factory=repository_reading(slow_fetch))
+
+    assert prefetcher.prefetch("experts", 2, 10)
+    assert not prefetcher.prefetch("nonprofits", 2, 10)
+    release.set()
+    await asyncio.sleep(0.01)
+
+    busy = Bulkhead("listings", 4, 1)
+    busy.active = 2
+    mocker.patch.dict(bulkheads, {"listings": busy})
+    assert not prefetcher.prefetch("nonprofits", 2, 10)
+
+
+async def test_prefetches_run_outside_the_request():
+    """
+    test a prefetch reads through its own repository and does not fill the identity map of the request
+    """
+    async def fetch(**_kwargs):
+        assert current_identity_map.get() is None
+        return [{"id": "11"}]
+
+    repository_factory = repository_reading(fetch)
+    prefetcher = PagePrefetcher(enabled=True, ttl_seconds=10, max_in_flight=2, repository_factory=repository_factory)
+    token = current_identity_map.set(IdentityMap())
+    try:
+        assert prefetcher.prefetch("experts", 2, 10)
+        await asyncio.sleep(0.01)
+        assert recall("experts", "11") is None
+    finally:
+        current_identity_map.reset(token)
+
+    repository_factory.assert_called_once_with()
+    assert prefetcher.pages.get(("experts", 2, 10)) == [{"id": "11"}]
+
+
+def test_list_route_serves_prefetched_pages_and_prefetches_the_next(mocker):
+    """
+    test the experts list uses the prefetched page and schedules the page after it
+    """
+    prefetcher = PagePrefetcher(enabled=True, ttl_seconds=10, max_in_flight=2)
+    prefetcher.pages.set(("experts", 2, 10), [{"id": "11", "name": "Expert Eleven"}])
+    mock_prefetch = mocker.patch.object(prefetcher, "prefetch")
+    mock_get_experts = mocker.patch("routes.experts_route_v1.DatabaseRepository.get_experts")
+    mocker.patch("routes.experts_route_v1.DatabaseRepository.count_rows", return_value=30)
+    app.dependency_overrides[get_page_prefetcher] = lambda: prefetcher
+    try:
+        response = client.get("/v1/experts/?page_number=2")
+    finally:
+        app.dependency_overrides.pop(get_page_prefetcher)
+
+    assert response.json()["data"] == [{"id": "11", "name": "Expert Eleven"}]
+    mock_get_experts.assert_not_called()
+    mock_prefetch.assert_called_once_with("experts", 3, 10)
@@ -0,0 +1,95 @@
+"""
+password hashing unit tests
+"""
+
+from unittest.mock import AsyncMock
+import bcrypt
+import pytest
+from fastapi import BackgroundTasks
+from routes import password_hashing
+from routes.auth_route_v1 import authenticate_user
+from routes.password_hashing import calibrate_bcrypt_rounds, get_bcrypt_rounds, get_hash_rounds, \
+    hash_password, needs_rehash
+
+
+@pytest.fixture(autouse=True)
+def bcrypt_rounds(mocker):
+    """
+    use a cheap, fixed work factor
+    """
+    mocker.patch.dict("os.environ", {"BCRYPT_ROUNDS": "5"})
+    mocker.patch.object(password_hashing, "_rounds", None)
+
+
+def test_calibrate_bcrypt_rounds(mocker):
+    """
+    test the work factor is extrapolated from the probe hash time and clamped
+    """
+    # probe hash at 8 rounds takes 10ms
+    mocker.patch("routes.password_hashing.time.perf_counter", side_effect=[0, 0.01] * 3)
+
+    assert calibrate_bcrypt_rounds(target_ms=250) == 12
+    assert calibrate_bcrypt_rounds(target_ms=20) == 10
+    assert calibrate_bcrypt_rounds(target_ms=1_000_000) == 16
+
+
+def test_hash_password_uses_configured_rounds():
+    """
+    test hashes are created with the configured work factor
+    """
+    hashed_password = hash_password("password123")
+
+    assert get_bcrypt_rounds() == 5
+    assert get_hash_rounds(hashed_password) == 5
+    assert bcrypt.checkpw(b"password123", hashed_password.encode())
+    assert not needs_rehash(hashed_password)
+    assert needs_rehash(bcrypt.hashpw(b"password123", bcrypt.gensalt(4)).decode())
+    assert get_hash_rounds("not a hash") is None
+
+
+async def test_authenticate_user_schedules_rehash():
+    """
+    test a successful login with an outdated work factor rehashes in the background
+    """
+    repository = AsyncMock()
+    repository.get_user_by_username.return_value = {
+        "password": bcrypt.hashpw(b"password123", bcrypt.gensalt(4)).decode()}
+    background_tasks = BackgroundTasks()
+
+    assert await authenticate_user("testuser", "password123", repository, background_tasks) is True
+    assert len(background_tasks.tasks) == 1
+    repository.update_user_password.assert_not_called()
+
+    task = background_tasks.tasks[0]
+    await task.func(*task.args, **task.kwargs)
+    username, new_hash = repository.update_user_password.call_args.args
+    assert username == "testuser"
+    assert get_hash_rounds(new_hash) == 5
+    assert bcrypt.checkpw(b"password123", new_hash.encode())
+
+
+async def test_authenticate_user_without_rehash():
+    """
+    test failed logins and current hashes do not schedule a rehash
+    """
+    repository = AsyncMock()
+    repository.get_user_by_username.return_value = {"password": hash_password("password123")}
+    background_tasks = BackgroundTasks()
+
+    assert await authenticate_user("testuser", "password123", repository, background_tasks) is True
+    assert await authenticate_user("testuser", "wrong", repository, background_tasks) is False
+    assert background_tasks.tasks == []
+
+
+def test_needs_rehash_only_upgrades_below_the_floor(mocker):
+    """
+    test calibrated processes only rehash hashes below the configured floor, whatever their own work factor
+    """
+    mocker.patch.dict("os.environ", {"BCRYPT_ROUNDS": "", "BCRYPT_MIN_ROUNDS": "5"})
+    mocker.patch.object(password_hashing, "_rounds", 6)
+    stronger_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt(7)).decode()
+    weaker_hash = bcrypt.hashpw(b"password123", bcrypt.gensalt(5)).decode()
+
+    assert not needs_rehash(stronger_hash)
+    assert not needs_rehash(weaker_hash)
+    assert needs_rehash(bcrypt.hashpw(b"password123", bcrypt.gensalt(4)).decode())
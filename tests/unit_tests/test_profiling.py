@@ -0,0 +1,69 @@
+"""
+request profiling unit tests
+"""
+
+import json
+import os
+import time
+from fastapi.testclient import TestClient
+from api.main import app
+from api.profiling import get_profiling_settings, sign_profile_request, verify_profile_request
+from routes.middleware import ProfilingMiddleware
+
+
+def test_profiling_is_disabled_by_default(mocker):
+    """
+    test the profiling middleware is only configured with a profile directory and a trigger
+    """
+    mocker.patch.dict("os.environ", {"PROFILE_DIR": "", "PROFILE_SECRET": "", "PROFILE_SAMPLE_RATE": "0"})
+    assert get_profiling_settings() is None
+    assert not any(middleware.cls is ProfilingMiddleware for middleware in app.user_middleware)
+
+    mocker.patch.dict("os.environ", {"PROFILE_DIR": "/tmp/profiles", "PROFILE_SECRET": "secret"})
+    assert get_profiling_settings() == {"directory": "/tmp/profiles", "secret": "secret", "sample_rate": 0.0}
+
+
+def test_profile_header_signature():
+    """
+    test only correctly signed, unexpired headers are accepted
+    """
+    expires_at = int(time.time()) + 60
+    header = sign_profile_request("secret", expires_at)
+    assert verify_profile_request(header, "secret") is True
+    assert verify_profile_request(header, "other-secret") is False
+    assert verify_profile_request(header, "secret", now=expires_at + 1) is False
+    assert verify_profile_request(f"{expires_at + 3600}.{header.split('.')[1]}", "secret") is False
+    assert verify_profile_request("garbage", "secret") is False
+
+
+def test_signed_requests_are_profiled(tmp_path):
+    """
+    test a request with a signed header is profiled and written with its route and timing
+    """
+    client = TestClient(ProfilingMiddleware(app, directory=str(tmp_path), secret="secret"))
+
+    response = client.get("/health")
+    assert "x-profile-id" not in response.headers
+    assert not os.listdir(tmp_path)
+
+    header = sign_profile_request("secret", int(time.time()) + 60)
+    response = client.get("/health", headers={"X-Debug-Profile": header})
+    profile_id = response.headers["x-profile-id"]
+    assert os.path.exists(tmp_path / f"{profile_id}.prof")
+
+    with open(tmp_path / f"{profile_id}.json", encoding="utf-8") as file:
+        metadata = json.load(file)
+    assert metadata["route"] == "/health"
+    assert metadata["status"] == 200
+    assert metadata["trigger"] == "header"
+    assert metadata["duration_ms"] > 0
+
+
+def test_sampled_requests_are_profiled(tmp_path):
+    """
+    test requests are profiled at the configured sample rate without a header
+    """
+    client = TestClient(ProfilingMiddleware(app, directory=str(tmp_path), sample_rate=1.0))
+    response = client.get("/health")
+    with open(tmp_path / f"{response.headers['x-profile-id']}.json", encoding="utf-8") as file:
+        assert json.load(file)["trigger"] == "sample"
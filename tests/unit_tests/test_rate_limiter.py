@@ -0,0 +1,101 @@
+"""
+rate limiter unit tests
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from routes.rate_limiter import TokenBucketLimiter, login_ip_limiter, login_username_limiter, \
+    signup_ip_limiter, signup_username_limiter
+
+client = TestClient(app)
+
+
+class FakeClock:
+    """
+    manually advanced clock
+    """
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def reset_limiters():
+    """
+    start every test with empty buckets
+    """
+    for limiter in (login_ip_limiter, login_username_limiter, signup_ip_limiter, signup_username_limiter):
+        limiter.reset()
+    yield
+    for limiter in (login_ip_limiter, login_username_limiter, signup_ip_limiter, signup_username_limiter):
+        limiter.reset()
+
+
+def test_token_bucket_limits_and_refills():
+    """
+    test a bucket allows its capacity, then rejects until tokens are refilled
+    """
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(capacity=2, period_seconds=10, clock=clock)
+
+    assert limiter.acquire("key") == 0
+    assert limiter.acquire("key") == 0
+    assert limiter.acquire("key") == pytest.approx(5)
+    assert limiter.acquire("other key") == 0
+
+    clock.now = 5
+    assert limiter.acquire("key") == 0
+
+
+def test_token_bucket_evicts_idle_and_excess_keys():
+    """
+    test idle buckets are dropped and the number of buckets is bounded
+    """
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(capacity=1, period_seconds=10, shards=1, max_keys_per_shard=3, clock=clock)
+
+    for key in range(5):
+        limiter.acquire(str(key))
+    assert len(limiter) == 3
+
+    clock.now = 10
+    limiter.acquire("new key")
+    assert len(limiter) == 1
+
+
+def test_login_rate_limited_before_database_access(mocker):
+    """
+    test login is rejected with Retry-After once the username bucket is empty
+    """
+    mock_user_exists = mocker.patch("routes.auth_route_v1.DatabaseRepository.user_exists", return_value=False)
+
+    for _ in range(int(login_username_limiter.capacity)):
+        response = client.post("/v1/login/", data={"username": "testuser", "password": "invalid"})
+        assert response.status_code == 401
+    mock_user_exists.reset_mock()
+
+    response = client.post("/v1/login/", data={"username": "TestUser", "password": "invalid"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    mock_user_exists.assert_not_called()
+
+
+def test_signup_rate_limited_before_hashing(mocker):
+    """
+    test signup is rejected with Retry-After once the client ip bucket is empty
+    """
+    mocker.patch("routes.users_route_v1.DatabaseRepository.user_exists", return_value=True)
+    mock_hash_password = mocker.patch("routes.users_route_v1.hash_password", return_value="hashed")
+
+    for index in range(int(signup_ip_limiter.capacity)):
+        response = client.post("/v1/users/", json={"username": f"user{index}", "password": "password123"})
+        assert response.status_code == 200
+    mock_hash_password.reset_mock()
+
+    response = client.post("/v1/users/", json={"username": "another", "password": "password123"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    mock_hash_password.assert_not_called()
@@ -0,0 +1,188 @@
+"""
+full-text search unit tests
+"""
+
+import asyncio
+import threading
+import time
+from unittest.mock import MagicMock, AsyncMock
+import pytest
+from fastapi.testclient import TestClient
+from api.main import app
+from data.database_repository import DatabaseRepository
+from data import search_index
+from data.search_index import SearchIndex
+from routes.search_route_v1 import get_search_index_refresher
+from usecase.refresh_search_index import RefreshSearchIndex
+
+client = TestClient(app)
+
+TABLE_ROWS = {
+    "experts": [
+        {"id": 1, "name": "Ada Lovelace", "bio": "Algorithmic fairness researcher"},
+        {"id": 2, "name": "Alan Turing", "bio": "Machine learning and algorithms"},
+    ],
+    "entities": [
+        {"id": 10, "name": "Fair Algorithms Foundation", "website_url": "https://example.org"},
+    ],
+    "Litigation": [
+        {"id": 20, "case_name": "People v. Algorithmic Hiring", "harm_and_risk_id": "h1"},
+    ],
+}
+
+
+@pytest.fixture
+def mock_database_repository():
+    """
+    Mock DatabaseRepository returning the rows of the indexed tables
+    """
+    mock_repo = MagicMock(spec=DatabaseRepository)
+    mock_repo.get_all_rows = AsyncMock(side_effect=lambda table: [dict(row) for row in TABLE_ROWS[table]])
+    return mock_repo
+
+
+@pytest.fixture
+def refresher(mock_database_repository):
+    """
+    search index refresher backed by the mocked repository
+    """
+    refresher = RefreshSearchIndex(lambda: mock_database_repository, SearchIndex())
+    app.dependency_overrides[get_search_index_refresher] = lambda: refresher
+    yield refresher
+    app.dependency_overrides.pop(get_search_index_refresher)
+
+
+def test_search_ranks_exact_and_prefix_matches():
+    """
+    test every query term must match, exact matches rank above prefix matches
+    """
+    index = SearchIndex()
+    index.upsert("expert", {"id": 1, "name": "Ada Lovelace", "bio": "algorithm auditing"})
+    index.upsert("expert", {"id": 2, "name": "Alan Turing", "bio": "algorithmic decision making"})
+    index.upsert("expert", {"id": 3, "name": "Grace Hopper", "bio": "compilers"})
+
+    total, results = index.search("algorithm")
+    assert total == 2
+    assert [result["id"] for result in results] == ["1", "2"]
+
+    total, results = index.search("alg tur")
+    assert total == 1
+    assert results[0]["id"] == "2"
+
+    assert index.search("nothing matches") == (0, [])
+
+
+def test_search_index_syncs_incrementally():
+    """
+    test syncing only re-indexes changed rows and removes missing ones
+    """
+    index = SearchIndex()
+    assert index.sync("expert", [{"id": 1, "name": "Ada"}, {"id": 2, "name": "Alan"}]) == (2, 0)
+    assert index.sync("expert", [{"id": 1, "name": "Ada"}, {"id": 2, "name": "Alan Turing"}]) == (1, 0)
+    assert index.sync("expert", [{"id": 2, "name": "Alan Turing"}]) == (0, 1)
+
+    assert index.search("ada") == (0, [])
+    assert index.search("turing")[0] == 1
+    assert len(index) == 1
+
+
+def test_search_is_not_blocked_while_a_sync_tokenizes(mocker):
+    """
+    test searches from other threads can run while a sync prepares its documents
+    """
+    index = SearchIndex()
+    index.upsert("expert", {"id": 1, "name": "Ada Lovelace"})
+    searches = []
+
+    def tokenize_while_searching(text):
+        # the search tokenizes its query too, only the tokenizing of the sync starts a search
+        if threading.current_thread() is threading.main_thread():
+            searcher = threading.Thread(target=lambda: searches.append(index.search("ada")))
+            searcher.start()
+            searcher.join(timeout=1)
+        return search_index.TOKEN_PATTERN.findall(text.casefold())
+
+    mocker.patch("data.search_index.tokenize", side_effect=tokenize_while_searching)
+    mocker.patch("data.search_index.SYNC_BATCH_SIZE", 1)
+    assert index.sync("expert", [{"id": 2, "name": "Alan"}, {"id": 3, "name": "Grace"}]) == (2, 1)
+    assert len(searches) == 2 and searches[0][0] == 1
+
+
+def test_search_latency():
+    """
+    test queries stay in single-digit milliseconds on a sizeable index
+    """
+    index = SearchIndex()
+    words = [f"word{number}" for number in range(2000)]
+    for doc_id in range(10000):
+        text = " ".join(words[(doc_id * 7 + offset) % len(words)] for offset in range(20))
+        index.upsert("expert", {"id": doc_id, "name": f"Expert {doc_id}", "bio": text})
+
+    index.search("word1")
+    start = time.perf_counter()
+    for query in ("word12", "expert word1", "word199 word200", "expert 1234"):
+        assert index.search(query)[0] > 0
+    assert (time.perf_counter() - start) / 4 < 0.01
+
+
+def test_search_route_hides_litigations_from_anonymous_users(refresher):
+    """
+    test anonymous searches include experts and nonprofits but not litigations
+    """
+    response = client.get("/v1/search/?q=algorithm")
+    assert response.status_code == 200
+    body = response.json()
+    assert {result["type"] for result in body["data"]} == {"expert", "nonprofit"}
+    assert body["total"] == 3
+    assert refresher.refreshed_at is not None
+
+
+def test_search_route_filters_types_and_pages(refresher, mocker):
+    """
+    test authenticated searches can filter by type and page through results
+    """
+    mocker.patch("routes.search_route_v1.verify_access_token", return_value={"sub": "testuser"})
+    mocker.patch("routes.middleware.verify_access_token", return_value={"sub": "testuser"})
+
+    response = client.get("/v1/search/?q=algo&types=litigation", headers={"Authorization": "Bearer token"})
+    assert [result["id"] for result in response.json()["data"]] == ["20"]
+
+    response = client.get("/v1/search/?q=algo&types=expert&page_size=1", headers={"Authorization": "Bearer token"})
+    assert response.json()["total"] == 2
+    assert response.json()["has_next"] is True
+    assert len(response.json()["data"]) == 1
+
+
+async def test_background_refresh_survives_failures(mock_database_repository):
+    """
+    test a failing refresh is logged and the background loop keeps refreshing
+    """
+    rows = [dict(row) for row in TABLE_ROWS["experts"]]
+    mock_database_repository.get_all_rows = AsyncMock(side_effect=[RuntimeError("database down"), rows, [], []])
+    refresher = RefreshSearchIndex(lambda: mock_database_repository, SearchIndex(), interval_seconds=0)
+
+    refresher.start()
+    while refresher.refreshed_at is None:
+        await asyncio.sleep(0.001)
+    await refresher.stop()
+
+    assert mock_database_repository.get_all_rows.call_count >= 2
+    assert refresher.index.search("ada")[0] == 1
+
+
+async def test_concurrent_cold_searches_build_the_index_once(mock_database_repository):
+    """
+    test searches that arrive while the index is being built wait for that build instead of rebuilding it
+    """
+    async def slow_rows(table):
+        await asyncio.sleep(0.01)
+        return [dict(row) for row in TABLE_ROWS[table]]
+    mock_database_repository.get_all_rows = AsyncMock(side_effect=slow_rows)
+    refresher = RefreshSearchIndex(lambda: mock_database_repository, SearchIndex())
+
+    await asyncio.gather(*(refresher.ensure_fresh() for _ in range(20)))
+    assert mock_database_repository.get_all_rows.call_count == len(TABLE_ROWS)
+
+    # the first refresh runs, the callers that asked while it was reading share a single follow-up refresh
+    await asyncio.gather(*(refresher.execute() for _ in range(20)))
+    assert mock_database_repository.get_all_rows.call_count == 3 * len(TABLE_ROWS)
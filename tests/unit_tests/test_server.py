@@ -0,0 +1,76 @@
+"""
+production server unit tests
+"""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import httpx
+from fastapi.testclient import TestClient
+from api.main import app
+from api.server import get_worker_count
+
+client = TestClient(app)
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_free_port() -> int:
+    """
+    find a free local port
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_get_worker_count(mocker):
+    """
+    test the worker count defaults to the number of cores
+    """
+    mocker.patch.dict("os.environ", {"WEB_CONCURRENCY": "3"})
+    assert get_worker_count() == 3
+
+    mocker.patch.dict("os.environ", {"WEB_CONCURRENCY": ""})
+    assert get_worker_count() == (os.cpu_count() or 1)
+
+
+def test_health_route():
+    """
+    test the health endpoint reports the worker that served it
+    """
+    response = client.get("/health")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ok"
+    assert response.json()["pid"] == os.getpid()
+
+
+def test_server_runs_workers_and_shuts_down_gracefully():
+    """
+    test the server forks the configured workers and exits cleanly on SIGTERM
+    """
+    port = get_free_port()
+    env = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port), "WEB_CONCURRENCY": "2",
+           "BCRYPT_ROUNDS": "4", "GRACEFUL_SHUTDOWN_SECONDS": "2"}
+    server = subprocess.Popen([sys.executable, "-m", "api.server"], cwd=ROOT_DIRECTORY, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        worker_ids = set()
+        deadline = time.monotonic() + 20
+        while len(worker_ids) < 2 and time.monotonic() < deadline:
+            try:
+                # a new connection per request lets the kernel spread them over the workers
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+                worker_ids.add(response.json()["worker_id"])
+            except httpx.TransportError:
+                time.sleep(0.1)
+        assert worker_ids == {"0", "1"}
+
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(timeout=15) == 0
+    finally:
+        if server.poll() is None:
+            server.kill()
@@ -0,0 +1,197 @@
+"""
+refresh token and token revocation unit tests
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from api.main import app
+from routes import token_revocation
+from routes.auth_route_v1 import create_access_token, create_refresh_token, get_database_repository, \
+    verify_access_token
+from routes.token_revocation import REVOCATION_SYNC_OVERLAP, BloomFilter, RevocationList, RevocationListSync
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def token_settings(mocker):
+    """
+    mock token environment variables and start with an empty revocation list
+    """
+    mocker.patch.dict("os.environ", {
+        "SECRET_KEY": "testsecret", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MILLISECONDS": "60000"})
+    revocation_list = RevocationList(capacity=100)
+    mocker.patch("routes.auth_route_v1.revocation_list", revocation_list)
+    mocker.patch("routes.token_revocation.revocation_list", revocation_list)
+
+
+@pytest.fixture
+def mock_repository(mocker):
+    """
+    mock the database operations used by the refresh and revoke endpoints
+    """
+    mocker.patch("routes.auth_route_v1.DatabaseRepository.user_exists", return_value=True)
+    return mocker.patch("routes.auth_route_v1.DatabaseRepository.insert_revoked_token",
+                        side_effect=lambda jti, expires_at: [{"jti": jti, "expires_at": expires_at}])
+
+
+def test_bloom_filter_has_no_false_negatives():
+    """
+    test every added item is reported as contained
+    """
+    bloom_filter = BloomFilter(capacity=1000)
+    items = [f"token-{index}" for index in range(1000)]
+    for item in items:
+        bloom_filter.add(item)
+
+    assert all(item in bloom_filter for item in items)
+    false_positives = sum(f"other-{index}" in bloom_filter for index in range(10000))
+    assert false_positives < 100
+
+
+def test_revocation_list_merges_and_drops_expired():
+    """
+    test revoked ids are merged from database rows and expired ids are dropped
+    """
+    revocation_list = RevocationList(capacity=2)
+    now = datetime.now(timezone.utc)
+    revocation_list.add("local", now + timedelta(minutes=5))
+    revocation_list.merge([
+        {"jti": "remote", "expires_at": (now + timedelta(minutes=5)).isoformat()},
+        {"jti": "expired", "expires_at": (now - timedelta(minutes=5)).isoformat()},
+    ])
+
+    assert revocation_list.is_revoked("local")
+    assert revocation_list.is_revoked("remote")
+    assert not revocation_list.is_revoked("expired")
+    assert not revocation_list.is_revoked("unknown")
+
+    for index in range(5):
+        revocation_list.add(f"more-{index}", now + timedelta(minutes=5))
+    assert len(revocation_list) == 7
+    assert revocation_list.is_revoked("more-4")
+
+
+@pytest.mark.asyncio
+async def test_verify_access_token_rejects_refresh_token():
+    """
+    test a refresh token cannot be used as an access token
+    """
+    refresh_token = create_refresh_token({"sub": "testuser"})
+
+    with pytest.raises(HTTPException) as excinfo:
+        await verify_access_token(refresh_token)
+    assert excinfo.value.status_code == 401
+
+
+def test_refresh_rotates_tokens(mock_repository):
+    """
+    test a refresh token is exchanged for new tokens exactly once
+    """
+    refresh_token = create_refresh_token({"sub": "testuser"})
+
+    response = client.post("/v1/login/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 200
+    assert response.json()["refresh_token"] != refresh_token
+    mock_repository.assert_called_once()
+
+    response = client.post("/v1/login/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+def test_revoke_access_token(mock_repository):
+    """
+    test a revoked access token is rejected without a database lookup
+    """
+    access_token = create_access_token({"sub": "testuser"})
+    headers = {"Authorization": f"Bearer {access_token}"}
+
+    response = client.post("/v1/login/revoke", headers=headers)
+    assert response.status_code == 200
+    mock_repository.assert_called_once()
+
+    response = client.get("/v1/litigations/", headers=headers)
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Could not validate credentials"}
+
+
+def test_revoke_fails_when_the_revocation_is_not_persisted(mock_repository):
+    """
+    test a revocation that only took effect on this worker is answered with an error
+    """
+    mock_repository.side_effect = lambda jti, expires_at: None
+    refresh_token = create_refresh_token({"sub": "testuser"})
+
+    response = client.post("/v1/login/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 500
+
+    access_token = create_access_token({"sub": "testuser"})
+    response = client.post("/v1/login/revoke", headers={"Authorization": f"Bearer {access_token}"})
+    assert response.status_code == 500
+
+
+async def test_sync_reads_only_new_revocations_and_survives_failures():
+    """
+    test each sync asks for the tokens revoked since the latest one seen, and a failed sync is retried
+    """
+    now = datetime.now(timezone.utc)
+    repository = AsyncMock()
+    repository.get_revoked_tokens.side_effect = [
+        [{"jti": "first", "expires_at": (now + timedelta(minutes=5)).isoformat(), "revoked_at": now.isoformat()}],
+        RuntimeError("database down"),
+        [],
+    ]
+    sync = RevocationListSync(lambda: repository, interval_seconds=0)
+
+    sync.start()
+    while repository.get_revoked_tokens.call_count < 3:
+        await asyncio.sleep(0.001)
+    await sync.stop()
+
+    calls = repository.get_revoked_tokens.call_args_list
+    assert calls[0].args == (None,)
+    assert calls[2].args == ((now - REVOCATION_SYNC_OVERLAP).isoformat(),)
+    assert token_revocation.revocation_list.is_revoked("first")
+
+
+class SharedRevokedTokens:
+    """
+    revoked_tokens table shared by several workers, with the unique constraint on jti
+    """
+    def __init__(self):
+        self.rows = {}
+
+    async def user_exists(self, value: str):
+        return True
+
+    async def insert_revoked_token(self, jti: str, expires_at: str):
+        if jti in self.rows:
+            return []
+        self.rows[jti] = {"jti": jti, "expires_at": expires_at}
+        return [self.rows[jti]]
+
+
+def test_refresh_token_is_consumed_once_across_workers(mocker):
+    """
+    test a refresh token replayed on a worker that has not synced the revocation yet is rejected
+    """
+    repository = SharedRevokedTokens()
+    workers = [RevocationList(capacity=100), RevocationList(capacity=100)]
+    refresh_token = create_refresh_token({"sub": "testuser"})
+    app.dependency_overrides[get_database_repository] = lambda: repository
+    try:
+        responses = []
+        for worker in workers:
+            mocker.patch("routes.auth_route_v1.revocation_list", worker)
+            mocker.patch("routes.token_revocation.revocation_list", worker)
+            responses.append(client.post("/v1/login/refresh", json={"refresh_token": refresh_token}))
+    finally:
+        app.dependency_overrides.pop(get_database_repository)
+
+    assert [response.status_code for response in responses] == [200, 401]
+    assert len(repository.rows) == 1
+    assert all(len(worker) == 1 for worker in workers)
@@ -0,0 +1,105 @@
+"""
+warm-up and readiness unit tests
+"""
+
+import asyncio
+from fastapi.testclient import TestClient
+from api.main import app
+from data.page_prefetcher import page_prefetcher
+from routes.ready_route import get_worker_warm_up, warm_up_list
+from usecase.warm_up import WarmUp
+
+client = TestClient(app)
+
+
+async def test_phases_run_in_order_and_steps_concurrently():
+    """
+    test a phase starts after the previous one and its steps run concurrently
+    """
+    events = []
+
+    def step(name: str, seconds: float = 0):
+        async def run():
+            events.append(f"{name} started")
+            await asyncio.sleep(seconds)
+            events.append(f"{name} done")
+        return run
+
+    warm_up = WarmUp([{"a": step("a", 0.02), "b": step("b")}, {"c": step("c")}], timeout_seconds=1)
+    assert warm_up.ready
+    warm_up.start()
+    await asyncio.sleep(0)
+    assert not warm_up.ready
+    await warm_up._task  # pylint: disable=protected-access
+
+    assert events == ["a started", "b started", "b done", "a done", "c started", "c done"]
+    assert warm_up.ready
+    assert warm_up.results == {"a": "ok", "b": "ok", "c": "ok"}
+
+
+async def test_failed_and_slow_steps_do_not_block_readiness():
+    """
+    test the worker becomes ready when steps fail or run past the timeout
+    """
+    async def fail():
+        raise RuntimeError("upstream down")
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    warm_up = WarmUp([{"fails": fail, "hangs": hang}, {"never_runs": fail}], timeout_seconds=0.05)
+    await warm_up.execute()
+
+    assert warm_up.ready
+    assert warm_up.results == {"fails": "failed", "hangs": "timed out", "never_runs": "timed out"}
+
+
+async def test_list_warm_up_fills_the_count_and_page_caches(mocker):
+    """
+    test warming a list counts its rows and keeps the first page for prefetching
+    """
+    mock_count = mocker.patch("routes.ready_route.DatabaseRepository.count_rows", return_value=30)
+    mocker.patch("routes.ready_route.DatabaseRepository.get_experts", return_value=[{"id": "1"}])
+    mocker.patch.object(page_prefetcher, "enabled", True)
+    page_prefetcher.invalidate()
+
+    await warm_up_list("experts")
+
+    mock_count.assert_called_once_with("experts")
+    assert page_prefetcher.pages.get(("experts", 1, 10)) == [{"id": "1"}]
+    page_prefetcher.invalidate()
+
+
+async def test_list_warm_up_only_counts_without_prefetching(mocker):
+    """
+    test the first page is not read when no route would read it from the cache
+    """
+    mock_count = mocker.patch("routes.ready_route.DatabaseRepository.count_rows", return_value=30)
+    mock_get_experts = mocker.patch("routes.ready_route.DatabaseRepository.get_experts")
+    mocker.patch.object(page_prefetcher, "enabled", False)
+
+    await warm_up_list("experts")
+
+    mock_count.assert_called_once_with("experts")
+    mock_get_experts.assert_not_called()
+
+
+def test_ready_route_reports_503_until_warm():
+    """
+    test the readiness check fails while the warm-up is running
+    """
+    warm_up = WarmUp([], timeout_seconds=1)
+    app.dependency_overrides[get_worker_warm_up] = lambda: warm_up
+    try:
+        warm_up.started_at = 1.0
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+
+        warm_up.finished_at = 2.0
+        warm_up.results = {"database": "ok"}
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["steps"] == {"database": "ok"}
+    finally:
+        app.dependency_overrides.pop(get_worker_warm_up)
@@ -0,0 +1,95 @@
+"""
+response serialization benchmark.
+Compares JSON, as rendered by the API, with MessagePack for the homepage tree: payload size, gzipped size,
+encode time and decode time. Uses a synthetic homepage unless a homepage snapshot file is given.
+
+usage: python -m tools.bench_serialization [--snapshot PATH] [--subfactors N] [--iterations N]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import timeit
+from fastapi.responses import JSONResponse
+from data.homepage_snapshot import HomepageSnapshotReader
+from routes.content_negotiation import encode_msgpack, load_msgpack
+
+
+def build_homepage(subfactors: int, seed: int = 0) -> dict:
+    """
+    build a synthetic homepage tree shaped like the real one
+    :param subfactors: the number of structural subfactors, each with a few harms and risks
+    """
+    rng = random.Random(seed)
+
+    def text(words: int) -> str:
+        return " ".join(rng.choice(("ai", "safety", "policy", "risk", "model", "harm", "data", "bias", "audit",
+                                    "privacy", "labor", "climate", "access", "governance")) for _ in range(words))
+
+    def item(item_id: int) -> dict:
+        return {"id": item_id, "name": text(3), "description": text(30), "url": f"https://example.org/{item_id}",
+                "created_at": "2024-05-01T10:00:00+00:00", "harm_and_risk_id": rng.randint(1, 1000)}
+
+    return {"subfactors": [
+        {
+            "id": subfactor_id, "name": text(3), "description": text(40),
+            "harms_and_risks": [
+                {"id": subfactor_id * 10 + harm_id, "name": text(4), "description": text(25),
+                 **{key: [item(rng.randint(1, 10_000)) for _ in range(rng.randint(1, 6))]
+                    for key in ("experts", "nonprofits", "litigations", "policies", "resources")}}
+                for harm_id in range(rng.randint(2, 5))
+            ],
+        }
+        for subfactor_id in range(subfactors)
+    ]}
+
+
+def benchmark(content, iterations: int) -> list[tuple[str, int, int, float, float]]:
+    """
+    measure every format
+    :return: list of (format, bytes, gzipped bytes, encode ms, decode ms)
+    """
+    msgpack = load_msgpack()
+    formats = [("json", JSONResponse(None).render, json.loads)]
+    if msgpack is not None:
+        formats.append(("msgpack", encode_msgpack, msgpack.unpackb))
+
+    results = []
+    for name, encode, decode in formats:
+        body = encode(content)
+        encode_ms = min(timeit.repeat(lambda: encode(content), number=iterations, repeat=3)) / iterations * 1000
+        decode_ms = min(timeit.repeat(lambda: decode(body), number=iterations, repeat=3)) / iterations * 1000
+        results.append((name, len(body), len(gzip.compress(body)), encode_ms, decode_ms))
+    return results
+
+
+def main():
+    """
+    print the serialization benchmark
+    """
+    parser = argparse.ArgumentParser(description="compare JSON and MessagePack responses")
+    parser.add_argument("--snapshot", help="homepage snapshot file to use instead of synthetic data")
+    parser.add_argument("--subfactors", type=int, default=40, help="number of synthetic subfactors")
+    parser.add_argument("--iterations", type=int, default=50, help="encodes and decodes per measurement")
+    args = parser.parse_args()
+
+    if args.snapshot:
+        # the payload follows a binary header, only the JSON body is decoded
+        payload = HomepageSnapshotReader(args.snapshot).read()
+        if payload is None:
+            parser.error(f"{args.snapshot} is not a valid homepage snapshot")
+        content = json.loads(bytes(payload))
+    else:
+        content = build_homepage(args.subfactors)
+
+    results = benchmark(content, args.iterations)
+    print(f"{'format':<8} {'bytes':>10} {'gzipped':>10} {'encode ms':>10} {'decode ms':>10}")
+    for name, size, gzipped, encode_ms, decode_ms in results:
+        print(f"{name:<8} {size:>10} {gzipped:>10} {encode_ms:>10.3f} {decode_ms:>10.3f}")
+    if len(results) == 1:
+        print("msgpack is not installed, only JSON was measured")
+
+
+if __name__ == "__main__":
+    main()
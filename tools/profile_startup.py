@@ -0,0 +1,81 @@
+"""
+cold start import-time profile.
+Imports the app in a fresh interpreter with `-X importtime` and prints the slowest imports.
+
+usage: python -m tools.profile_startup [--top N]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APP_MODULE = "api.main"
+
+# modules that must only be imported on first use, not while the app module is imported
+DEFERRED_MODULES = ("supabase", "postgrest", "gotrue", "realtime", "storage3", "httpx", "msgpack")
+
+MEASURE_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import {APP_MODULE}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"seconds": elapsed, "modules": sorted(sys.modules)}}))
+"""
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_cold_start(importtime: bool = False) -> tuple[float, list[str], str]:
+    """
+    import the app in a fresh interpreter
+    :param importtime: whether to collect the `-X importtime` report
+    :return: the import duration in seconds, the loaded module names and the raw importtime report
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", MEASURE_SCRIPT]
+    result = subprocess.run(command, cwd=ROOT_DIRECTORY, capture_output=True, text=True, check=True)
+    measurement = json.loads(result.stdout.strip().splitlines()[-1])
+    return measurement["seconds"], measurement["modules"], result.stderr
+
+
+def parse_importtime(report: str) -> list[tuple[str, int, int]]:
+    """
+    parse an importtime report
+    :return: list of (module, self microseconds, cumulative microseconds)
+    """
+    entries = []
+    for line in report.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        entries.append((module.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def main():
+    """
+    print the cold start profile
+    """
+    parser = argparse.ArgumentParser(description="profile the app cold start")
+    parser.add_argument("--top", type=int, default=20, help="number of imports to show")
+    args = parser.parse_args()
+
+    seconds, modules, report = measure_cold_start(importtime=True)
+    entries = sorted(parse_importtime(report), key=lambda entry: entry[2], reverse=True)
+
+    print(f"import {APP_MODULE}: {seconds * 1000:.1f} ms, {len(modules)} modules")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for module, self_us, cumulative_us in entries[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {module}")
+
+    eager = [module for module in DEFERRED_MODULES if module in modules]
+    if eager:
+        print(f"warning: deferred modules imported eagerly: {', '.join(eager)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,9 @@
 Use case for fetching homepage data including structural subfactors and their associated harms and risks.
 Each harm and risk holds a list of nonprofits, experts, litigations, policies and resources.
 """
+import asyncio
+from collections import defaultdict
+from data.bulkhead import BulkheadFullError
 from model.home_v1 import HomePageData
 
 class GetHomePageData:
@@ -15,13 +18,54 @@ class GetHomePageData:
         """
         try:
             subfactors = await self.repository.get_homepage_data()
-
-            # TODO: fetch experts, litigations, policies and resources for each harm and risk and add each of them as objects/keys to harms and risks object
-            # harm_and_risk["litigations"] = self.repository.get_litigations_by_harm_and_risk_id(harm_and_risk["id"])
-            # harm_and_risk["policies"] = self.repository.get_policies_by_harm_and_risk_id(harm_and_risk["id"])
-            # harm_and_risk["resources"] = self.repository.get_resources_by_harm_and_risk_id(harm_and_risk["id"])
+            if subfactors:
+                await self.attach_related_items(subfactors)
 
             return HomePageData(subfactors=subfactors)
+        except BulkheadFullError:
+            raise
         except Exception as e:
             print(f"Error fetching home page data: {e}")
             return {"message": "Error fetching home page data"}
+
+    async def attach_related_items(self, subfactors: list[dict]):
+        """
+        Attach litigations, policies and resources to every harm and risk of the given subfactors.
+        Each collection is fetched with one query for all harms and risks and the three queries run
+        concurrently, so the number of upstream calls does not depend on the number of subfactors.
+        A collection that could not be read fails the whole build, rather than showing up as empty lists.
+        """
+        harms_and_risks = [
+            harm_and_risk
+            for subfactor in subfactors
+            for harm_and_risk in subfactor.get("harms_and_risks") or []
+        ]
+        harm_and_risk_ids = list({harm_and_risk["id"] for harm_and_risk in harms_and_risks})
+        if not harm_and_risk_ids:
+            return
+
+        litigations, policies, resources = await asyncio.gather(
+            self.repository.get_litigations_by_harm_and_risk_ids(harm_and_risk_ids),
+            self.repository.get_policies_by_harm_and_risk_ids(harm_and_risk_ids),
+            self.repository.get_resources_by_harm_and_risk_ids(harm_and_risk_ids),
+        )
+
+        collections = {"litigations": litigations, "policies": policies, "resources": resources}
+        failed = [key for key, items in collections.items() if items is None]
+        if failed:
+            raise RuntimeError(f"the {', '.join(failed)} of the homepage could not be read")
+
+        related_items = {key: group_by_harm_and_risk_id(items) for key, items in collections.items()}
+        for harm_and_risk in harms_and_risks:
+            for key, items_by_id in related_items.items():
+                harm_and_risk[key] = items_by_id.get(harm_and_risk["id"], [])
+
+
+def group_by_harm_and_risk_id(items: list[dict]) -> dict:
+    """
+    group the rows of a related collection by their harm and risk id
+    """
+    grouped = defaultdict(list)
+    for item in items:
+        grouped[item["harm_and_risk_id"]].append(item)
+    return grouped
@@ -0,0 +1,142 @@
+"""
+Use case for delta syncing the experts and nonprofits lists.
+Inserted and updated rows are found through their updated_at column, deleted rows through the tombstones
+table. The version token holds, per table, the keyset position of the last changed row and of the last
+tombstone already sent, so a client that is up to date receives an empty payload. Version "0" starts from
+the beginning and returns every row.
+Positions only move forward: a write whose transaction commits after a later write has already been
+synced is missed, because its updated_at lies behind the position. Clients resync from "0" now and then.
+"""
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from data.database_repository import keyset_position
+from model.changes_v1 import Changes
+
+INITIAL_VERSION = "0"
+# list -> tables whose changes make up the changes of the list
+LIST_TABLES = {"experts": ("experts",), "nonprofits": ("nonprofits", "entities")}
+
+
+class InvalidVersionError(ValueError):
+    """raised for a version token that was not issued by this api"""
+
+
+def encode_version(cursors: dict) -> str:
+    """
+    encode the keyset positions of every table into an opaque version token
+    """
+    return base64.urlsafe_b64encode(json.dumps(cursors, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def version_at(list_name: str, changed_at: datetime) -> str:
+    """
+    get a version of a list from which on only the rows changed or deleted since a point in time are returned
+    """
+    position = [changed_at.isoformat(), None]
+    return encode_version({table: {"updated": position, "deleted": position} for table in LIST_TABLES[list_name]})
+
+
+def decode_version(version: str) -> dict:
+    """
+    decode a version token into the keyset positions of every table
+    :raise InvalidVersionError: if the token is not a valid version
+    """
+    if version == INITIAL_VERSION:
+        return {}
+    try:
+        cursors = json.loads(base64.urlsafe_b64decode(version + "=" * (-len(version) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise InvalidVersionError(version) from e
+    if not isinstance(cursors, dict) or not all(isinstance(cursor, dict) for cursor in cursors.values()):
+        raise InvalidVersionError(version)
+    for cursor in cursors.values():
+        if not set(cursor) <= {"updated", "deleted"}:
+            raise InvalidVersionError(version)
+        try:
+            for position in cursor.values():
+                keyset_position(position)
+        except ValueError as e:
+            raise InvalidVersionError(version) from e
+    return cursors
+
+
+class GetListChanges:
+    """Use case for getting the changes of a list since a version."""
+    def __init__(self, repository, limit: int | None = None):
+        self.repository = repository
+        self.limit = limit if limit is not None else int(os.environ.get("DELTA_SYNC_MAX_ROWS", "500"))
+
+    async def execute(self, list_name: str, version: str) -> Changes:
+        """
+        Get the rows of a list inserted, updated or deleted since a version.
+        :param list_name: experts or nonprofits
+        :param version: a version returned by a previous call, or "0" for every row
+        :return: the changed rows, the ids of the deleted rows and the version to continue from.
+            has_more is set when only part of the changes fit into the response.
+        """
+        cursors = decode_version(version)
+        if list_name == "experts":
+            rows, tombstones, has_more = await self._table_changes("experts", cursors)
+            data = rows
+            deleted = [tombstone["row_id"] for tombstone in tombstones]
+        else:
+            data, deleted, has_more = await self._nonprofit_changes(cursors)
+        return Changes(
+            data=data,
+            deleted=[str(row_id) for row_id in deleted],
+            version=encode_version(cursors),
+            has_more=has_more,
+        )
+
+    async def _nonprofit_changes(self, cursors: dict) -> tuple[list, list, bool]:
+        """
+        the nonprofits list holds the entities of the nonprofits, so it changes with both tables
+        """
+        nonprofits, nonprofit_tombstones, nonprofits_have_more = await self._table_changes("nonprofits", cursors)
+        entities, entity_tombstones, entities_have_more = await self._table_changes("entities", cursors)
+
+        changed = {}
+        if nonprofits:
+            for entity in await self.repository.get_nonprofits_by_ids([row["id"] for row in nonprofits]) or []:
+                changed[entity["id"]] = entity
+        if entities:
+            # only entities that belong to a nonprofit are part of the list
+            owners = await self.repository.get_nonprofits_by_entity_ids([row["id"] for row in entities])
+            if owners is None:
+                raise RuntimeError("the nonprofits of the changed entities could not be read")
+            owned = {str(owner["entity_id"]) for owner in owners}
+            for entity in entities:
+                if str(entity["id"]) in owned:
+                    changed[entity["id"]] = entity
+
+        deleted = [tombstone["row_id"] for tombstone in entity_tombstones]
+        deleted += [
+            tombstone["data"]["entity_id"] for tombstone in nonprofit_tombstones
+            if isinstance(tombstone.get("data"), dict) and tombstone["data"].get("entity_id") is not None
+        ]
+        return list(changed.values()), deleted, nonprofits_have_more or entities_have_more
+
+    async def _table_changes(self, table: str, cursors: dict) -> tuple[list, list, bool]:
+        """
+        get the rows and tombstones of a table after its keyset positions and advance the positions
+        """
+        cursor = cursors.setdefault(table, {})
+        rows = await self.repository.get_rows_changed_after(table, "updated_at", cursor.get("updated"), self.limit + 1)
+        # a client starting from the beginning never had the rows deleted before now
+        tombstones = [] if "updated" not in cursor else await self.repository.get_rows_changed_after(
+            "tombstones", "deleted_at", cursor.get("deleted"), self.limit + 1, id_column="row_id", table_name=table)
+        if rows is None or tombstones is None:
+            raise RuntimeError(f"the changes of {table} could not be read")
+
+        has_more = len(rows) > self.limit or len(tombstones) > self.limit
+        rows, tombstones = rows[:self.limit], tombstones[:self.limit]
+        if rows:
+            if "updated" not in cursor:
+                cursor["deleted"] = [rows[-1]["updated_at"], None]
+            cursor["updated"] = [rows[-1]["updated_at"], rows[-1]["id"]]
+        if tombstones:
+            cursor["deleted"] = [tombstones[-1]["deleted_at"], tombstones[-1]["row_id"]]
+        return rows, tombstones, has_more
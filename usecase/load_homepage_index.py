@@ -0,0 +1,70 @@
+"""
+Use case for keeping the homepage facet index in line with the homepage data.
+The index is rebuilt from the materialized homepage snapshot when its version changes, or from the
+database once the cached index is older than its time to live when snapshots are disabled.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from data.bulkhead import BulkheadFullError
+from data.homepage_index import HomepageIndex
+from model.home_v1 import HomePageData
+from usecase.get_homepage_data import GetHomePageData
+
+
+class LoadHomepageIndex:
+    """Use case for getting the current homepage facet index."""
+    def __init__(self, repository_factory, snapshot_reader_factory=None, ttl_seconds: float | None = None):
+        self.repository_factory = repository_factory
+        self.snapshot_reader_factory = snapshot_reader_factory
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(
+            os.environ.get("HOMEPAGE_INDEX_TTL_SECONDS", "60"))
+        self.index = None
+        self._loaded_at = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self) -> HomepageIndex | None:
+        """
+        Get the facet index, rebuilding it when the homepage data has a new version.
+        A failed rebuild keeps serving the previous index.
+        :return: the index, or None if the homepage data was never loaded
+        """
+        snapshot = self.snapshot_reader_factory() if self.snapshot_reader_factory else None
+        if snapshot is not None:
+            payload = snapshot.read()
+            if payload is not None:
+                if self.index is None or self.index.version != snapshot.version:
+                    subfactors = json.loads(bytes(payload))["subfactors"]
+                    self.index = await asyncio.to_thread(HomepageIndex, subfactors, snapshot.version)
+                return self.index
+
+        if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+            return self.index
+
+        async with self._lock:
+            # another request may have rebuilt the index while this one was waiting
+            if self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_seconds:
+                return self.index
+            try:
+                data = await GetHomePageData(repository=self.repository_factory()).execute()
+                if isinstance(data, HomePageData) and data.subfactors is not None:
+                    payload = data.model_dump_json().encode()
+                    version = hashlib.sha256(payload).hexdigest()
+                    if self.index is None or self.index.version != version:
+                        self.index = await asyncio.to_thread(HomepageIndex, data.subfactors, version)
+                    self._loaded_at = time.monotonic()
+            except BulkheadFullError:
+                # a stale index is still better than no answer
+                if self.index is None:
+                    raise
+            except Exception as e:  # pylint: disable=broad-except
+                print(f"Error loading homepage index: {e}")
+            return self.index
+
+    def invalidate(self):
+        """
+        rebuild the index from the database on next use, before its time to live has passed
+        """
+        self._loaded_at = None
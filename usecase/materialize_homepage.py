@@ -0,0 +1,70 @@
+"""
+Use case for periodically materializing the full homepage payload into a local snapshot file,
+so that the homepage can be served without reaching the database.
+"""
+import asyncio
+import hashlib
+import os
+from data.homepage_snapshot import write_snapshot
+from model.home_v1 import HomePageData
+from usecase.get_homepage_data import GetHomePageData
+
+
+class MaterializeHomePage:
+    """Use case for building the homepage payload and writing it to a versioned snapshot file."""
+    def __init__(self, repository_factory, path: str, interval_seconds: float | None = None):
+        self.repository_factory = repository_factory
+        self.path = path
+        self.interval_seconds = interval_seconds if interval_seconds is not None else float(
+            os.environ.get("HOMEPAGE_SNAPSHOT_INTERVAL_SECONDS", "60"))
+        self._digest = None
+        self._task = None
+
+    async def execute(self):
+        """
+        Build the homepage payload and write a new snapshot if it changed.
+        Failed builds never replace the last good snapshot: a snapshot is only written when every query
+        behind the payload succeeded, since GetHomePageData fails the build when any of them does.
+        :return: the written snapshot version, or None if nothing was written
+        """
+        try:
+            data = await GetHomePageData(repository=self.repository_factory()).execute()
+            if not isinstance(data, HomePageData) or data.subfactors is None:
+                print("Error materializing homepage snapshot: no homepage data")
+                return None
+
+            payload = data.model_dump_json().encode()
+            digest = hashlib.sha256(payload).digest()
+            if digest == self._digest:
+                return None
+
+            version = await asyncio.to_thread(write_snapshot, self.path, payload)
+            self._digest = digest
+            return version
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error materializing homepage snapshot: {e}")
+            return None
+
+    def start(self):
+        """
+        start materializing snapshots in the background on the running event loop
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        stop the background materializer
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.execute()
+            await asyncio.sleep(self.interval_seconds)
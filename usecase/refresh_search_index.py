@@ -0,0 +1,99 @@
+"""
+Use case for keeping the in-process search index in line with the experts, entities and litigations tables.
+"""
+import asyncio
+import os
+import time
+from data.search_index import SearchIndex
+
+# search document type -> source table
+SEARCH_TABLES = {
+    "expert": "experts",
+    "nonprofit": "entities",
+    "litigation": "Litigation",
+}
+
+
+class RefreshSearchIndex:
+    """Use case for incrementally refreshing the search index from the database."""
+    def __init__(self, repository_factory, index: SearchIndex, interval_seconds: float | None = None):
+        self.repository_factory = repository_factory
+        self.index = index
+        self.interval_seconds = interval_seconds if interval_seconds is not None else float(
+            os.environ.get("SEARCH_INDEX_REFRESH_SECONDS", "300"))
+        self.refreshed_at = None
+        self._lock = asyncio.Lock()
+        self._task = None
+        self._refresh_task = None
+
+    async def execute(self):
+        """
+        Re-read the indexed tables and apply the differences to the index.
+        A table that cannot be read keeps its previously indexed documents.
+        Callers that waited for a refresh that started after they asked return without refreshing again.
+        """
+        requested_at = time.monotonic()
+        async with self._lock:
+            if self.refreshed_at is not None and self.refreshed_at >= requested_at:
+                return
+            await self._sync()
+
+    async def _sync(self):
+        started_at = time.monotonic()
+        repository = self.repository_factory()
+        for doc_type, table in SEARCH_TABLES.items():
+            rows = await repository.get_all_rows(table)
+            if rows is None:
+                continue
+            changed, removed = await asyncio.to_thread(self.index.sync, doc_type, rows)
+            if changed or removed:
+                print(f"Search index {doc_type}: {changed} documents changed, {removed} removed")
+        # the start time, so that callers who asked while the tables were being read refresh again
+        self.refreshed_at = started_at
+
+    async def ensure_fresh(self):
+        """
+        Build the index on first use and refresh a stale index in the background.
+        """
+        if self.refreshed_at is None:
+            async with self._lock:
+                # another caller may have built the index while this one waited for the lock
+                if self.refreshed_at is None:
+                    await self._sync()
+        elif time.monotonic() - self.refreshed_at > self.interval_seconds and not self._lock.locked():
+            # the task is kept so that it is not garbage collected before it finishes
+            self._refresh_task = asyncio.create_task(self.refresh())
+
+    async def refresh(self):
+        """
+        Refresh the index, logging failures instead of raising them, for refreshes nobody waits for.
+        The previously indexed documents stay searchable when a refresh fails.
+        """
+        try:
+            await self.execute()
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error refreshing search index: {e}")
+
+    def start(self):
+        """
+        start refreshing the index in the background on the running event loop
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """
+        stop the background refresh
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.interval_seconds)
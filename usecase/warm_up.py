@@ -0,0 +1,93 @@
+"""
+Use case for warming up a worker before the load balancer sends it traffic.
+The warm-up runs phases of named steps, the steps of a phase concurrently, e.g. opening the upstream
+connections before loading the homepage and the first list pages through them. Warm-up is best effort:
+a step that fails or is still running at the timeout is logged and the worker becomes ready anyway, so
+that an upstream outage degrades the workers instead of taking all of them out of the load balancer.
+"""
+import asyncio
+import os
+import time
+from api.metrics import registry
+
+
+class WarmUp:
+    """Use case for running the warm-up steps of a worker and tracking its readiness."""
+    def __init__(self, phases: list[dict], timeout_seconds: float | None = None):
+        """
+        :param phases: the phases to run in order, each mapping step names to async callables
+        :param timeout_seconds: the time after which the worker is ready even if steps are still running
+        """
+        self.phases = phases
+        self.timeout_seconds = timeout_seconds if timeout_seconds is not None else float(
+            os.environ.get("WARM_UP_TIMEOUT_SECONDS", "30"))
+        self.results = {}
+        self.started_at = None
+        self.finished_at = None
+        self._task = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        check if the worker is warm. A worker whose warm-up never started, e.g. without a lifespan
+        on serverless platforms, has nothing to wait for.
+        """
+        return self.started_at is None or self.finished_at is not None
+
+    async def execute(self):
+        """
+        Run every phase, then mark the worker ready.
+        """
+        self.started_at = time.monotonic()
+        self.finished_at = None
+        self.results = {}
+        try:
+            async with asyncio.timeout(self.timeout_seconds):
+                for phase in self.phases:
+                    await asyncio.gather(*(self._run_step(name, step) for name, step in phase.items()))
+        except TimeoutError:
+            print(f"Warm-up timed out after {self.timeout_seconds} seconds")
+        for phase in self.phases:
+            for name in phase:
+                self.results.setdefault(name, "timed out")
+
+        self.finished_at = time.monotonic()
+        registry.set("warm_up_seconds", self.finished_at - self.started_at, "duration of the worker warm-up")
+        print(f"Warm-up finished in {self.finished_at - self.started_at:.2f} seconds: {self.results}")
+
+    async def _run_step(self, name: str, step):
+        try:
+            await step()
+            self.results[name] = "ok"
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"Error warming up {name}: {e}")
+            self.results[name] = "failed"
+
+    def start(self):
+        """
+        start the warm-up in the background on the running event loop
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self.execute())
+
+    async def stop(self):
+        """
+        cancel a running warm-up
+        """
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        """
+        get the readiness of the worker and the outcome of each warm-up step
+        """
+        return {
+            "ready": self.ready,
+            "worker_id": os.environ.get("WORKER_ID", "0"),
+            "steps": self.results,
+        }